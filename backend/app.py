@@ -1,24 +1,46 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, Response
 from flask_cors import CORS
 import os
+import sys
+import json
+import time
 import random
+import threading
 from datetime import datetime
 from flask import session
 import sqlite3
 import html
 from functools import wraps
-from requests import RequestException
 from json import JSONDecodeError
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from records import new_state, ValidationError
+from rules import RuleEngine
+from live import CommandError, Connection, LiveHub
+from websock import ClosedResponse, HandshakeError, WebSocket
+from state_view import compile_fields, render
+from shared.frames import FRAME_MIME, FrameError, decode_frame
+from ingest_socket import serve_ingest_socket
+from metrics import Registry
+from profiler import PROFILER, TIMING, TimedJSONProvider
+from assets import AssetStore
+from stream import MJPEGRelay, STREAM_MIME, http_mjpeg_source
+from capture_jobs import CaptureJobs
+from group_commit import GroupCommitWriter, WriterBusy
+from timelapse import Timelapse
+from federation import NODE_ID, Fleet, FederationPusher
+from history import HISTORY_COLUMNS, ExportError, History, decode_cursor, export_chunks, parse_time
 
 
 
-import requests
 CAM_BASE = os.getenv("CAM_BASE", "http://127.0.0.1:5055")
 WEB_DIR = os.path.join(os.path.dirname(__file__), "../web")
 STATIC_DIR = os.path.join(WEB_DIR, "static")
 
 app = Flask(__name__, static_folder=STATIC_DIR, static_url_path="/static")
-CORS(app)
+app.json = TimedJSONProvider(app)  # lets Server-Timing report jsonify() time
+CORS(app, expose_headers=["X-State-Version"])  # so cross-origin dashboards can do ?since=
 
 app.secret_key = os.getenv("SECRET_KEY", "dev-insecure-change-me")
 app.config.update(
@@ -29,30 +51,195 @@ app.config.update(
 
 # ---------------- GLOBAL STATE ----------------
 # Everything the dashboard needs, kept in one place so the frontend can just ask for it.
-# (Collectors / other services can POST updates into this dict.)
-STATE = {
-    "sensors": {"temp": None, "humidity": None, "timestamp": None},
-    "system": {"cpu": None, "ram": None, "ram_speed": None, "core_temp": None, "timestamp": None},
-    "network": {"rx_kbps": None, "tx_kbps": None, "timestamp": None},
-    "weather": {
-        "current_date": None,
-        "outside_temp": None,
-        "condition": None,
-        "current_high_temp": None,
-        "current_low_temp": None,
-        "forecast_day1_date": None,
-        "forecast_day1_avg_temp": None,
-        "forecast_day1_high_temp": None,
-        "forecast_day1_low_temp": None,
-        "forecast_day2_date": None,
-        "forecast_day2_avg_temp": None,
-        "forecast_day2_high_temp": None,
-        "forecast_day2_low_temp": None,
-        "timestamp": None
-    },
-    "fun": {"quote": None, "timestamp": None, "insult": None, "coinflip": None},
-    "camera": {"ok": False, "latest": None, "last_capture": None, "timestamp": None}
-}
+# (Collectors / other services can POST updates into these records.)
+# Each section is a fixed-field record (see records.py): unknown keys get dropped,
+# numbers get coerced, so the state stays small no matter what gets POSTed.
+STATE = new_state()
+
+# Federation: this backend is one node of the fleet (NODE_ID); samples from
+# other nodes land in FLEET, ours are also forwarded if AGGREGATOR_URL is set.
+FLEET = Fleet(NODE_ID, STATE)
+FEDERATION_TOKEN = os.getenv("FEDERATION_TOKEN", "")
+AGGREGATOR_URL = os.getenv("AGGREGATOR_URL", "")
+PUSHER = FederationPusher(AGGREGATOR_URL, NODE_ID, float(os.getenv("FEDERATION_PUSH_INTERVAL", "2")),
+                          FEDERATION_TOKEN) if AGGREGATOR_URL else None
+
+# Time series of the numeric system/network/sensors fields (see history.py), HISTORY=0 turns it off.
+HISTORY = History(os.getenv("HISTORY_DB", os.path.join(os.path.dirname(__file__), "../data/history.db")),
+                  flush_interval=float(os.getenv("HISTORY_FLUSH_S", "10")),
+                  keep_days=float(os.getenv("HISTORY_DAYS", "90"))) if os.getenv("HISTORY", "1") != "0" else None
+
+# Alert rules checked on every sample (see rules.py); ALERT_RULES = path to a rules file.
+RULES = RuleEngine.from_file(os.environ["ALERT_RULES"]) if os.getenv("ALERT_RULES") else RuleEngine()
+
+def update_camera(data: dict) -> None:
+    # Camera status doesn't come in through apply_sample, but rules want to see it too.
+    STATE["camera"].update(data)
+    RULES.observe("camera", STATE["camera"], data)
+
+def apply_sample(section: str, data: dict, node: str | None = None) -> list[str]:
+    # Stamp + validate + store one collector sample (HTTP or Unix socket).
+    # Raises ValidationError, returns the dropped unknown keys.
+    data["timestamp"] = datetime.now().isoformat()
+    if node and node != NODE_ID:
+        # a collector of another Pi posting straight to us (the aggregator)
+        return FLEET.apply(node, section, data)
+    # history + federation get what STATE took (coerced, unknown keys gone), not the raw post
+    accepted, dropped = STATE[section].apply(data)
+    FLEET.touch(NODE_ID)
+    RULES.observe(section, STATE[section], accepted)
+    if HISTORY is not None:
+        HISTORY.record(section, accepted)
+    if PUSHER is not None:
+        PUSHER.offer(section, accepted)
+    return dropped
+
+def federation_refused():
+    # Anything filed under another node needs Bearer FEDERATION_TOKEN. Not optional:
+    # without a token configured this backend doesn't take foreign samples at all.
+    # Returns the error response, or None if the request may go on.
+    if not FEDERATION_TOKEN:
+        return jsonify({"status": "error", "error": "federation disabled: FEDERATION_TOKEN not set"}), 403
+    if request.headers.get("Authorization") != f"Bearer {FEDERATION_TOKEN}":
+        return jsonify({"status": "error", "error": "unauthorized"}), 401
+    return None
+
+def ingest(section: str):
+    # Shared POST handler body for the collector endpoints.
+    # Collectors can send either JSON or a compact binary frame (see shared/frames.py).
+    if request.mimetype == FRAME_MIME:
+        try:
+            # The server clock stays authoritative (same as for JSON posts),
+            # so the frame's epoch isn't stored.
+            _epoch, data = decode_frame(section, request.get_data(cache=False))
+        except FrameError as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+    node = request.headers.get("X-Node-Id")
+    if node and node != NODE_ID:
+        # another Pi's collector filing into FLEET: same token as /api/nodes/push
+        refused = federation_refused()
+        if refused:
+            return refused
+    try:
+        dropped = apply_sample(section, data, node)
+    except ValidationError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    if dropped:
+        return {"status": "ok", "dropped": dropped}
+    return {"status": "ok"}
+
+# ---------------- METRICS ----------------
+# Prometheus-style /metrics: per-route counters + latency, camera upstream calls,
+# SQLite timings and how stale each collector section is.
+
+METRICS = Registry()
+HTTP_REQUESTS = METRICS.counter("http_requests_total", "HTTP requests by route, method and status.",
+                                ("route", "method", "status"))
+HTTP_LATENCY = METRICS.histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                 ("route", "method"))
+CAM_LATENCY = METRICS.histogram("camera_upstream_duration_seconds", "Latency of calls to CAM_BASE.",
+                                ("endpoint",))
+CAM_ERRORS = METRICS.counter("camera_upstream_errors_total", "Failed calls to CAM_BASE (network errors or 5xx).",
+                             ("endpoint",))
+SQLITE_LATENCY = METRICS.histogram("sqlite_query_duration_seconds", "Comment DB query latency.",
+                                   ("query",))
+
+def _ingest_age():
+    now = datetime.now()
+    ages = {}
+    for section, record in STATE.items():
+        ts = record.get("timestamp")
+        try:
+            ages[(section,)] = (now - datetime.fromisoformat(ts).replace(tzinfo=None)).total_seconds()
+        except (TypeError, ValueError):
+            ages[(section,)] = None
+    return ages
+
+def _state_bytes():
+    return {(section,): len(json.dumps(record.to_dict())) for section, record in STATE.items()}
+
+def _fleet_counts():
+    summary = FLEET.summary()
+    return summary["online"], summary["nodes"] - summary["online"]
+
+def _comments_db_bytes():
+    try:
+        return {(): os.path.getsize(COMMENTS_DB)}
+    except OSError:
+        return {}
+
+METRICS.gauge("collector_ingest_age_seconds", "Seconds since each STATE section was last updated.",
+              ("section",), _ingest_age)
+METRICS.gauge("state_section_bytes", "Serialized JSON size of each STATE section.", ("section",), _state_bytes)
+METRICS.gauge("comments_db_bytes", "Size of the comments SQLite file.", (), _comments_db_bytes)
+METRICS.gauge("comment_writes", "Comment writer: queued inserts, group commits, inserts, 429s, timeouts.", ("kind",),
+              lambda: {(k,): v for k, v in COMMENT_WRITER.stats().items() if k != "avg_batch"})
+METRICS.gauge("alerts_firing", "Alert rules currently firing.", (), lambda: {(): len(RULES.active())})
+METRICS.gauge("ws_connections", "Open live channel (/api/ws) connections.", (),
+              lambda: {(): len(LIVE.connections)})
+METRICS.gauge("fleet_nodes", "Known federation nodes by online state.", ("state",),
+              lambda: {(state,): n for state, n in zip(("online", "offline"), _fleet_counts())})
+METRICS.gauge("camera_captures", "Still captures run vs capture requests that joined one.", ("kind",),
+              lambda: {("captured",): CAPTURES.captures, ("coalesced",): CAPTURES.coalesced})
+METRICS.gauge("camera_stream_viewers", "Clients currently watching /api/camera/stream.", (),
+              lambda: {(): PREVIEW.viewers})
+METRICS.gauge("camera_stream_frames", "Preview frames relayed from the camera since startup.", (),
+              lambda: {(): PREVIEW.frames_in})
+
+@app.before_request
+def _metrics_start():
+    g.metrics_start = time.perf_counter()
+    # Server-Timing only for admins who asked: for their session (POST /api/admin/timing)
+    # or for one request (X-Server-Timing: 1, still needs the admin session).
+    # Without a session cookie there's no admin, and touching `session` would add
+    # Vary: Cookie to every response (cached assets included), so check that first.
+    if app.config["SESSION_COOKIE_NAME"] not in request.cookies:
+        return
+    if (request.headers.get("X-Server-Timing") == "1" or session.get("server_timing")) and is_admin():
+        TIMING.start()
+
+@app.after_request
+def _metrics_record(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        # Use the route pattern, not the raw path, so label cardinality stays bounded.
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        elapsed = time.perf_counter() - start
+        HTTP_LATENCY.observe(elapsed, route, request.method)
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        if TIMING.active():
+            response.headers["Server-Timing"] = TIMING.header(elapsed)
+    return response
+
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+class CameraUnreachable(Exception):
+    pass
+
+def cam_request(method: str, path: str, **kwargs):
+    # All calls to the camera collector go through here so they show up in /metrics.
+    # requests is imported on first use: most restarts never touch the camera routes.
+    import requests
+
+    endpoint = path.strip("/").split("/")[0]
+    start = time.perf_counter()
+    try:
+        with TIMING.phase("camera"):
+            r = requests.request(method, f"{CAM_BASE}{path}", **kwargs)
+    except requests.RequestException as e:
+        CAM_ERRORS.inc(endpoint)
+        raise CameraUnreachable(str(e)) from e
+    finally:
+        CAM_LATENCY.observe(time.perf_counter() - start, endpoint)
+    if r.status_code >= 500:
+        CAM_ERRORS.inc(endpoint)
+    return r
 
 # ---------------- ADMIN AUTH ----------------
 # Tiny session-based admin login: good enough to protect the "dangerous" endpoints.
@@ -84,18 +271,37 @@ def admin_logout():
 # ---------------- COMMENTS ----------------
 # Simple comment system backed by SQLite (plus a little spam + rate-limit glue).
 
-COMMENTS_DB = os.path.join(os.path.dirname(__file__), "../data/comments.db")
+COMMENTS_DB = os.getenv("COMMENTS_DB", os.path.join(os.path.dirname(__file__), "../data/comments.db"))
 
-def db():
+_db_ready = False
+_db_init_lock = threading.Lock()
+
+def _connect():
     # Open a SQLite connection with dict-like rows (so we can do row["col"]).
     conn = sqlite3.connect(COMMENTS_DB)
     conn.row_factory = sqlite3.Row
     return conn
 
+def db():
+    # Schema setup happens on first use, not at import time (keeps restarts fast).
+    if not _db_ready:
+        init_comments_db()
+    return _connect()
+
 def init_comments_db():
-    # Make sure the folder + tables exist before we start handling requests.
+    # Make sure the folder + tables exist before we touch the comment tables.
+    global _db_ready
+    with _db_init_lock:
+        if _db_ready:
+            return
+        _create_comment_tables()
+        _db_ready = True
+
+def _create_comment_tables():
     os.makedirs(os.path.dirname(COMMENTS_DB), exist_ok=True)
-    with db() as conn:
+    with SQLITE_LATENCY.time("init"), _connect() as conn:
+        # WAL: readers (GET /api/comments) and the writer thread don't block each other
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
         CREATE TABLE IF NOT EXISTS comments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -123,22 +329,38 @@ def require_admin_session(fn):
         return fn(*args, **kwargs)
     return wrapper
 
-def check_rate_limit(ip: str, max_per_10min: int = 3) -> bool:
+def check_rate_limit(conn, ip: str, max_per_10min: int = 3) -> bool:
     # Basic anti-spam: allow only N comments per 10 minutes per IP.
     # Returns True if allowed, False if blocked.
-    with db() as conn:
-        cur = conn.execute("""
-            SELECT COUNT(*) AS c
-            FROM rate_limits
-            WHERE ip = ?
-              AND created_at >= datetime('now', '-10 minutes')
-        """, (ip,))
-        count = cur.fetchone()["c"]
-        if count >= max_per_10min:
-            return False
-
-        conn.execute("INSERT INTO rate_limits (ip) VALUES (?)", (ip,))
-        return True
+    cur = conn.execute("""
+        SELECT COUNT(*) AS c
+        FROM rate_limits
+        WHERE ip = ?
+          AND created_at >= datetime('now', '-10 minutes')
+    """, (ip,))
+    count = cur.fetchone()["c"]
+    if count >= max_per_10min:
+        return False
+
+    conn.execute("INSERT INTO rate_limits (ip) VALUES (?)", (ip,))
+    return True
+
+def _insert_comment(conn, ip: str, name: str, text: str):
+    # Runs on the writer thread, inside a group commit (see group_commit.py).
+    # Rate limit + insert in one go, so a burst from one IP can't slip past the check.
+    # Returns the new id, or None if rate limited.
+    if not check_rate_limit(conn, ip):
+        return None
+    cur = conn.execute(
+        "INSERT INTO comments (name, text, ip, approved) VALUES (?, ?, ?, 1)",
+        (name, text, ip)
+    )
+    return cur.lastrowid
+
+# All comment inserts go through one writer thread that commits them in batches.
+# COMMENT_QUEUE_MAX: waiting inserts before new ones get a 429.
+COMMENT_WRITER = GroupCommitWriter(db, max_pending=int(os.getenv("COMMENT_QUEUE_MAX", "256")),
+                                   max_batch=int(os.getenv("COMMENT_BATCH_MAX", "64")))
 
 def looks_like_spam(text: str) -> bool:
     # Super cheap "does this look like a bot" filter.
@@ -173,53 +395,57 @@ def looks_like_spam(text: str) -> bool:
 
     return False
 
-init_comments_db()
+def client_ip() -> str:
+    # Best-effort IP (X-Forwarded-For if behind proxy, otherwise remote_addr).
+    return (request.headers.get("X-Forwarded-For") or request.remote_addr or "unknown").split(",")[0].strip()
 
-@app.post("/api/comments")
-def post_comment():
-    data = request.get_json(silent=True) or {}
+def create_comment(data: dict, ip: str):
+    # Shared by POST /api/comments and the live channel's "comment" command.
+    # Returns (body, status, headers).
     text = (data.get("text") or "").strip()
     name = (data.get("name") or "anon").strip()
     website = (data.get("website") or "").strip()  # honeypot field: real users won't fill this
 
     # If this field is filled, it's almost certainly a bot auto-filling forms.
     if website:
-        return jsonify({"error": "blocked"}), 400
+        return {"error": "blocked"}, 400, {}
 
     if len(text) < 1:
-        return jsonify({"error": "empty comment"}), 400
+        return {"error": "empty comment"}, 400, {}
     if len(text) > 500:
-        return jsonify({"error": "comment too long (max 500)"}), 400
+        return {"error": "comment too long (max 500)"}, 400, {}
     if len(name) > 32:
         name = name[:32]
 
     # Quick spam check before we even touch the DB.
     if looks_like_spam(text):
-        return jsonify({"error": "blocked"}), 400
-
-    # Best-effort IP (X-Forwarded-For if behind proxy, otherwise remote_addr).
-    ip = (request.headers.get("X-Forwarded-For") or request.remote_addr or "unknown").split(",")[0].strip()
-
-    if not check_rate_limit(ip):
-        return jsonify({"error": "rate limited"}), 429
+        return {"error": "blocked"}, 400, {}
 
     # Escape user input so it can't inject HTML into the page.
     safe_text = html.escape(text)
     safe_name = html.escape(name)
 
-    with db() as conn:
-        cur = conn.execute(
-            "INSERT INTO comments (name, text, ip, approved) VALUES (?, ?, ?, 1)",
-            (safe_name, safe_text, ip)
-        )
-        comment_id = cur.lastrowid
+    try:
+        with SQLITE_LATENCY.time("insert_comment"), TIMING.phase("db"):
+            comment_id = COMMENT_WRITER.submit(_insert_comment, ip, safe_name, safe_text)
+    except WriterBusy:
+        return {"error": "too many comments right now, try again"}, 429, {"Retry-After": "2"}
+    except (sqlite3.Error, TimeoutError) as e:
+        return {"error": f"could not save comment: {e}"}, 503, {}
 
-    return jsonify({"status": "ok", "id": comment_id})
+    if comment_id is None:
+        return {"error": "rate limited"}, 429, {}
+    return {"status": "ok", "id": comment_id}, 200, {}
+
+@app.post("/api/comments")
+def post_comment():
+    body, status, headers = create_comment(request.get_json(silent=True) or {}, client_ip())
+    return jsonify(body), status, headers
 
 @app.get("/api/comments")
 def get_comments():
     # Return the newest approved comments (kept small to avoid mega payloads).
-    with db() as conn:
+    with SQLITE_LATENCY.time("list_comments"), TIMING.phase("db"), db() as conn:
         rows = conn.execute("""
             SELECT id, name, text, created_at
             FROM comments
@@ -233,31 +459,107 @@ def get_comments():
 @require_admin_session
 def delete_comment(comment_id: int):
     # Admin-only: nuke a comment by id.
-    with db() as conn:
-        conn.execute("DELETE FROM comments WHERE id = ?", (comment_id,))
+    remove_comment(comment_id)
     return jsonify({"status": "ok"})
 
+def remove_comment(comment_id: int) -> None:
+    with SQLITE_LATENCY.time("delete_comment"), TIMING.phase("db"), db() as conn:
+        conn.execute("DELETE FROM comments WHERE id = ?", (comment_id,))
+
+
+# ---------------- PROFILING (ADMIN) ----------------
+# Sampling profiler + Server-Timing switch for when the Pi gets sluggish.
+
+@app.post("/api/admin/profile/start")
+@require_admin_session
+def profile_start():
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get("seconds", 30))
+        interval_ms = float(data.get("interval_ms", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds/interval_ms must be numbers"}), 400
+    if seconds <= 0:
+        return jsonify({"error": "seconds must be > 0"}), 400
+    if not PROFILER.start(seconds, interval_ms):
+        return jsonify({"error": "profiler already running"}), 409
+    return jsonify({"status": "ok", **PROFILER.status()})
+
+@app.post("/api/admin/profile/stop")
+@require_admin_session
+def profile_stop():
+    PROFILER.stop()
+    return jsonify({"status": "ok", **PROFILER.status()})
+
+@app.get("/api/admin/profile")
+@require_admin_session
+def profile_result():
+    # ?format=collapsed downloads the stacks (feed to flamegraph.pl or speedscope).
+    if request.args.get("format") == "collapsed":
+        return Response(PROFILER.collapsed(), mimetype="text/plain",
+                        headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
+    return jsonify(PROFILER.status())
+
+@app.post("/api/admin/timing")
+@require_admin_session
+def request_timing():
+    # Toggle Server-Timing headers (db / camera / serialize phases) for this admin session only.
+    data = request.get_json(silent=True) or {}
+    session["server_timing"] = bool(data.get("enabled"))
+    return jsonify({"status": "ok", "enabled": session["server_timing"]})
+
 
 
 # ---------------- CAMERA ----------------
 # Pi Camera integration: lazy-init the camera, capture files, and serve them back.
 
+def _capture_upstream() -> dict:
+    # Runs on the capture job thread, not in a request.
+    r = cam_request("POST", "/capture", timeout=60)
+    try:
+        data = r.json()
+    except ValueError:
+        raise CameraUnreachable(f"HTTP {r.status_code}, not JSON")
+    if r.status_code >= 400 or data.get("status") != "ok":
+        raise CameraUnreachable(data.get("error") or f"HTTP {r.status_code}")
+    update_camera({"ok": True, "latest": data.get("filename"), "last_capture": data.get("timestamp")})
+    return data
+
+# Clicks within CAPTURE_COALESCE_S of a capture that hasn't finished yet share it.
+CAPTURES = CaptureJobs(_capture_upstream, window=float(os.getenv("CAPTURE_COALESCE_S", "2")))
+
 @app.post("/api/camera/capture")
-def camera_capture_proxy():
+def camera_capture():
+    job, created = CAPTURES.submit()
+    return jsonify({
+        "status": "accepted",
+        "job_id": job.id,
+        "coalesced": not created,
+        "poll": f"/api/camera/jobs/{job.id}",
+    }), 202
+
+@app.get("/api/camera/jobs/<job_id>")
+def camera_capture_job(job_id):
+    job = CAPTURES.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "unknown job"}), 404
     try:
-        r = requests.post(f"{CAM_BASE}/capture", timeout=60)
-        return (r.text, r.status_code, {"Content-Type": r.headers.get("Content-Type", "application/json")})
-    except RequestException as e:
-        return jsonify({"status": "error", "error": f"camera collector unreachable: {e}"}), 502
+        wait = min(float(request.args.get("wait", 0)), 60)
+    except ValueError:
+        return jsonify({"status": "error", "error": "wait must be a number"}), 400
+    if wait > 0:
+        job.wait(wait)  # long-poll: returns as soon as the capture finishes
+    return jsonify(job.to_dict())
 
 @app.get("/api/camera")
 def camera_state_proxy():
     try:
-        r = requests.get(f"{CAM_BASE}/health", timeout=5)
-        r.raise_for_status()
+        r = cam_request("GET", "/health", timeout=5)
+        if r.status_code >= 400:
+            raise CameraUnreachable(f"HTTP {r.status_code}")
         data = r.json()
 
-        STATE["camera"].update({
+        update_camera({
             "ok": data.get("ok", False),
             "latest": data.get("latest"),
             "last_capture": data.get("last_capture"),
@@ -265,33 +567,72 @@ def camera_state_proxy():
         })
         return jsonify(data)
 
-    except (RequestException, ValueError) as e:
+    except (CameraUnreachable, ValueError) as e:
         # ValueError covers JSON decode errors too
-        STATE["camera"]["ok"] = False
+        update_camera({"ok": False})
         return jsonify({"ok": False, "error": f"camera collector error: {e}"}), 502
 
+# Live preview: one upstream MJPEG connection to the camera service's /stream, shared by all viewers.
+PREVIEW = MJPEGRelay(http_mjpeg_source(f"{CAM_BASE}/stream"))
+
+@app.get("/api/camera/stream")
+def camera_stream():
+    return Response(PREVIEW.frames(), mimetype=STREAM_MIME,
+                    headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"})
+
+@app.get("/api/camera/stream/status")
+def camera_stream_status():
+    return jsonify(PREVIEW.status())
+
 @app.get("/photos/<path:filename>")
 def photos_proxy(filename):
     try:
-        r = requests.get(f"{CAM_BASE}/photos/{filename}", timeout=60)
+        r = cam_request("GET", f"/photos/{filename}", timeout=60)
         return (r.content, r.status_code, {"Content-Type": r.headers.get("Content-Type", "application/octet-stream")})
-    except RequestException as e:
+    except CameraUnreachable as e:
         return jsonify({"status": "error", "error": f"camera collector unreachable: {e}"}), 502
 
 
+# ---------------- TIMELAPSE ----------------
+# Stills from PHOTO_DIR encoded into MP4 segments in a low-priority worker process.
+
+PHOTO_DIR = os.getenv("PHOTO_DIR", os.path.join(os.path.dirname(__file__), "../data/pi-cam"))
+TIMELAPSE_DIR = os.getenv("TIMELAPSE_DIR", os.path.join(os.path.dirname(__file__), "../data/timelapse"))
+TIMELAPSE = Timelapse(PHOTO_DIR, TIMELAPSE_DIR, fps=int(os.getenv("TIMELAPSE_FPS", "24")))
+TIMELAPSE_INTERVAL = float(os.getenv("TIMELAPSE_INTERVAL", "900"))  # 0 = only on POST /api/admin/timelapse/build
+
+@app.get("/api/timelapse")
+def timelapse_index():
+    segments = [dict(s, url=f"/api/timelapse/{s['name']}") for s in TIMELAPSE.segments()]
+    return jsonify({"segments": segments, **TIMELAPSE.status()})
+
+@app.get("/api/timelapse/<name>")
+def timelapse_segment(name):
+    if TIMELAPSE.segment_path(name) is None:
+        return jsonify({"status": "error", "error": "unknown segment"}), 404
+    # conditional=True gives Range/206 support, so the video element can seek
+    resp = send_from_directory(TIMELAPSE_DIR, name, mimetype="video/mp4", conditional=True)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"  # finished segments never change
+    return resp
+
+@app.post("/api/admin/timelapse/build")
+@require_admin_session
+def timelapse_build():
+    # Encode everything pending now, including a short tail.
+    TIMELAPSE.build_async(force=True)
+    return jsonify({"status": "started", **TIMELAPSE.status()}), 202
+
+
 # ---------------- SENSORS ----------------
 # Endpoints used by the sensor collector to push updates + frontend to read them.
 
 @app.post("/api/sensors")
 def update_sensors():
-    data = request.get_json(silent=True) or {}
-    data["timestamp"] = datetime.now().isoformat()
-    STATE["sensors"].update(data)
-    return {"status": "ok"}
+    return ingest("sensors")
 
 @app.get("/api/sensors")
 def get_sensors():
-    return jsonify(STATE["sensors"])
+    return jsonify(STATE["sensors"].to_dict())
 
 
 # ---------------- SYSTEM ----------------
@@ -299,14 +640,11 @@ def get_sensors():
 
 @app.post("/api/system")
 def update_system():
-    data = request.get_json(silent=True) or {}
-    data["timestamp"] = datetime.now().isoformat()
-    STATE["system"].update(data)
-    return {"status": "ok"}
+    return ingest("system")
 
 @app.get("/api/system")
 def get_system():
-    return jsonify(STATE["system"])
+    return jsonify(STATE["system"].to_dict())
 
 
 # ---------------- NETWORK ----------------
@@ -314,14 +652,11 @@ def get_system():
 
 @app.post("/api/network")
 def update_network():
-    data = request.get_json(silent=True) or {}
-    data["timestamp"] = datetime.now().isoformat()
-    STATE["network"].update(data)
-    return {"status": "ok"}
+    return ingest("network")
 
 @app.get("/api/network")
 def get_network():
-    return jsonify(STATE["network"])
+    return jsonify(STATE["network"].to_dict())
 
 
 # ---------------- WEATHER ----------------
@@ -329,14 +664,11 @@ def get_network():
 
 @app.post("/api/weather")
 def update_weather():
-    data = request.get_json(silent=True) or {}
-    data["timestamp"] = datetime.now().isoformat()
-    STATE["weather"].update(data)
-    return {"status": "ok"}
+    return ingest("weather")
 
 @app.get("/api/weather")
 def get_weather():
-    return jsonify(STATE["weather"])
+    return jsonify(STATE["weather"].to_dict())
 
 
 # ---------------- FUN ----------------
@@ -344,55 +676,184 @@ def get_weather():
 
 @app.post("/api/fun")
 def update_fun():
-    data = request.get_json(silent=True) or {}
-    data["timestamp"] = datetime.now().isoformat()
-    STATE["fun"].update(data)
-    return {"status": "ok"}
+    return ingest("fun")
 
 @app.get("/api/fun")
 def get_fun():
-    return jsonify(STATE["fun"])
+    return jsonify(STATE["fun"].to_dict())
 
 
 # ---------------- FULL STATE ----------------
 # One endpoint to rule them all: frontend can fetch everything in one request.
+# ?fields=system.cpu,network.*,sensors.temp picks what to send, ?since= the
+# X-State-Version of the previous response leaves out what hasn't changed.
 
 @app.get("/api/state")
 def get_state():
-    return jsonify(STATE)
+    try:
+        selector = compile_fields(request.args.get("fields"))
+    except ValidationError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"status": "error", "error": "since must be an integer version"}), 400
+    payload, version = render(STATE, selector, since)
+    resp = jsonify(payload)
+    resp.headers["X-State-Version"] = str(version)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+# ---------------- ALERTS ----------------
+# What the rule engine (rules.py) has fired. ?since=<event id> for just the new events.
+
+@app.get("/api/alerts")
+def get_alerts():
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"status": "error", "error": "since must be an event id"}), 400
+    return jsonify({
+        "active": RULES.active(),
+        "events": RULES.since(since),
+        "dropped": RULES.dropped,
+    })
+
+@app.get("/api/alerts/rules")
+def get_alert_rules():
+    return jsonify([rule.to_dict() for rule in RULES.rules])
+
+
+# ---------------- EXPORT ----------------
+# /api/export/<section>?from=&to=&format=csv|ndjson[&cursor=&limit=]
+# Streams straight out of the history DB, a batch of rows at a time, gzipped
+# on the fly if the client accepts it. Memory use doesn't depend on the range.
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+@app.get("/api/export/<section>")
+def export_history(section):
+    if HISTORY is None or section not in HISTORY_COLUMNS:
+        return jsonify({"status": "error", "error": f"no history for {section!r}"}), 404
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"status": "error", "error": "format must be csv or ndjson"}), 400
+    try:
+        start = parse_time(request.args.get("from"), "from")
+        end = parse_time(request.args.get("to"), "to")
+        cursor = request.args.get("cursor") or None
+        if cursor:
+            decode_cursor(cursor)  # fail now with a 400, not halfway through the stream
+        limit = request.args.get("limit", type=int)
+    except ExportError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    HISTORY.flush()  # include what's still buffered
+    compress = request.accept_encodings["gzip"] > 0
+    headers = {
+        "Content-Disposition": f'attachment; filename="{section}.{fmt}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    rows = HISTORY.rows(section, start, end, cursor, limit)
+    return Response(export_chunks(rows, section, fmt, compress), mimetype=EXPORT_MIMETYPES[fmt], headers=headers)
+
+
+# ---------------- FLEET ----------------
+# Aggregator endpoints: batched pushes from node backends, per-node state, fleet summary.
+
+@app.post("/api/nodes/push")
+def nodes_push():
+    refused = federation_refused()
+    if refused:
+        return refused
+    batch = request.get_json(silent=True)
+    if not isinstance(batch, dict) or not isinstance(batch.get("samples"), list):
+        return jsonify({"status": "error", "error": "expected {node, samples: [...]}"}), 400
+    node = str(batch.get("node") or "")
+    if node == NODE_ID:
+        return jsonify({"status": "error", "error": "node id is the aggregator's own"}), 400
+    try:
+        result = FLEET.apply_batch(node, batch["samples"], lambda: datetime.now().isoformat())
+    except ValidationError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    return jsonify({"status": "ok", **result})
+
+@app.get("/api/nodes")
+def nodes_summary():
+    return jsonify(FLEET.summary())
+
+@app.get("/api/nodes/<node_id>/state")
+def node_state(node_id):
+    node = FLEET.nodes.get(node_id)
+    if node is None:
+        return jsonify({"status": "error", "error": "unknown node"}), 404
+    return jsonify({section: record.to_dict() for section, record in node.state.items()})
 
 
 # ---------------- SERVE WEBSITE ----------------
 # Serve the dashboard UI (and any static assets) straight from the web folder.
+# With the asset pipeline on (default), files come from an in-memory build:
+# fingerprinted /assets/ URLs, precompressed bodies and proper cache headers.
+# ASSET_PIPELINE=0 serves everything straight from disk (handy while editing HTML).
+
+WEB2_DIR = os.path.join(os.path.dirname(__file__), "../web2")
+WEB2_STATIC = os.path.join(WEB2_DIR, "static")
+
+ASSET_PIPELINE = os.getenv("ASSET_PIPELINE", "1") != "0"
+ASSETS = AssetStore(
+    static_dirs={"/web/static/": STATIC_DIR, "/static/": STATIC_DIR, "/site2/static/": WEB2_STATIC},
+    pages={
+        "/": os.path.join(WEB_DIR, "index.html"),
+        "/index.html": os.path.join(WEB_DIR, "index.html"),
+        "/site2/": os.path.join(WEB2_DIR, "index.html"),
+        "/site2/index.html": os.path.join(WEB2_DIR, "index.html"),
+    },
+)
+
+def serve_file(url: str, folder: str, path: str):
+    resp = ASSETS.serve(url) if ASSET_PIPELINE else None
+    if resp is None:
+        resp = send_from_directory(folder, path)
+    return resp
 
 @app.get("/")
 def index():
-    return send_from_directory(WEB_DIR, "index.html")
+    return serve_file("/", WEB_DIR, "index.html")
+
+@app.get("/assets/<path:path>")
+def hashed_assets(path):
+    resp = ASSETS.serve(f"/assets/{path}")
+    if resp is None:
+        return jsonify({"error": "not found"}), 404
+    return resp
 
 @app.get("/web/static/<path:path>")
 def serve_web_static(path):
-    return send_from_directory(STATIC_DIR, path)
+    return serve_file(f"/web/static/{path}", STATIC_DIR, path)
 
 @app.get("/<path:path>")
 def static_files(path):
-    return send_from_directory(WEB_DIR, path)
+    return serve_file(f"/{path}", WEB_DIR, path)
 
 
-WEB2_DIR = os.path.join(os.path.dirname(__file__), "../web2")
-WEB2_STATIC = os.path.join(WEB2_DIR, "static")
-
 @app.get("/site2/")
 def site2_index():
     # Second site/skin version (served under /site2/).
-    return send_from_directory(WEB2_DIR, "index.html")
+    return serve_file("/site2/", WEB2_DIR, "index.html")
 
 @app.get("/site2/static/<path:path>")
 def site2_static(path):
-    return send_from_directory(WEB2_STATIC, path)
+    return serve_file(f"/site2/static/{path}", WEB2_STATIC, path)
 
 @app.get("/site2/<path:path>")
 def site2_files(path):
-    return send_from_directory(WEB2_DIR, path)
+    return serve_file(f"/site2/{path}", WEB2_DIR, path)
 
 
 # ---------------- BUTTON ACTION ----------------
@@ -405,10 +866,125 @@ def button_action():
     return {"status": "ok"}
 
 
+# ---------------- LIVE CHANNEL ----------------
+# GET /api/ws: one WebSocket per dashboard carrying state pushes and the
+# button commands (see live.py for the message format). Only works under the
+# built-in server (python backend/app.py), which hands over the raw socket.
+# Admin is decided once, at the handshake, from the session cookie.
+
+LIVE = LiveHub(STATE, interval=float(os.getenv("WS_PUSH_INTERVAL", "1")))
+
+@LIVE.command("state")
+def live_state(conn, msg):
+    # one-off read, e.g. other fields than the subscription
+    try:
+        selector = compile_fields(msg.get("fields"))
+    except ValidationError as e:
+        raise CommandError(str(e))
+    data, version = render(STATE, selector)
+    return {"version": version, "data": data}
+
+@LIVE.command("whoami")
+def live_whoami(conn, msg):
+    return {"is_admin": conn.admin, "ip": conn.ip}
+
+@LIVE.command("coinflip")
+def live_coinflip(conn, msg):
+    return {"coinflip": STATE["fun"].coinflip}
+
+@LIVE.command("capture")
+def live_capture(conn, msg):
+    job, created = CAPTURES.submit()
+    conn.jobs.append((msg.get("id"), job))  # a {"type": "job"} message follows when it's done
+    return {"job_id": job.id, "coalesced": not created}
+
+@LIVE.command("comment")
+def live_comment(conn, msg):
+    body, status, _headers = create_comment(msg, conn.ip)
+    if status != 200:
+        raise CommandError(body["error"])
+    return body
+
+@LIVE.command("delete_comment", admin=True)
+def live_delete_comment(conn, msg):
+    try:
+        comment_id = int(msg.get("comment_id"))
+    except (TypeError, ValueError):
+        raise CommandError("comment_id must be an integer")
+    remove_comment(comment_id)
+    return {"status": "ok"}
+
+def _same_origin() -> bool:
+    # Browsers send cookies on cross-site WebSocket handshakes too, so a
+    # foreign page must not get the admin session.
+    origin = request.headers.get("Origin")
+    return origin is None or urlsplit(origin).netloc == request.host
+
+@app.get("/api/ws", websocket=True)  # werkzeug routes upgrade requests only to websocket rules
+def live_socket():
+    try:
+        ws = WebSocket.accept(request.environ)
+    except HandshakeError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    LIVE.serve(Connection(ws, client_ip(), is_admin() and _same_origin()))
+    return ClosedResponse()
+
+
+# ---------------- INGEST SOCKET ----------------
+# Optional: local collectors can push samples over a Unix socket instead of HTTP.
+# Started on the first request, so it also runs under gunicorn & co. (no
+# __main__ there, and a thread started before the workers fork would be lost).
+# With several workers only one of them gets the socket (see ingest_socket.py).
+
+INGEST_SOCKET = os.getenv("INGEST_SOCKET")
+_ingest_lock = threading.Lock()
+_ingest_started = False
+
+def start_ingest_socket() -> None:
+    global _ingest_started
+    if _ingest_started or not INGEST_SOCKET:
+        return
+    with _ingest_lock:
+        if _ingest_started:
+            return
+        _ingest_started = True
+        try:
+            if serve_ingest_socket(INGEST_SOCKET, apply_sample) is not None:
+                print(f"Collector ingest socket at {INGEST_SOCKET}")
+        except OSError as e:
+            # collectors notice and stay on HTTP
+            print(f"Collector ingest socket {INGEST_SOCKET} unavailable: {e}")
+
+
+# ---------------- BACKGROUND THREADS ----------------
+# Everything that has to run in the serving process, started on the first
+# request for the same reason as the ingest socket. Each start is a no-op the
+# second time; python app.py starts them right away.
+
+_background_started = False
+
+def start_background() -> None:
+    global _background_started
+    _background_started = True
+    start_ingest_socket()
+    RULES.start()  # stale checks run even before the first sample
+    if TIMELAPSE_INTERVAL > 0:
+        TIMELAPSE.start(TIMELAPSE_INTERVAL)  # one builder at a time across workers (see timelapse.py)
+
+@app.before_request
+def _start_background():
+    if not _background_started:
+        start_background()
+
+
 # ---------------- RUN SERVER ----------------
 # Local dev entrypoint (in production you'd usually run via gunicorn/systemd).
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "5000"))
+    start_background()  # right away here, collectors may start before any HTTP request
+    if PUSHER is not None:
+        # the pusher itself starts with the first sample (that also covers WSGI servers)
+        print(f"Forwarding samples to {AGGREGATOR_URL} as node {NODE_ID}")
     print(f"Dashboard running on http://localhost:{port}")
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+# ---------------- STATIC ASSETS ----------------
+# Built once at startup: every static file gets a content-hashed name under
+# /assets/ (served with a year-long immutable Cache-Control), the HTML pages get
+# their references rewritten to those names, and everything compressible is
+# gzipped (+ brotli if installed) ahead of time. Requests just pick the smallest
+# variant the browser accepts.
+
+ASSET_PREFIX = "/assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # HTML: always check the ETag, usually a cheap 304
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/x-icon",
+                "image/vnd.microsoft.icon")
+
+_REF_RE = re.compile(r'(href|src)="([^"?#]+)"')
+
+
+class Asset:
+    __slots__ = ("body", "gzip", "br", "etag", "mimetype", "cache_control")
+
+    def __init__(self, body: bytes, mimetype: str, cache_control: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.gzip = None
+        self.br = None
+        if mimetype.startswith(COMPRESSIBLE):
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                self.gzip = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.br = br
+
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def _mimetype(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class AssetStore:
+    """
+    static_dirs: {url_prefix: directory} for the static folders,
+    pages: {url: html_file} for the HTML entry points.
+    """
+
+    def __init__(self, static_dirs: dict, pages: dict):
+        self.static_dirs = static_dirs
+        self.pages = pages
+        self.assets = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        assets = {}
+        rewrites = {}
+        for prefix, folder in self.static_dirs.items():
+            if not os.path.isdir(folder):
+                continue
+            for dirpath, _, files in os.walk(folder):
+                for filename in files:
+                    full = os.path.join(dirpath, filename)
+                    rel = os.path.relpath(full, folder).replace(os.sep, "/")
+                    with open(full, "rb") as f:
+                        body = f.read()
+                    mimetype = _mimetype(filename)
+                    digest = hashlib.sha256(body).hexdigest()[:10]
+                    stem, ext = os.path.splitext(rel)
+                    hashed = f"{ASSET_PREFIX}{stem}.{digest}{ext}"
+                    if hashed not in assets:
+                        assets[hashed] = Asset(body, mimetype, IMMUTABLE)
+                    # the old URL still works, it just isn't cached forever
+                    assets[prefix + rel] = Asset(body, mimetype, REVALIDATE)
+                    rewrites[prefix + rel] = hashed
+
+        for url, path in self.pages.items():
+            with open(path, "r", encoding="utf-8") as f:
+                html_text = f.read()
+            html_text = _REF_RE.sub(lambda m: f'{m.group(1)}="{rewrites.get(m.group(2), m.group(2))}"', html_text)
+            assets[url] = Asset(html_text.encode("utf-8"), "text/html; charset=utf-8", REVALIDATE)
+
+        self.assets = assets
+        self._built = True
+
+    def get(self, url: str):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+        return self.assets.get(url)
+
+    def serve(self, url: str):
+        """Response for url (picking gzip/br by Accept-Encoding), or None if unknown."""
+        asset = self.get(url)
+        if asset is None:
+            return None
+
+        accept = request.headers.get("Accept-Encoding", "")
+        body, coding = asset.body, None
+        if asset.br is not None and _accepts(accept, "br"):
+            body, coding = asset.br, "br"
+        elif asset.gzip is not None and _accepts(accept, "gzip"):
+            body, coding = asset.gzip, "gzip"
+
+        etag = asset.etag + ("-" + coding if coding else "")
+        headers = {"Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+        if coding:
+            headers["Content-Encoding"] = coding
+
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304, headers=headers)
+        else:
+            resp = Response(body, content_type=asset.mimetype, headers=headers)
+        resp.set_etag(etag)
+        return resp
+
+    def report(self) -> list[tuple]:
+        """(url, raw bytes, gzip bytes, brotli bytes) for every asset."""
+        self.get("")
+        return [(url, len(a.body), len(a.gzip) if a.gzip else None, len(a.br) if a.br else None)
+                for url, a in sorted(self.assets.items())]
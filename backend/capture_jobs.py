@@ -0,0 +1,100 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ---------------- CAPTURE JOBS ----------------
+# POST /api/camera/capture used to hold a Flask worker for the whole still
+# capture. Now it just gets a job: captures run one at a time on a background
+# thread, and anyone asking for a capture while a recent one is still queued or
+# running joins that job instead of triggering another shot.
+# Clients poll the job, or long-poll it with ?wait=.
+
+class Job:
+    __slots__ = ("id", "created", "started", "finished", "status", "result", "error", "requests", "_done")
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.status = "pending"  # pending -> running -> done | error
+        self.result = None
+        self.error = None
+        self.requests = 1  # how many capture requests share this job
+        self._done = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "requests": self.requests,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class CaptureJobs:
+    """
+    run_capture() does the actual capture and returns the result dict
+    (raise to fail the job). window: seconds after creation during which new
+    requests join an unfinished job. keep: finished jobs remembered for polling.
+    """
+
+    def __init__(self, run_capture, window: float = 2.0, keep: int = 100):
+        self.run_capture = run_capture
+        self.window = window
+        self.keep = keep
+        self.jobs = OrderedDict()
+        self.captures = 0
+        self.coalesced = 0
+        self._latest = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture-job")
+
+    def submit(self) -> tuple[Job, bool]:
+        """(job, created) - created is False if the request joined a running/queued job."""
+        with self._lock:
+            latest = self._latest
+            if latest is not None and latest.status in ("pending", "running") \
+                    and time.time() - latest.created <= self.window:
+                latest.requests += 1
+                self.coalesced += 1
+                return latest, False
+
+            job = Job(f"{int(time.time())}-{next(self._ids)}")
+            self.jobs[job.id] = job
+            self._latest = job
+            while len(self.jobs) > self.keep:
+                oldest = next(iter(self.jobs.values()))
+                if oldest.status in ("pending", "running"):
+                    break
+                self.jobs.popitem(last=False)
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def _run(self, job: Job) -> None:
+        job.started = time.time()
+        job.status = "running"
+        self.captures += 1
+        try:
+            job.result = self.run_capture()
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            job._done.set()
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
@@ -0,0 +1,198 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+from records import new_state, ValidationError
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- FEDERATION ----------------
+# Several Pis, one dashboard. Every backend has a NODE_ID. A node backend with
+# AGGREGATOR_URL set forwards its samples to the aggregator in batches
+# (FederationPusher); the aggregator files them per node (Fleet). Collectors can
+# also post straight to an aggregator by tagging samples with X-Node-Id.
+
+NODE_ID = os.getenv("NODE_ID") or socket.gethostname()
+MAX_NODES = int(os.getenv("FEDERATION_MAX_NODES", "256"))
+MAX_NODE_ID_LEN = 64
+OFFLINE_AFTER_S = 30
+
+
+class Node:
+    __slots__ = ("id", "state", "last_seen", "samples", "pushes")
+
+    def __init__(self, node_id: str, state=None):
+        self.id = node_id
+        self.state = state if state is not None else new_state()
+        self.last_seen = None
+        self.samples = 0
+        self.pushes = 0
+
+
+class Fleet:
+    """Per-node STATE. The local node shares the app's own STATE dict."""
+
+    def __init__(self, local_id: str, local_state: dict, max_nodes: int = MAX_NODES):
+        self.local_id = local_id
+        self.max_nodes = max_nodes
+        self.nodes = {local_id: Node(local_id, local_state)}
+        self._lock = threading.Lock()
+
+    def node(self, node_id: str) -> Node:
+        node = self.nodes.get(node_id)
+        if node is not None:
+            return node
+        if not node_id or len(node_id) > MAX_NODE_ID_LEN or not node_id.isprintable():
+            raise ValidationError("bad node id")
+        with self._lock:
+            node = self.nodes.get(node_id)
+            if node is None:
+                if len(self.nodes) >= self.max_nodes:
+                    raise ValidationError(f"too many nodes (max {self.max_nodes})")
+                node = self.nodes[node_id] = Node(node_id)
+        return node
+
+    def touch(self, node_id: str) -> None:
+        node = self.nodes.get(node_id)
+        if node is not None:
+            node.last_seen = time.time()
+            node.samples += 1
+
+    def apply(self, node_id: str, section: str, data: dict) -> list[str]:
+        """Validate + store one sample for a node. Raises ValidationError."""
+        node = self.node(node_id)
+        record = node.state.get(section)
+        if record is None:
+            raise ValidationError(f"unknown section {section!r}")
+        dropped = record.update(data)
+        node.last_seen = time.time()
+        node.samples += 1
+        return dropped
+
+    def apply_batch(self, node_id: str, samples: list, stamp) -> dict:
+        """
+        samples: [{"section": ..., "data": {...}}, ...]. Bad samples are
+        counted and skipped; the rest of the batch still goes in.
+        """
+        node = self.node(node_id)
+        node.pushes += 1
+        ok, errors = 0, []
+        for sample in samples:
+            try:
+                if not isinstance(sample, dict) or not isinstance(sample.get("data"), dict):
+                    raise ValidationError("sample must be {section, data}")
+                data = dict(sample["data"])
+                data["timestamp"] = sample.get("timestamp") or stamp()
+                self.apply(node_id, str(sample.get("section")), data)
+                ok += 1
+            except ValidationError as e:
+                errors.append(str(e))
+        return {"accepted": ok, "rejected": len(errors), "errors": errors[:10]}
+
+    def summary(self) -> dict:
+        """Fleet overview: one small row per node plus a few fleet-wide numbers."""
+        now = time.time()
+        rows = []
+        for node in list(self.nodes.values()):
+            system, sensors, network = node.state["system"], node.state["sensors"], node.state["network"]
+            age = None if node.last_seen is None else round(now - node.last_seen, 1)
+            rows.append({
+                "id": node.id,
+                "local": node.id == self.local_id,
+                "online": age is not None and age < OFFLINE_AFTER_S,
+                "last_seen_s": age,
+                "cpu": system.cpu,
+                "ram": system.ram,
+                "core_temp": system.core_temp,
+                "temp": sensors.temp,
+                "rx_kbps": network.rx_kbps,
+                "tx_kbps": network.tx_kbps,
+                "samples": node.samples,
+            })
+        rows.sort(key=lambda r: r["id"])
+        online = [r for r in rows if r["online"]]
+        cpus = [r["cpu"] for r in online if r["cpu"] is not None]
+        temps = [r for r in online if r["core_temp"] is not None]
+        hottest = max(temps, key=lambda r: r["core_temp"], default=None)
+        return {
+            "nodes": len(rows),
+            "online": len(online),
+            "cpu_avg": round(sum(cpus) / len(cpus), 1) if cpus else None,
+            "core_temp_max": hottest["core_temp"] if hottest else None,
+            "hottest_node": hottest["id"] if hottest else None,
+            "rx_kbps_total": round(sum(r["rx_kbps"] or 0 for r in online), 1),
+            "tx_kbps_total": round(sum(r["tx_kbps"] or 0 for r in online), 1),
+            "node_list": rows,
+        }
+
+
+class FederationPusher:
+    """
+    Node side: remembers the newest sample per section and sends them to the
+    aggregator in one POST every `interval` seconds. STATE only keeps the
+    latest value anyway, so a slow or unreachable aggregator costs nothing but
+    freshness: nothing queues up. The push thread starts with the first
+    offer(), so it runs in whichever process actually gets samples (WSGI
+    workers included).
+    """
+
+    def __init__(self, url: str, node_id: str, interval: float = 2.0, token: str = ""):
+        self.url = url.rstrip("/") + "/api/nodes/push"
+        self.node_id = node_id
+        self.interval = interval
+        self.token = token
+        self.pushes = 0
+        self.failures = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def offer(self, section: str, data: dict) -> None:
+        with self._lock:
+            self._pending[section] = data
+        if self._thread is None:
+            self.start()
+
+    def _take(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _run(self) -> None:
+        import requests
+        session = requests.Session()
+        if self.token:
+            session.headers["Authorization"] = f"Bearer {self.token}"
+        backoff = self.interval
+        while True:
+            time.sleep(backoff)
+            pending = self._take()
+            if not pending:
+                continue
+            batch = {"node": self.node_id,
+                     "samples": [{"section": s, "data": d, "timestamp": d.get("timestamp")}
+                                 for s, d in pending.items()]}
+            try:
+                r = session.post(self.url, json=batch, timeout=5)
+                r.raise_for_status()
+                self.pushes += 1
+                backoff = self.interval
+            except requests.RequestException as e:
+                self.failures += 1
+                log.warning("Federation push to %s failed: %s", self.url, e)
+                # put back what hasn't been superseded by newer samples meanwhile
+                with self._lock:
+                    for s, d in pending.items():
+                        self._pending.setdefault(s, d)
+                backoff = min(backoff * 2, 60)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="federation-push", daemon=True)
+            self._thread.start()
+        log.info("Forwarding samples to %s as node %s", self.url, self.node_id)
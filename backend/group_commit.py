@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- GROUP COMMIT ----------------
+# One thread owns all comment writes. Requests hand it a small job (a function
+# taking the connection) and wait for the result; the thread takes whatever is
+# queued, up to max_batch jobs, and runs them in ONE transaction, so a burst of
+# 50 comments costs one commit (one fsync on the SD card) instead of 100, and
+# nobody fights over SQLite's write lock. Every job gets its own savepoint, so
+# one failing job doesn't take the rest of the batch with it.
+# The queue is bounded: when it's full, submit() raises WriterBusy right away
+# (-> 429) instead of letting requests pile up behind the disk. A job whose
+# submit() timed out is cancelled and skipped, so a 503 really means "not
+# saved" and a retry doesn't post twice.
+
+class WriterBusy(Exception):
+    pass
+
+
+class GroupCommitWriter:
+    def __init__(self, connect, max_pending: int = 256, max_batch: int = 64, timeout: float = 10.0):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.batches = 0
+        self.jobs = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, fn, *args):
+        """Run fn(conn, *args) in the next group commit and return its result (after the commit)."""
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args))
+        except queue.Full:
+            self.rejected += 1
+            raise WriterBusy(f"{self._queue.maxsize} writes already queued") from None
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="comment-writer", daemon=True)
+                    self._thread.start()
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            if future.cancel():
+                self.timed_out += 1
+                raise
+        # the writer picked it up just as we gave up: it's being committed, wait for the outcome
+        return future.result(self.timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _take_batch(self) -> list:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        conn = None
+        while True:
+            # drops jobs cancelled by a timed-out submit(); the rest can't be cancelled anymore
+            batch = [job for job in self._take_batch() if job[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                if conn is None:
+                    conn = self.connect()
+                    conn.isolation_level = None  # we issue BEGIN/COMMIT ourselves
+                self._commit(conn, batch)
+            except Exception as e:
+                # anything (sqlite, OSError from creating the DB dir, ...) fails this batch only,
+                # the thread has to survive or every later submit() times out
+                log.warning("Comment write batch of %d failed: %s", len(batch), e)
+                for future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if conn is not None:
+                    conn.close()
+                    conn = None  # start over with a fresh connection
+
+    def _commit(self, conn, batch: list) -> None:
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for future, fn, args in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, True, fn(conn, *args)))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    results.append((future, False, e))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.batches += 1
+        self.jobs += len(batch)
+        # results only go out once they're committed
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_batch": round(self.jobs / self.batches, 2) if self.batches else None,
+        }
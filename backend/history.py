@@ -0,0 +1,227 @@
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- HISTORY ----------------
+# STATE only knows "now". History keeps every system/network/sensors sample in
+# a separate SQLite file, one table per section with a column per numeric field.
+# Samples are buffered in memory and written by a background thread in one
+# transaction every few seconds, so the 1 Hz collectors don't turn into 1 Hz
+# SD card commits. Exports read it back in keyset-paginated batches: short
+# queries, no long-running read transaction, constant memory for any range.
+
+HISTORY_COLUMNS = {
+    "system": ("cpu", "ram", "ram_speed", "core_temp"),
+    "network": ("rx_kbps", "tx_kbps", "rx_kbps_peak", "tx_kbps_peak"),
+    "sensors": ("temp", "humidity", "pressure"),
+}
+
+EXPORT_BATCH = 500
+MAX_BUFFERED = 50_000  # if the disk stalls, drop the oldest samples instead of growing forever
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_time(value, name):
+    """Epoch seconds or ISO 8601 (naive = server local time)."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ExportError(f"{name}: expected epoch seconds or ISO 8601, got {value!r}") from None
+
+
+def encode_cursor(ts: float, row_id: int) -> str:
+    return f"{ts!r}~{row_id}"
+
+
+def decode_cursor(token: str) -> tuple[float, int]:
+    try:
+        ts, row_id = token.split("~")
+        return float(ts), int(row_id)
+    except ValueError:
+        raise ExportError(f"bad cursor {token!r}") from None
+
+
+class History:
+    def __init__(self, path: str, flush_interval: float = 10.0, keep_days: float = 90):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.keep_days = keep_days
+        self.written = 0
+        self.dropped = 0
+        self._buffer = deque(maxlen=MAX_BUFFERED)
+        self._lock = threading.Lock()
+        self._ready = False
+        self._writer = None
+
+    # ---- storage ----
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init(self) -> None:
+        with self._lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")  # exports don't block the writer
+                for section, columns in HISTORY_COLUMNS.items():
+                    cols = ", ".join(f"{c} REAL" for c in columns)
+                    conn.execute(f"CREATE TABLE IF NOT EXISTS history_{section} "
+                                 f"(id INTEGER PRIMARY KEY, ts REAL NOT NULL, {cols})")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS history_{section}_ts ON history_{section}(ts)")
+            self._ready = True
+
+    # ---- writing ----
+
+    def record(self, section: str, data: dict, ts: float | None = None) -> None:
+        """Queue one sample (called from apply_sample; cheap, never touches disk)."""
+        columns = HISTORY_COLUMNS.get(section)
+        if columns is None:
+            return
+        if len(self._buffer) == MAX_BUFFERED:
+            self.dropped += 1
+        self._buffer.append((section, ts if ts is not None else time.time(),
+                             tuple(data.get(c) for c in columns)))
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                    self._writer.start()
+
+    def flush(self) -> int:
+        """Write everything buffered in one transaction. Returns the number of rows."""
+        rows = {}
+        n = 0
+        while self._buffer:
+            try:
+                section, ts, values = self._buffer.popleft()
+            except IndexError:
+                break
+            rows.setdefault(section, []).append((ts,) + values)
+            n += 1
+        if not n:
+            return 0
+        self._init()
+        with self._connect() as conn:
+            for section, batch in rows.items():
+                columns = HISTORY_COLUMNS[section]
+                marks = ", ".join("?" * (len(columns) + 1))
+                conn.executemany(f"INSERT INTO history_{section} (ts, {', '.join(columns)}) VALUES ({marks})", batch)
+        self.written += n
+        return n
+
+    def prune(self) -> None:
+        if self.keep_days <= 0:
+            return
+        self._init()
+        cutoff = time.time() - self.keep_days * 86400
+        with self._connect() as conn:
+            for section in HISTORY_COLUMNS:
+                conn.execute(f"DELETE FROM history_{section} WHERE ts < ?", (cutoff,))
+
+    def _write_loop(self) -> None:
+        last_prune = 0.0
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                if time.monotonic() - last_prune > 3600:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except sqlite3.Error as e:
+                log.warning("History write failed: %s", e)
+
+    # ---- reading ----
+
+    def rows(self, section: str, start=None, end=None, cursor=None, limit=None):
+        """
+        Generator of (ts, id, values...) in time order, fetched EXPORT_BATCH at a
+        time, each batch its own short query continuing after the last row.
+        """
+        columns = HISTORY_COLUMNS[section]
+        self._init()
+        last = decode_cursor(cursor) if cursor else (start if start is not None else float("-inf"), -1)
+        if cursor and start is not None and last[0] < start:
+            last = (start, -1)
+        end = end if end is not None else float("inf")
+        sql = (f"SELECT ts, id, {', '.join(columns)} FROM history_{section} "
+               f"WHERE (ts, id) > (?, ?) AND ts < ? ORDER BY ts, id LIMIT ?")
+        remaining = limit
+        conn = self._connect()
+        try:
+            while remaining is None or remaining > 0:
+                n = EXPORT_BATCH if remaining is None else min(EXPORT_BATCH, remaining)
+                # row-value compare: an index range seek, where "ts > ? OR (ts = ? AND ...)" rescans from the start
+                batch = conn.execute(sql, (last[0], last[1], end, n)).fetchall()
+                if not batch:
+                    return
+                yield from batch
+                last = (batch[-1][0], batch[-1][1])
+                if remaining is not None:
+                    remaining -= len(batch)
+                if len(batch) < n:
+                    return
+        finally:
+            conn.close()
+
+
+def export_chunks(rows, section: str, fmt: str, compress: bool = False):
+    """
+    Turn a row generator into CSV or NDJSON byte chunks (one chunk per
+    EXPORT_BATCH rows), optionally gzipped on the fly. Each row carries its
+    cursor token: pass the last one received as ?cursor= to resume.
+    """
+    columns = HISTORY_COLUMNS[section]
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def out(text: str) -> bytes:
+        data = text.encode()
+        # sync flush so every chunk is decodable as soon as it arrives
+        return gz.compress(data) + gz.flush(zlib.Z_SYNC_FLUSH) if gz else data
+
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer:
+        writer.writerow(("cursor", "time") + columns)
+    pending = 0
+    for ts, row_id, *values in rows:
+        when = datetime.fromtimestamp(ts).isoformat()
+        if writer:
+            writer.writerow([encode_cursor(ts, row_id), when] + ["" if v is None else v for v in values])
+        else:
+            row = {"cursor": encode_cursor(ts, row_id), "time": when}
+            row.update(zip(columns, values))
+            buf.write(json.dumps(row, separators=(",", ":")))
+            buf.write("\n")
+        pending += 1
+        if pending >= EXPORT_BATCH:
+            yield out(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    tail = out(buf.getvalue()) if buf.tell() else b""
+    if gz:
+        tail += gz.flush()
+    if tail:
+        yield tail
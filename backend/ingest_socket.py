@@ -0,0 +1,89 @@
+import fcntl
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.frames import FrameError, decode_frame  # noqa: E402
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- UNIX SOCKET INGEST ----------------
+# Local collectors can skip HTTP entirely and fire one datagram per sample at
+# a Unix socket. Datagram layout (keep in sync with collectors/transport.py):
+#   kind byte (0 = JSON, 1 = binary frame), section name length byte,
+#   section name (ascii), body.
+
+KIND_JSON = 0
+KIND_FRAME = 1
+MAX_DATAGRAM = 64 * 1024
+
+_HEADER = struct.Struct("<BB")
+
+
+def unpack_datagram(buf: bytes) -> tuple[str, dict]:
+    """Return (section, data) for one datagram. Raises ValueError on garbage."""
+    if len(buf) < _HEADER.size:
+        raise ValueError("datagram too short")
+    kind, name_len = _HEADER.unpack_from(buf)
+    start = _HEADER.size
+    section = buf[start:start + name_len].decode("ascii")
+    body = buf[start + name_len:]
+
+    if kind == KIND_FRAME:
+        _epoch, data = decode_frame(section, body)
+    elif kind == KIND_JSON:
+        data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("JSON body must be an object")
+    else:
+        raise ValueError(f"unknown datagram kind {kind}")
+    return section, data
+
+
+def serve_ingest_socket(path: str, apply_sample) -> threading.Thread | None:
+    """
+    Bind a SOCK_DGRAM Unix socket at path and feed every datagram into
+    apply_sample(section, data) on a daemon thread. Returns None if another
+    process (e.g. another WSGI worker) already serves this path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # One owner per path: every worker unlinking + rebinding it would steal it
+    # from the others. The lock is held (fd left open) for the process' lifetime.
+    lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o660)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(lock_fd)
+        log.info("Ingest socket %s is served by another process", path)
+        return None
+
+    # A stale socket file from a previous run would make bind() fail.
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    os.chmod(path, 0o660)
+
+    def loop():
+        while True:
+            buf = sock.recv(MAX_DATAGRAM)
+            try:
+                section, data = unpack_datagram(buf)
+                apply_sample(section, data)
+            except (ValueError, KeyError, FrameError) as e:
+                # ValueError also covers JSON decode + record validation errors
+                log.warning("Dropped ingest datagram: %s", e)
+
+    t = threading.Thread(target=loop, name="ingest-socket", daemon=True)
+    t.start()
+    log.info("Listening for collector datagrams on %s", path)
+    return t
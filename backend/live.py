@@ -0,0 +1,216 @@
+import json
+import logging
+import select
+import threading
+import time
+
+from records import CLOCK, ValidationError
+from state_view import compile_fields, render
+from websock import ConnectionClosed, text_frame
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- LIVE CHANNEL ----------------
+# One WebSocket per dashboard (/api/ws) instead of a poll every second plus a
+# request per button press. Server -> client:
+#   {"type": "state", "version": N, "data": {...}}    changed fields only (see state_view.py)
+#   {"type": "reply", "id": 7, "ok": true, "result": ...}
+#   {"type": "job", "id": 7, "job": {...}}             when a capture started by command 7 finishes
+# Client -> server: {"id": 7, "cmd": "capture", ...args}
+#
+# Each connection is a small __slots__ object plus the thread the server
+# already gives it (parked in recv()). One broadcaster thread does the pushes:
+# connections that want the same fields at the same version (normally all of
+# them) share one render + one encoded frame, so a tick costs one JSON dump
+# however many dashboards are open. The hub only writes to sockets that poll()
+# reports writable; one that isn't is skipped for that tick (and gets the merged
+# delta later), and closed once it has stayed full for STALLED_CLOSE_S. A write
+# that still blocks (frame bigger than the free buffer) gives up after
+# websock.SEND_TIMEOUT_S. Either way one dead Wi-Fi client can't stall the rest.
+
+PING_EVERY_S = 30
+STALLED_CLOSE_S = 30
+
+
+class CommandError(Exception):
+    pass
+
+
+class Connection:
+    __slots__ = ("ws", "ip", "admin", "selector", "version", "jobs", "last_ping", "stalled_since")
+
+    def __init__(self, ws, ip: str, admin: bool):
+        self.ws = ws
+        self.ip = ip
+        self.admin = admin
+        self.selector = None  # nothing pushed until the client subscribes
+        self.version = None
+        self.jobs = []  # (command id, job) still running
+        self.last_ping = time.monotonic()
+        self.stalled_since = None  # when its send buffer was last seen full
+
+    def reply(self, msg_id, ok: bool, **body) -> None:
+        self.ws.send(json.dumps({"type": "reply", "id": msg_id, "ok": ok, **body}, default=str))
+
+
+class LiveHub:
+    def __init__(self, state: dict, interval: float = 1.0):
+        self.state = state
+        self.interval = interval
+        self.connections = set()
+        self.commands = {}  # name -> (handler, admin only)
+        self.frames_sent = 0
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.command("subscribe")(self._subscribe)
+        self.command("ping")(lambda conn, msg: "pong")
+
+    def command(self, name: str, admin: bool = False):
+        """Decorator: handler(conn, msg) -> result (JSON-able). Raise CommandError for a clean error reply."""
+        def register(fn):
+            self.commands[name] = (fn, admin)
+            return fn
+        return register
+
+    def _subscribe(self, conn: Connection, msg: dict):
+        try:
+            selector = compile_fields(msg.get("fields"))
+        except ValidationError as e:
+            raise CommandError(str(e))
+        # full state in the reply, deltas after that
+        data, version = render(self.state, selector)
+        conn.selector, conn.version = selector, version
+        return {"version": version, "data": data}
+
+    # ---- per connection (runs on the server's thread for that request) ----
+
+    def serve(self, conn: Connection) -> None:
+        with self._lock:
+            self.connections.add(conn)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._broadcast_loop, name="live-hub", daemon=True)
+                self._thread.start()
+        try:
+            while True:
+                self._handle(conn, conn.ws.recv())
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                self.connections.discard(conn)
+            conn.ws.close()
+
+    def _handle(self, conn: Connection, raw) -> None:
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            conn.reply(None, False, error="not JSON")
+            return
+        if not isinstance(msg, dict):
+            conn.reply(None, False, error="expected an object")
+            return
+        msg_id = msg.get("id")
+        entry = self.commands.get(msg.get("cmd"))
+        if entry is None:
+            conn.reply(msg_id, False, error=f"unknown command {msg.get('cmd')!r}")
+            return
+        handler, admin_only = entry
+        if admin_only and not conn.admin:
+            conn.reply(msg_id, False, error="admin required")
+            return
+        try:
+            result = handler(conn, msg)
+        except CommandError as e:
+            conn.reply(msg_id, False, error=str(e))
+            return
+        except Exception as e:
+            log.exception("Live command %s failed", msg.get("cmd"))
+            conn.reply(msg_id, False, error=f"internal error: {e}")
+            return
+        conn.reply(msg_id, True, result=result)
+
+    # ---- pushes ----
+
+    def _broadcast_loop(self) -> None:
+        last_version = None
+        while True:
+            time.sleep(self.interval)
+            try:
+                changed = CLOCK.now != last_version
+                last_version = CLOCK.now
+                self.tick(push_state=changed)
+            except Exception:
+                log.exception("Live push failed")
+
+    def _writable(self, conns: list) -> list:
+        # poll, not select: fd numbers pass 1024 quickly with hundreds of clients
+        poller = select.poll()
+        by_fd = {}
+        for conn in conns:
+            try:
+                fd = conn.ws.sock.fileno()
+            except OSError:
+                continue
+            if fd >= 0:
+                by_fd[fd] = conn
+                poller.register(fd, select.POLLOUT)
+        return [by_fd[fd] for fd, events in poller.poll(0) if events & select.POLLOUT and fd in by_fd]
+
+    def tick(self, push_state: bool = True) -> int:
+        """One hub round: state deltas, finished jobs, pings; only to writable sockets. Returns state frames sent."""
+        now = time.monotonic()
+        with self._lock:
+            conns = [c for c in self.connections if not c.ws.closed]
+        ready = self._writable(conns)
+        ready_set = set(ready)
+        for conn in conns:
+            if conn in ready_set:
+                conn.stalled_since = None
+            elif conn.stalled_since is None:
+                conn.stalled_since = now
+            elif now - conn.stalled_since > STALLED_CLOSE_S:
+                log.info("Closing stalled live connection from %s", conn.ip)
+                conn.ws.abort()  # its serve() loop wakes up and cleans up
+        sent = self.push_state(ready) if push_state else 0
+        for conn in ready:
+            self._push_jobs_and_ping(conn, now)
+        return sent
+
+    def push_state(self, conns: list) -> int:
+        """Send each (writable) connection what changed since its version. Returns frames sent."""
+        groups = {}
+        for conn in conns:
+            if conn.selector is not None:
+                groups.setdefault((conn.selector, conn.version), []).append(conn)
+        sent = 0
+        for (selector, since), members in groups.items():
+            data, version = render(self.state, selector, since)
+            self.renders += 1
+            payload = text_frame(json.dumps({"type": "state", "version": version, "data": data})) if data else None
+            for conn in members:
+                conn.version = version
+                if payload is None:
+                    continue
+                try:
+                    conn.ws.send_raw(payload)
+                    sent += 1
+                except ConnectionClosed:
+                    pass  # its serve() loop notices and cleans up
+        self.frames_sent += sent
+        return sent
+
+    def _push_jobs_and_ping(self, conn: Connection, now: float) -> None:
+        try:
+            for entry in [e for e in conn.jobs if e[1].status in ("done", "error")]:
+                conn.jobs.remove(entry)
+                conn.ws.send(json.dumps({"type": "job", "id": entry[0], "job": entry[1].to_dict()}, default=str))
+            if now - conn.last_ping > PING_EVERY_S:
+                conn.last_ping = now
+                conn.ws.send_raw(b"\x89\x00")  # ping: finds dead peers that never sent a FIN
+        except ConnectionClosed:
+            pass
+
+    def stats(self) -> dict:
+        return {"connections": len(self.connections), "renders": self.renders, "frames_sent": self.frames_sent}
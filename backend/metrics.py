@@ -0,0 +1,185 @@
+import bisect
+import itertools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+
+# ---------------- METRICS ----------------
+# Tiny Prometheus text-format metrics without extra dependencies.
+# Hot path is lock-free: every thread writes into its own shard (a plain dict
+# it owns), and only /metrics walks and sums the shards. The dev server runs a
+# thread per request, so when a thread exits its shard is folded into a base
+# total and dropped; the shard list only holds live threads.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _num(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ShardHolder:
+    # Lives in the owning thread's threading.local; collected when the thread exits.
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self):
+        self.shard = {}
+
+
+class _Sharded:
+    """Per-thread dict shards, merged on read."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}  # id -> shard of a live thread
+        self._base = {}  # totals from threads that have exited
+        self._ids = itertools.count()
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ShardHolder()
+            shard_id = next(self._ids)
+            # Only taken once per thread, never on the per-request path.
+            with self._shards_lock:
+                self._shards[shard_id] = holder.shard
+            weakref.finalize(holder, self._retire, shard_id)
+            self._local.holder = holder
+        return holder.shard
+
+    def _retire(self, shard_id: int) -> None:
+        # The owner thread is gone, nobody writes to this shard anymore.
+        with self._shards_lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard:
+                self._merge(self._base, shard)
+
+    def _merge(self, total: dict, shard: dict) -> None:
+        # values are numbers (Counter) or lists of numbers (Histogram: buckets..., sum)
+        for key, value in shard.items():
+            if isinstance(value, list):
+                acc = total.get(key)
+                if acc is None:
+                    total[key] = list(value)
+                else:
+                    for i, v in enumerate(list(value)):
+                        acc[i] += v
+            else:
+                total[key] = total.get(key, 0) + value
+
+    def collect(self) -> dict:
+        with self._shards_lock:
+            shards = list(self._shards.values())
+            total = {}
+            self._merge(total, self._base)
+        # dict(shard) copies in one C call, so it's safe against the owner thread.
+        for snap in [dict(s) for s in shards]:
+            self._merge(total, snap)
+        return total
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__()
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+
+    def inc(self, *labelvalues, amount=1) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+                for key, v in sorted(self.collect().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__()
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        shard = self._shard()
+        entry = shard.get(labelvalues)
+        if entry is None:
+            # [per-bucket counts..., +Inf count, sum]
+            entry = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self) -> list[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, entry in sorted(self.collect().items()):
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry[:-1]):
+                running += count
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_num(bound),))} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(entry[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {running}")
+        return lines
+
+
+class Gauge:
+    """Computed at scrape time: fn() returns {labelvalues_tuple: value}."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames, fn):
+        self.name, self.help, self.labelnames, self.fn = name, help_text, tuple(labelnames), fn
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+                for key, v in sorted(self.fn().items()) if v is not None]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def render(self) -> str:
+        out = []
+        for m in self.metrics:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m.render())
+        return "\n".join(out) + "\n"
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+import time
+
+from flask import g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+
+# ---------------- PROFILING ----------------
+# Two admin-only debugging aids:
+#   * SamplingProfiler: a background thread that snapshots every thread's stack
+#     every few ms and counts them as collapsed stacks (flamegraph.pl/speedscope format).
+#   * RequestTiming: optional per-request phase timing (db, camera, serialize)
+#     sent back as a Server-Timing header. Decided per request (app.py turns it
+#     on for admins who asked), so nobody else ever sees the timings.
+# Both cost nothing beyond a flag check while they're off.
+
+MAX_PROFILE_SECONDS = 300
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stacks = {}
+        self.samples = 0
+        self.running = False
+        self.started_at = None
+        self.stopped_at = None
+        self.interval = 0.005
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, seconds: float, interval_ms: float = 5) -> bool:
+        """Start sampling for `seconds`. Returns False if already running."""
+        with self.lock:
+            if self.running:
+                return False
+            self.stacks = {}
+            self.samples = 0
+            self.running = True
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.interval = max(interval_ms, 1) / 1000
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(min(seconds, MAX_PROFILE_SECONDS),), name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self, seconds: float) -> None:
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    key = self._collapse(names.get(ident, str(ident)), frame)
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+        finally:
+            with self.lock:
+                self.running = False
+                self.stopped_at = time.time()
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    def collapsed(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack."""
+        stacks = dict(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("timing", "name", "start")
+
+    def __init__(self, timing, name):
+        self.timing, self.name = timing, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class RequestTiming:
+    def start(self) -> None:
+        """Collect phases for the current request (call from a before_request hook)."""
+        g.server_timing = {}
+
+    def active(self) -> bool:
+        return has_request_context() and "server_timing" in g
+
+    def phase(self, name: str):
+        """Context manager timing one phase of the current request."""
+        if not self.active():
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        if not self.active():
+            return
+        phases = g.server_timing
+        phases[name] = phases.get(name, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        phases = g.get("server_timing") or {}
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that reports jsonify() time as the 'serialize' phase."""
+    timing = None
+
+    def dumps(self, obj, **kwargs):
+        if self.timing is None or not self.timing.active():
+            return super().dumps(obj, **kwargs)
+        with self.timing.phase("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+PROFILER = SamplingProfiler()
+TIMING = RequestTiming()
+TimedJSONProvider.timing = TIMING
@@ -0,0 +1,277 @@
+import math
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.frames import MAX_GROUP_BLOCKS
+
+
+# ---------------- STATE RECORDS ----------------
+# Typed, fixed-size records for the STATE sections.
+# Each section gets a __slots__ class built once at import time from a small
+# schema (field -> coercer), so an ingest is just one dict lookup + one coercer
+# call per field. Unknown keys are dropped, so a section can never grow.
+
+class ValidationError(ValueError):
+    pass
+
+
+class VersionClock:
+    """
+    One counter for every record: each update that changes something gets the
+    next version, and every field remembers the version it last changed in.
+    "What changed since version N" is then just a comparison per field.
+    Starts at the current time in ms, so versions keep growing across restarts
+    (a client holding a version from before one just gets everything).
+    """
+
+    def __init__(self):
+        self.now = time.time_ns() // 1_000_000
+        self.lock = threading.Lock()
+
+
+CLOCK = VersionClock()
+
+
+def _number(name):
+    def coerce(v):
+        if v is None:
+            return None
+        # bool is an int subclass, but "cpu": true is never what anyone meant
+        if isinstance(v, bool):
+            raise ValidationError(f"{name}: expected number, got bool")
+        if isinstance(v, (int, float)):
+            v = float(v)
+        elif isinstance(v, str):
+            try:
+                v = float(v.strip())
+            except ValueError:
+                raise ValidationError(f"{name}: expected number, got {v!r}") from None
+        else:
+            raise ValidationError(f"{name}: expected number, got {type(v).__name__}")
+        if not math.isfinite(v):
+            raise ValidationError(f"{name}: number must be finite")
+        return v
+    return coerce
+
+
+def _text(name, max_len=200):
+    def coerce(v):
+        if v is None:
+            return None
+        if isinstance(v, (dict, list)):
+            raise ValidationError(f"{name}: expected string, got {type(v).__name__}")
+        # cap strings so one silly payload can't balloon the section
+        return str(v)[:max_len]
+    return coerce
+
+
+def _flag(name):
+    def coerce(v):
+        if v is None:
+            return False
+        if isinstance(v, bool):
+            return v
+        if isinstance(v, (int, float)):
+            return v != 0
+        if isinstance(v, str) and v.lower() in ("true", "false", "1", "0"):
+            return v.lower() in ("true", "1")
+        raise ValidationError(f"{name}: expected bool, got {v!r}")
+    return coerce
+
+
+def _table(row_schema: dict, max_rows=16, max_key_len=32):
+    """Coercer factory for {name: {field: value}} (e.g. per-interface stats)."""
+    def factory(name):
+        row_coercers = {field: f(f"{name}.{field}") for field, f in row_schema.items()}
+
+        def coerce(v):
+            if v is None:
+                return None
+            if not isinstance(v, dict):
+                raise ValidationError(f"{name}: expected object, got {type(v).__name__}")
+            if len(v) > max_rows:
+                raise ValidationError(f"{name}: more than {max_rows} entries")
+            table = {}
+            for key, row in v.items():
+                if not isinstance(row, dict):
+                    raise ValidationError(f"{name}.{key}: expected object, got {type(row).__name__}")
+                # unknown fields are dropped, like at the top level
+                table[str(key)[:max_key_len]] = {
+                    field: c(row.get(field)) for field, c in row_coercers.items()
+                }
+            return table
+        return coerce
+    return factory
+
+
+class Record:
+    """Base for STATE sections. Subclasses are built by make_record()."""
+    __slots__ = ("_versions",)
+    _coercers: dict = {}
+    _defaults: dict = {}
+
+    def __init__(self):
+        for name, value in self._defaults.items():
+            setattr(self, name, value)
+        self._versions = dict.fromkeys(self._defaults, 0)
+
+    def update(self, data: dict) -> list[str]:
+        """
+        Validate + apply a partial update.
+        All fields are coerced before anything is written, so a bad payload
+        leaves the record untouched. Returns the list of dropped (unknown) keys.
+        """
+        return self.apply(data)[1]
+
+    def apply(self, data: dict) -> tuple[dict, list[str]]:
+        """update(), but returns (coerced values that went in, dropped keys)."""
+        coercers = self._coercers
+        clean = {}
+        dropped = []
+        for key, value in data.items():
+            coerce = coercers.get(key)
+            if coerce is None:
+                dropped.append(key)
+                continue
+            clean[key] = coerce(value)
+
+        with CLOCK.lock:
+            version = CLOCK.now + 1
+            changed = False
+            for key, value in clean.items():
+                if getattr(self, key) != value:
+                    setattr(self, key, value)
+                    self._versions[key] = version
+                    changed = True
+            # published last: a reader that saw the old CLOCK.now can't miss these fields
+            if changed:
+                CLOCK.now = version
+        return clean, dropped
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def changed_since(self, version: int, names=None) -> dict:
+        """Fields (all, or just `names`) that changed after `version`."""
+        versions = self._versions
+        return {name: getattr(self, name) for name in (names or self.__slots__) if versions[name] > version}
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __getitem__(self, name):
+        if name not in self._coercers:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        self.update({name: value})
+
+
+def make_record(class_name: str, schema: dict, defaults: dict | None = None) -> type:
+    """
+    Build a __slots__ record class from {field: coercer_factory}.
+    The coercers are created here, once, not per request.
+    """
+    coercers = {name: factory(name) for name, factory in schema.items()}
+    return type(class_name, (Record,), {
+        "__slots__": tuple(schema),
+        "_coercers": coercers,
+        "_defaults": {name: (defaults or {}).get(name) for name in schema},
+    })
+
+
+# Loop timing summary the collectors send along with every sample
+# (see collectors/scheduler.py).
+TICK_SCHEMA = {
+    "tick_jitter_p50_ms": _number,
+    "tick_jitter_p95_ms": _number,
+    "tick_work_p95_ms": _number,
+    "tick_skipped": _number,
+}
+
+SensorsRecord = make_record("SensorsRecord", {
+    "temp": _number,
+    "humidity": _number,
+    "pressure": _number,
+    "timestamp": _text,
+    **TICK_SCHEMA,
+})
+
+SystemRecord = make_record("SystemRecord", {
+    "cpu": _number,
+    "ram": _number,
+    "ram_speed": _number,
+    "core_temp": _number,
+    "time": _text,
+    "timestamp": _text,
+    **TICK_SCHEMA,
+})
+
+# Per-interface rates from collectors/network.py: mean + peak over the
+# reporting interval (kbps, packets/s, errors/s, drops/s).
+NETWORK_IFACE_SCHEMA = {
+    f"{direction}_{metric}{suffix}": _number
+    for direction in ("rx", "tx")
+    for metric in ("kbps", "pps", "errs", "drop")
+    for suffix in ("", "_peak")
+}
+
+NetworkRecord = make_record("NetworkRecord", {
+    "rx_kbps": _number,
+    "tx_kbps": _number,
+    "rx_kbps_peak": _number,
+    "tx_kbps_peak": _number,
+    "interfaces": _table(NETWORK_IFACE_SCHEMA, max_rows=MAX_GROUP_BLOCKS),  # same cap as the binary frame
+    "timestamp": _text,
+    **TICK_SCHEMA,
+})
+
+WeatherRecord = make_record("WeatherRecord", {
+    "city": _text,
+    "current_date": _text,
+    "outside_temp": _number,
+    "condition": _text,
+    "current_high_temp": _number,
+    "current_low_temp": _number,
+    "forecast_day1_date": _text,
+    "forecast_day1_avg_temp": _number,
+    "forecast_day1_high_temp": _number,
+    "forecast_day1_low_temp": _number,
+    "forecast_day2_date": _text,
+    "forecast_day2_avg_temp": _number,
+    "forecast_day2_high_temp": _number,
+    "forecast_day2_low_temp": _number,
+    "timestamp": _text,
+    **TICK_SCHEMA,
+})
+
+FunRecord = make_record("FunRecord", {
+    "quote": lambda name: _text(name, max_len=500),
+    "insult": lambda name: _text(name, max_len=500),
+    "coinflip": _text,
+    "timestamp": _text,
+    **TICK_SCHEMA,
+})
+
+CameraRecord = make_record("CameraRecord", {
+    "ok": _flag,
+    "latest": _text,
+    "last_capture": _text,
+    "timestamp": _text,
+}, defaults={"ok": False})
+
+
+def new_state() -> dict:
+    """Fresh STATE dict with one empty record per section."""
+    return {
+        "sensors": SensorsRecord(),
+        "system": SystemRecord(),
+        "network": NetworkRecord(),
+        "weather": WeatherRecord(),
+        "fun": FunRecord(),
+        "camera": CameraRecord(),
+    }
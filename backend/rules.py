@@ -0,0 +1,274 @@
+import bisect
+import itertools
+import logging
+import operator
+import re
+import threading
+import time
+from collections import deque
+
+from records import new_state
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- ALERT RULES ----------------
+# Threshold / staleness rules checked as samples come in, e.g.
+#
+#   hot cpu: system.core_temp > 75 for 60s clear 70
+#   sensors down: sensors.timestamp stale > 30s
+#   camera.ok == false for 30s
+#
+# "for" = the condition has to hold that long before the rule fires, "clear"
+# = hysteresis: a firing rule only resolves once the value is back past this
+# (default: as soon as the condition is false). "stale" fires when the field
+# hasn't been updated for that long.
+# Rules are parsed once and indexed by (section, field), and within a field the
+# < / > rules are sorted by threshold. A rule's condition can only flip when a
+# new value crosses its threshold, so a sample only re-checks the rules with a
+# threshold between the field's previous and new value (found by bisect), plus
+# the field's currently firing rules for hysteresis. Hundreds of rules on a
+# field that moves a little cost about the same as a handful.
+# A 1 s background check handles what samples can't: stale fields, and "for"
+# rules whose time runs out (also while no new samples arrive).
+# Fired/resolved events go to a bounded queue (GET /api/alerts).
+
+DEFAULT_RULES = (
+    "hot cpu: system.core_temp > 75 for 60s clear 70",
+    "system collector down: system.timestamp stale > 30s",
+    "sensors collector down: sensors.timestamp stale > 30s",
+    "camera down: camera.ok == false for 30s",
+)
+CHECK_INTERVAL = 1.0
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+       "==": operator.eq, "!=": operator.ne}
+RULE_RE = re.compile(
+    r"^(?:(?P<name>[^:]+):\s*)?(?P<section>\w+)\.(?P<field>\w+)\s+"
+    r"(?:stale\s*>\s*(?P<stale>\d+(?:\.\d+)?)s"
+    r"|(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>\S+)"
+    r"(?:\s+for\s+(?P<for>\d+(?:\.\d+)?)s)?(?:\s+clear\s+(?P<clear>\S+))?)\s*$"
+)
+
+_SCHEMA = {section: record.__slots__ for section, record in new_state().items()}
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _literal(text: str):
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip("\"'")
+
+
+class Rule:
+    __slots__ = ("id", "name", "source", "section", "field", "op", "threshold", "clear", "duration", "stale",
+                 "ordered", "watch", "firing", "pending_since", "fired_at")
+
+    def __init__(self, rule_id: int, source: str):
+        m = RULE_RE.match(source.strip())
+        if m is None:
+            raise RuleError(f"can't parse rule {source!r}")
+        self.id = rule_id
+        self.source = source.strip()
+        self.section, self.field = m["section"], m["field"]
+        if self.field not in _SCHEMA.get(self.section, ()):
+            raise RuleError(f"unknown field {self.section}.{self.field} in {source!r}")
+        self.name = (m["name"] or f"{self.section}.{self.field}").strip()
+        self.stale = float(m["stale"]) if m["stale"] else None
+        self.op = OPS[m["op"]] if m["op"] else None
+        self.threshold = _literal(m["value"]) if m["value"] else None
+        self.duration = float(m["for"]) if m["for"] else 0.0
+        self.clear = _literal(m["clear"]) if m["clear"] else None
+        if self.clear is not None and m["op"] not in (">", ">=", "<", "<="):
+            raise RuleError(f"clear only works with <, <=, >, >= in {source!r}")
+        # < / > against a number: can go in the sorted index
+        self.ordered = m["op"] in (">", ">=", "<", "<=") and isinstance(self.threshold, float)
+        self.watch = None
+        self.firing = False
+        self.pending_since = None
+        self.fired_at = None
+
+    def holds(self, value) -> bool:
+        if value is None:
+            return False
+        try:
+            return self.op(value, self.threshold)
+        except TypeError:
+            return False  # e.g. a text field compared to a number
+
+    def cleared(self, value) -> bool:
+        if self.clear is None or value is None:
+            return not self.holds(value)
+        try:
+            # "> 75 clear 70": resolved below 70; "< 10 clear 15": resolved above 15
+            return value < self.clear if self.op in (operator.gt, operator.ge) else value > self.clear
+        except TypeError:
+            return True
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "rule": self.source,
+            "firing": self.firing,
+            "since": self.fired_at,
+            "value": self.watch.value if self.watch else None,
+        }
+
+
+def _number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+class FieldWatch:
+    """Everything the engine knows about one (section, field): last value + its rules."""
+    __slots__ = ("value", "seen", "up", "up_keys", "down", "down_keys", "other", "stale", "firing")
+
+    def __init__(self, rules: list):
+        self.value = None
+        self.seen = time.time()
+        ordered = sorted((r for r in rules if r.ordered), key=lambda r: r.threshold)
+        self.up = [r for r in ordered if r.op in (operator.gt, operator.ge)]
+        self.down = [r for r in ordered if r.op in (operator.lt, operator.le)]
+        self.up_keys = [r.threshold for r in self.up]
+        self.down_keys = [r.threshold for r in self.down]
+        self.other = [r for r in rules if not r.ordered and r.stale is None]
+        self.stale = [r for r in rules if r.stale is not None]
+        self.firing = set()
+        for rule in rules:
+            rule.watch = self
+
+    def crossed(self, old, new):
+        """The threshold rules whose condition may differ between old and new."""
+        if not (_number(old) and _number(new)):
+            yield from self.up
+            yield from self.down
+            return
+        lo, hi = (old, new) if old <= new else (new, old)
+        for rules, keys in ((self.up, self.up_keys), (self.down, self.down_keys)):
+            yield from rules[bisect.bisect_left(keys, lo):bisect.bisect_right(keys, hi)]
+
+
+class RuleEngine:
+    def __init__(self, rules=DEFAULT_RULES, max_events: int = 200):
+        self.rules = [Rule(i, source) for i, source in enumerate(rules, 1)]
+        by_field = {}
+        for rule in self.rules:
+            by_field.setdefault((rule.section, rule.field), []).append(rule)
+        self.index = {key: FieldWatch(field_rules) for key, field_rules in by_field.items()}
+        self.stale_rules = [r for r in self.rules if r.stale is not None]
+        self._pending = set()  # threshold rules waiting out their "for"
+        self.events = deque(maxlen=max_events)
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "RuleEngine":
+        """One rule per line, # comments and blank lines ignored."""
+        with open(path) as f:
+            lines = [line.split("#", 1)[0].strip() for line in f]
+        return cls([line for line in lines if line], **kwargs)
+
+    # ---- evaluation ----
+
+    def observe(self, section: str, record, keys, now: float | None = None) -> None:
+        """Called after every accepted update: `keys` were just written to `record` (coerced values)."""
+        if self._thread is None:
+            self.start()
+        index = self.index
+        now = now if now is not None else time.time()
+        with self._lock:
+            for key in keys:
+                watch = index.get((section, key))
+                if watch is None:
+                    continue
+                old, value = watch.value, getattr(record, key, None)
+                watch.value, watch.seen = value, now
+                if watch.firing:
+                    for rule in list(watch.firing):
+                        if rule.stale is not None or rule.cleared(value):
+                            self._resolve(rule, now)
+                for rule in watch.crossed(old, value):
+                    self._step(rule, value, now)
+                for rule in watch.other:
+                    self._step(rule, value, now)
+
+    def _step(self, rule: Rule, value, now: float) -> None:
+        if rule.firing:
+            return  # only hysteresis (cleared) can end it
+        if rule.holds(value):
+            if rule.pending_since is None:
+                rule.pending_since = now
+                self._pending.add(rule)
+            if now - rule.pending_since >= rule.duration:
+                self._fire(rule, now)
+        elif rule.pending_since is not None:
+            rule.pending_since = None
+            self._pending.discard(rule)
+
+    def check(self, now: float | None = None) -> None:
+        """Time-driven part: stale fields and pending "for" rules. Runs every CHECK_INTERVAL."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            for rule in self.stale_rules:
+                if not rule.firing and now - rule.watch.seen > rule.stale:
+                    self._fire(rule, now)
+            for rule in list(self._pending):
+                if now - rule.pending_since >= rule.duration:
+                    self._fire(rule, now)
+
+    def _fire(self, rule: Rule, now: float) -> None:
+        rule.firing = True
+        rule.fired_at = now
+        rule.pending_since = None
+        rule.watch.firing.add(rule)
+        self._pending.discard(rule)
+        self._event(rule, "firing", now)
+        log.warning("ALERT %s (value %r)", rule.source, rule.watch.value)
+
+    def _resolve(self, rule: Rule, now: float) -> None:
+        rule.firing = False
+        rule.fired_at = None
+        rule.watch.firing.discard(rule)
+        self._event(rule, "resolved", now)
+        log.info("Resolved %s (value %r)", rule.name, rule.watch.value)
+        # the value may already hold again (no clear band, or an odd one): re-arm
+        if rule.stale is None:
+            self._step(rule, rule.watch.value, now)
+
+    def _event(self, rule: Rule, state: str, now: float) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append({"id": next(self._ids), "rule_id": rule.id, "name": rule.name, "rule": rule.source,
+                            "state": state, "value": rule.watch.value, "at": now})
+
+    # ---- reading ----
+
+    def active(self) -> list:
+        return [rule.to_dict() for rule in self.rules if rule.firing]
+
+    def since(self, event_id: int = 0) -> list:
+        return [e for e in list(self.events) if e["id"] > event_id]
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="alert-rules", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            try:
+                self.check()
+            except Exception:
+                log.exception("Alert rule check failed")
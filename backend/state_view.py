@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+from records import CLOCK, ValidationError, new_state
+
+
+# ---------------- STATE VIEWS ----------------
+# /api/state?fields=system.cpu,network.*,sensors.temp[&since=<version>]
+# A fields spec is parsed once into a selector, a tuple of
+# (section, field names or None for all), and cached, so the dashboard
+# sending the same spec every second costs a dict lookup. With since=, only
+# fields that changed after that version go out (see records.VersionClock).
+
+MAX_FIELDS_SPEC = 1000
+
+# section -> field names, from the record classes (same for every node)
+_SCHEMA = {section: record.__slots__ for section, record in new_state().items()}
+
+
+@lru_cache(maxsize=64)
+def compile_fields(spec: str | None) -> tuple:
+    """
+    "system.cpu,network.*,sensors" -> (("system", ("cpu",)), ("network", None), ("sensors", None)).
+    Empty/None selects everything. Raises ValidationError on unknown names.
+    """
+    if not spec:
+        return tuple((section, None) for section in _SCHEMA)
+    if len(spec) > MAX_FIELDS_SPEC:
+        raise ValidationError("fields: spec too long")
+    wanted = {}
+    for item in spec.split(","):
+        section, _, name = item.strip().partition(".")
+        if section not in _SCHEMA:
+            raise ValidationError(f"fields: unknown section {section!r}")
+        if name in ("", "*"):
+            wanted[section] = None
+        elif name not in _SCHEMA[section]:
+            raise ValidationError(f"fields: unknown field {section}.{name}")
+        elif section not in wanted or wanted[section] is not None:
+            names = wanted.setdefault(section, [])
+            if name not in names:
+                names.append(name)
+    return tuple((section, tuple(names) if names is not None else None) for section, names in wanted.items())
+
+
+def render(state: dict, selector: tuple, since: int | None = None) -> tuple[dict, int]:
+    """
+    (payload, version). The payload has the usual {section: {field: value}}
+    shape; with `since`, sections without changes are left out entirely.
+    """
+    version = CLOCK.now  # read first: anything changing meanwhile shows up now or next time
+    if since is not None and since > version:
+        since = None  # version from somewhere else (another backend?), start over
+    out = {}
+    for section, names in selector:
+        record = state[section]
+        if since is None:
+            out[section] = record.to_dict() if names is None else {n: getattr(record, n) for n in names}
+        else:
+            changed = record.changed_since(since, names)
+            if changed:
+                out[section] = changed
+    return out, version
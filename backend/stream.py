@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.mjpeg import STREAM_MIME, FrameBuffer  # noqa: E402,F401  (STREAM_MIME re-exported for app.py)
+
+
+# ---------------- LIVE PREVIEW ----------------
+# One upstream MJPEG stream, any number of viewers.
+# A single relay thread pulls JPEG frames from a frame source (the external
+# camera service's GET /stream, see README, or anything else yielding JPEG
+# bytes) into a FrameBuffer (shared/mjpeg.py) that only ever holds the newest
+# frame. Every viewer waits for "a frame newer than the last one I sent", so a
+# slow client simply skips frames instead of queueing them, and the multipart
+# chunk is built once per frame, not per viewer.
+# The relay runs only while someone is watching.
+
+
+def http_mjpeg_source(url: str, connect_timeout: float = 5, read_timeout: float = 10):
+    """
+    Frame source reading a multipart/x-mixed-replace stream.
+    Parts must carry a Content-Length header (shared.mjpeg.mjpeg_part's do).
+    """
+    def frames():
+        import requests
+        with requests.get(url, stream=True, timeout=(connect_timeout, read_timeout)) as r:
+            r.raise_for_status()
+            raw = r.raw
+            length = None
+            while True:
+                line = raw.readline()
+                if not line:
+                    return
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+                elif line in (b"\r\n", b"\n") and length is not None:
+                    jpeg = raw.read(length)
+                    if len(jpeg) < length:
+                        return
+                    yield jpeg
+                    length = None
+    return frames
+
+
+class MJPEGRelay:
+    """
+    source: callable returning an iterable of JPEG frames. It's (re)opened
+    when the first viewer arrives and closed `idle_timeout` seconds after the
+    last one left.
+    """
+
+    def __init__(self, source, idle_timeout: float = 5.0, frame_timeout: float = 10.0, retry_delay: float = 2.0):
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.frame_timeout = frame_timeout
+        self.retry_delay = retry_delay
+        self.buffer = FrameBuffer()
+        self.viewers = 0
+        self.frames_in = 0
+        self.errors = 0
+        self._idle_since = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _join(self) -> None:
+        with self._lock:
+            self.viewers += 1
+            self._idle_since = None
+            if self._thread is None:
+                self.buffer.reopen()
+                self._thread = threading.Thread(target=self._run, name="mjpeg-relay", daemon=True)
+                self._thread.start()
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.viewers -= 1
+            if self.viewers == 0:
+                self._idle_since = time.monotonic()
+
+    def _should_stop(self) -> bool:
+        # Decided under the lock so a viewer joining right now either keeps
+        # this thread alive or sees it gone and starts a fresh one.
+        with self._lock:
+            if self.viewers == 0 and self._idle_since is not None \
+                    and time.monotonic() - self._idle_since > self.idle_timeout:
+                self._thread = None
+                self.buffer.close()
+                return True
+            return False
+
+    def _run(self) -> None:
+        while not self._should_stop():
+            frames = None
+            try:
+                frames = iter(self.source())
+                for jpeg in frames:
+                    self.buffer.write(jpeg)
+                    self.frames_in += 1
+                    if self._should_stop():
+                        return
+            except Exception:
+                self.errors += 1
+            finally:
+                close = getattr(frames, "close", None)
+                if close is not None:
+                    close()
+            # upstream ended or failed: try again while people are watching
+            time.sleep(self.retry_delay)
+
+    def frames(self):
+        """Generator of multipart chunks for one viewer's response."""
+        self._join()
+        try:
+            seq = self.buffer.seq
+            # start with the current frame so the picture shows up right away
+            if self.buffer.part is not None and not self.buffer.closed:
+                seq -= 1
+            while True:
+                got = self.buffer.wait(seq, self.frame_timeout)
+                if got is None:
+                    return
+                seq, part = got
+                yield part
+        finally:
+            self._leave()
+
+    def status(self) -> dict:
+        updated = self.buffer.updated
+        return {
+            "viewers": self.viewers,
+            "running": self._thread is not None,
+            "frames": self.frames_in,
+            "errors": self.errors,
+            "frame_age_s": None if updated is None else round(time.monotonic() - updated, 3),
+        }
@@ -0,0 +1,252 @@
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- TIMELAPSE ----------------
+# Turns the stills in PHOTO_DIR into MP4 segments, incrementally: index.json
+# remembers the last photo that went into a segment, and each build only
+# encodes photos newer than that into new segment files. Finished segments are
+# never touched again.
+# Encoding runs in a separate process (PyAV, imported only there) at the lowest
+# CPU and I/O priority, and the process only exists while a segment is encoded.
+# That process is this file run as a script (see the bottom), not a
+# multiprocessing child: spawn would re-import the server's __main__ in it
+# (app.py with all its module-level setup), fork would copy a threaded server.
+# Builds take a file lock in TIMELAPSE_DIR, so with several WSGI workers only
+# one of them builds at a time and the others pick up its index.json.
+
+PHOTO_EXTENSIONS = (".jpg", ".jpeg")
+
+
+def _low_priority() -> None:
+    # First thing in the encoder process: stay out of the web server's way.
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+    if hasattr(os, "SCHED_IDLE"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+        except OSError:
+            pass
+    try:
+        import psutil
+        psutil.Process().ionice(psutil.IOPRIO_CLASS_IDLE)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def encode_segment(paths: list, out_path: str, fps: int, width: int, codec: str) -> dict:
+    """Runs in the worker process. Encodes `paths` (in order) into one MP4."""
+    import av
+
+    tmp = out_path + ".part"
+    frames = skipped = 0
+    stream = None
+    with av.open(tmp, mode="w", format="mp4", options={"movflags": "+faststart"}) as out:
+        for path in paths:
+            try:
+                with av.open(path) as src:
+                    frame = next(src.decode(video=0))
+            except (av.error.FFmpegError, StopIteration, OSError):
+                skipped += 1  # half-written or corrupt photo
+                continue
+            if stream is None:
+                # size is fixed by the first photo, scaled to `width` (even dimensions for yuv420p)
+                w = min(width, frame.width) // 2 * 2
+                h = round(frame.height * w / frame.width) // 2 * 2
+                stream = out.add_stream(codec, rate=fps)
+                stream.width, stream.height, stream.pix_fmt = w, h, "yuv420p"
+                if codec == "libx264":
+                    stream.options = {"preset": "veryfast", "crf": "23"}
+            frame = frame.reformat(width=stream.width, height=stream.height, format="yuv420p")
+            for packet in stream.encode(frame):
+                out.mux(packet)
+            frames += 1
+        if stream is not None:
+            for packet in stream.encode():
+                out.mux(packet)
+    if frames == 0:
+        os.remove(tmp)
+    else:
+        os.replace(tmp, out_path)
+    return {"frames": frames, "skipped": skipped}
+
+
+class Timelapse:
+    """
+    A segment is cut every `max_frames` photos. A shorter tail only gets
+    encoded once it has `min_frames` photos or its oldest photo is
+    `max_wait` seconds old, so builds don't leave lots of tiny segments.
+    """
+
+    def __init__(self, photo_dir: str, out_dir: str, fps: int = 24, width: int = 1280, codec: str = "libx264",
+                 min_frames: int = 48, max_frames: int = 1440, max_wait: float = 6 * 3600):
+        self.photo_dir = photo_dir
+        self.out_dir = out_dir
+        self.fps = fps
+        self.width = width
+        self.codec = codec
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.max_wait = max_wait
+        self.index_path = os.path.join(out_dir, "index.json")
+        self.lock_path = os.path.join(out_dir, ".build.lock")
+        self.building = False
+        self.last_error = None
+        self._build_lock = threading.Lock()
+        self._index = None
+        self._index_mtime = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    # ---- index ----
+
+    def _load_index(self) -> dict:
+        # re-read when another process (another WSGI worker) has built since
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            try:
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {"last_photo": "", "segments": []}
+            self._index_mtime = mtime
+        return self._index
+
+    def _save_index(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.index_path + ".part"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def segments(self) -> list:
+        return list(self._load_index()["segments"])
+
+    def segment_path(self, name: str):
+        """Path of a finished segment, or None (also for anything not in the index)."""
+        if any(s["name"] == name for s in self._load_index()["segments"]):
+            return os.path.join(self.out_dir, name)
+        return None
+
+    # ---- building ----
+
+    def pending_photos(self) -> list:
+        """Photos newer than the last one encoded. Names are timestamps, so they sort in capture order."""
+        last = self._load_index()["last_photo"]
+        try:
+            names = os.listdir(self.photo_dir)
+        except OSError:
+            return []
+        return sorted(n for n in names if n.lower().endswith(PHOTO_EXTENSIONS) and n > last)
+
+    def _batches(self, pending: list, force: bool) -> list:
+        batches = [pending[i:i + self.max_frames] for i in range(0, len(pending), self.max_frames)]
+        if batches and len(batches[-1]) < self.max_frames and not force:
+            tail = batches[-1]
+            try:
+                oldest_age = time.time() - os.path.getmtime(os.path.join(self.photo_dir, tail[0]))
+            except OSError:
+                oldest_age = 0
+            if len(tail) < self.min_frames and oldest_age < self.max_wait:
+                batches.pop()
+        return batches
+
+    def _encode(self, paths: list, out_path: str) -> dict:
+        job = {"paths": paths, "out_path": out_path, "fps": self.fps, "width": self.width, "codec": self.codec}
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__)], input=json.dumps(job),
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            last_line = (proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"])[-1]
+            raise RuntimeError(f"encoder failed: {last_line}")
+        return json.loads(proc.stdout)
+
+    def build(self, force: bool = False) -> int:
+        """Encode whatever is pending. Returns the number of new segments (0 if a build is already running)."""
+        if not self._build_lock.acquire(blocking=False):
+            return 0
+        lock_fd = None
+        try:
+            if not self._batches(self.pending_photos(), force):
+                return 0
+            os.makedirs(self.out_dir, exist_ok=True)
+            lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o660)
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another process is building
+            self.building = True
+            # again under the lock: another process may have just finished a build
+            batches = self._batches(self.pending_photos(), force)
+            if not batches:
+                return 0
+            index = self._load_index()
+            for batch in batches:
+                name = f"segment_{len(index['segments']) + 1:05d}.mp4"
+                paths = [os.path.join(self.photo_dir, n) for n in batch]
+                result = self._encode(paths, os.path.join(self.out_dir, name))
+                if result["frames"]:
+                    index["segments"].append({
+                        "name": name,
+                        "first": batch[0],
+                        "last": batch[-1],
+                        "frames": result["frames"],
+                        "bytes": os.path.getsize(os.path.join(self.out_dir, name)),
+                        "duration_s": round(result["frames"] / self.fps, 3),
+                        "created": time.time(),
+                    })
+                index["last_photo"] = batch[-1]
+                self._save_index()  # after every segment, so a crash never re-encodes finished ones
+            self.last_error = None
+            return len(batches)
+        except Exception as e:
+            self.last_error = str(e)
+            log.warning("Timelapse build failed: %s", e)
+            return 0
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)  # drops the flock
+            self.building = False
+            self._build_lock.release()
+
+    def build_async(self, force: bool = False) -> None:
+        threading.Thread(target=self.build, args=(force,), name="timelapse-build", daemon=True).start()
+
+    def start(self, interval: float) -> threading.Thread:
+        """Build every `interval` seconds in a daemon thread (once per process, later calls are no-ops)."""
+        def loop():
+            while True:
+                self.build()
+                time.sleep(interval)
+
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = threading.Thread(target=loop, name="timelapse", daemon=True)
+                self._loop.start()
+        return self._loop
+
+    def status(self) -> dict:
+        return {
+            "building": self.building,
+            "pending_photos": len(self.pending_photos()),
+            "last_error": self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    # Encoder process (see Timelapse._encode): one job as JSON on stdin, result as JSON on stdout.
+    _low_priority()
+    json.dump(encode_segment(**json.load(sys.stdin)), sys.stdout)
@@ -0,0 +1,194 @@
+import base64
+import hashlib
+import socket
+import struct
+import threading
+
+from werkzeug.wrappers import Response
+
+
+# ---------------- WEBSOCKET ----------------
+# Just enough RFC 6455 for the dashboard channel, on top of the built-in
+# server's raw connection (environ["werkzeug.socket"]), so there's no extra
+# dependency: text/binary messages, fragmentation, ping/pong, close.
+# Blocking I/O: whoever calls recv() owns the reading side; send() can be
+# called from any thread. Sends give up after SEND_TIMEOUT_S without progress
+# (SO_SNDTIMEO, so recv() stays blocking) and close the connection: a peer
+# that vanished without a FIN must not hold up whoever is sending.
+
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE = 64 * 1024  # commands are small; anything bigger is a broken or hostile client
+SEND_TIMEOUT_S = 2
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class HandshakeError(Exception):
+    pass
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1(key.encode() + GUID).digest()).decode()
+
+
+def frame(opcode: int, payload: bytes) -> bytes:
+    """One unmasked (server -> client) frame. Build once, send to many."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def text_frame(text: str) -> bytes:
+    return frame(OP_TEXT, text.encode())
+
+
+class WebSocket:
+    __slots__ = ("sock", "_send_lock", "closed")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    @classmethod
+    def accept(cls, environ: dict) -> "WebSocket":
+        """Validate the upgrade request and answer it with 101 on the raw socket."""
+        if environ.get("HTTP_UPGRADE", "").lower() != "websocket":
+            raise HandshakeError("not a WebSocket upgrade")
+        if environ.get("HTTP_SEC_WEBSOCKET_VERSION") != "13":
+            raise HandshakeError("unsupported WebSocket version")
+        key = environ.get("HTTP_SEC_WEBSOCKET_KEY")
+        if not key:
+            raise HandshakeError("missing Sec-WebSocket-Key")
+        sock = environ.get("werkzeug.socket")
+        if sock is None:
+            raise HandshakeError("WebSocket needs the built-in server (python backend/app.py)")
+        sock.sendall(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode())
+        sock.settimeout(None)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, struct.pack("ll", SEND_TIMEOUT_S, 0))
+        return cls(sock)
+
+    # ---- sending ----
+
+    def send_raw(self, data: bytes) -> None:
+        """Send a pre-built frame (see frame()). Raises ConnectionClosed."""
+        if self.closed:
+            raise ConnectionClosed()
+        try:
+            with self._send_lock:
+                self.sock.sendall(data)
+        except OSError as e:
+            # timed out (or broke) mid-frame: the stream is unusable, wake up recv() too
+            self.closed = True
+            self._shutdown()
+            raise ConnectionClosed() from e
+
+    def send(self, text: str) -> None:
+        self.send_raw(text_frame(text))
+
+    def close(self, code: int = 1000) -> None:
+        if not self.closed:
+            try:
+                self.send_raw(frame(OP_CLOSE, struct.pack("!H", code)))
+            except ConnectionClosed:
+                pass
+            self.closed = True
+        self._shutdown()
+
+    def abort(self) -> None:
+        """Drop the connection without a close frame (the peer isn't reading anyway)."""
+        self.closed = True
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    # ---- receiving ----
+
+    def _read(self, n: int) -> bytes:
+        buf = b""
+        while len(buf) < n:
+            try:
+                chunk = self.sock.recv(n - len(buf))
+            except OSError as e:
+                raise ConnectionClosed() from e
+            if not chunk:
+                raise ConnectionClosed()
+            buf += chunk
+        return buf
+
+    def _frame(self):
+        b0, b1 = self._read(2)
+        opcode, length = b0 & 0x0F, b1 & 0x7F
+        if not b1 & 0x80:
+            raise ConnectionClosed("client frames must be masked")
+        if length == 126:
+            length = struct.unpack("!H", self._read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read(8))[0]
+        if length > MAX_MESSAGE:
+            self.close(1009)
+            raise ConnectionClosed("message too big")
+        mask = self._read(4)
+        data = self._read(length)
+        if length:
+            # unmask with one big-int XOR instead of a Python loop per byte
+            key = int.from_bytes(mask * ((length + 3) // 4), "little") & ((1 << (8 * length)) - 1)
+            data = (int.from_bytes(data, "little") ^ key).to_bytes(length, "little")
+        return bool(b0 & 0x80), opcode, data
+
+    def recv(self):
+        """Next text (str) or binary (bytes) message. Raises ConnectionClosed."""
+        parts, kind, size = [], None, 0
+        while True:
+            fin, opcode, data = self._frame()
+            if opcode == OP_PING:
+                self.send_raw(frame(OP_PONG, data))
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                self.close(struct.unpack("!H", data[:2])[0] if len(data) >= 2 else 1000)
+                raise ConnectionClosed()
+            if opcode in (OP_TEXT, OP_BINARY):
+                parts, kind, size = [], opcode, 0
+            elif opcode != OP_CONT or kind is None:
+                self.close(1002)
+                raise ConnectionClosed("protocol error")
+            parts.append(data)
+            size += len(data)
+            if size > MAX_MESSAGE:
+                self.close(1009)
+                raise ConnectionClosed("message too big")
+            if fin:
+                message = b"".join(parts)
+                return message.decode("utf-8", "replace") if kind == OP_TEXT else message
+
+
+class ClosedResponse(Response):
+    """
+    What the route returns once the socket is done. The 101 already went out
+    on the socket, so this must not write an HTTP response: the built-in
+    server treats ConnectionError as "client went away" and stays quiet.
+    """
+
+    def __init__(self):
+        super().__init__(status=101)
+
+    def __call__(self, environ, start_response):
+        raise ConnectionError("websocket closed")
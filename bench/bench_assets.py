@@ -0,0 +1,83 @@
+"""
+Transferred bytes for a dashboard page load, with and without the asset pipeline.
+
+Simulates a browser via the Flask test client: a first visit (empty cache) and
+a repeat visit (HTML revalidated with its ETag, hashed assets served from cache
+without a request). Also prints a rough time-to-first-paint estimate for a
+slow link (RTT + bytes / bandwidth per request, sequential); measure the real
+thing in the browser's devtools.
+
+    python bench/bench_assets.py [--rtt-ms 60] [--kbit 2000]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+os.environ.setdefault("COMMENTS_DB", os.path.join(tempfile.mkdtemp(), "comments.db"))
+
+import app as backend  # noqa: E402
+
+PAGES = ("/", "/site2/")
+ACCEPT = {"Accept-Encoding": "gzip, deflate, br"}
+REF_RE = re.compile(rb'(?:href|src)="(/[^"?#]+)"')
+
+
+def page_load(client, page, cache):
+    """Returns (requests made, bytes transferred) and fills the cache dict."""
+    requests_made, transferred = 0, 0
+    headers = dict(ACCEPT)
+    if page in cache:
+        headers["If-None-Match"] = cache[page]
+    r = client.get(page, headers=headers)
+    requests_made += 1
+    transferred += len(r.data) + sum(len(k) + len(v) + 4 for k, v in r.headers.items())
+    if r.status_code == 200:
+        cache[page] = r.headers.get("ETag", "").strip('"')
+        html = r.get_data()
+        if r.headers.get("Content-Encoding") == "gzip":
+            import gzip
+            html = gzip.decompress(html)
+        cache[page + ":refs"] = REF_RE.findall(html)
+
+    for ref in cache.get(page + ":refs", []):
+        url = ref.decode()
+        if "immutable" in cache.get(url + ":cc", ""):
+            continue  # browser doesn't even ask
+        headers = dict(ACCEPT)
+        if url in cache:
+            headers["If-None-Match"] = cache[url]
+        r = client.get(url, headers=headers)
+        requests_made += 1
+        transferred += len(r.data) + sum(len(k) + len(v) + 4 for k, v in r.headers.items())
+        if r.status_code == 200:
+            cache[url] = r.headers.get("ETag", "").strip('"')
+            cache[url + ":cc"] = r.headers.get("Cache-Control", "")
+    return requests_made, transferred
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rtt-ms", type=float, default=60)
+    ap.add_argument("--kbit", type=float, default=2000)
+    args = ap.parse_args()
+
+    def estimate(reqs, nbytes):
+        return reqs * args.rtt_ms + nbytes * 8 / args.kbit
+
+    client = backend.app.test_client()
+    print(f"{'page':<9}{'mode':<10}{'first visit':>22}{'repeat visit':>22}{'est. first paint':>18}")
+    for page in PAGES:
+        for mode, enabled in (("disk", False), ("pipeline", True)):
+            backend.ASSET_PIPELINE = enabled
+            cache = {}
+            first = page_load(client, page, cache)
+            repeat = page_load(client, page, cache)
+            print(f"{page:<9}{mode:<10}{first[1]:>10} B {first[0]:>2} req"
+                  f"{repeat[1]:>10} B {repeat[0]:>2} req{estimate(*first):>14.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
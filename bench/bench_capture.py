@@ -0,0 +1,68 @@
+"""
+Capture -> display latency: still written to PHOTO_DIR and read back (old path)
+vs. encoded into memory and served from the PhotoStore cache (write-behind).
+
+Uses the simulated camera with no artificial sensor latency, so the numbers are
+just the file/memory handling. Point --dir at the SD card on the Pi to see the
+difference that matters (tmpfs/SSD here hides most of it).
+
+    python bench/bench_capture.py [--n 50] [--dir /tmp/bench-photos]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["AHRIPI_SIMULATE"] = "1"
+os.environ["AHRIPI_SIM_LATENCY"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../collectors"))
+
+from photo_store import PhotoStore  # noqa: E402
+from sim import FakePicamera2  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--dir", default=None)
+    args = ap.parse_args()
+    directory = args.dir or tempfile.mkdtemp(prefix="bench-photos-")
+    os.makedirs(directory, exist_ok=True)
+
+    cam = FakePicamera2()
+    cam.configure(cam.create_still_configuration())
+    cam.start()
+
+    disk = []
+    for i in range(args.n):
+        path = os.path.join(directory, f"disk_{i}.jpg")
+        t0 = time.perf_counter()
+        cam.capture_file(path)
+        with open(path, "rb") as f:
+            f.read()
+        disk.append((time.perf_counter() - t0) * 1000)
+
+    store = PhotoStore(directory, keep=20)
+    memory = []
+    for i in range(args.n):
+        t0 = time.perf_counter()
+        buf = io.BytesIO()
+        cam.capture_file(buf, format="jpeg")
+        store.put(f"mem_{i}.jpg", buf.getvalue())
+        store.get(f"mem_{i}.jpg")
+        memory.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    store.flush()
+    drain = (time.perf_counter() - t0) * 1000
+
+    for name, xs in (("write+read file", disk), ("memory + write-behind", memory)):
+        xs.sort()
+        print(f"{name:<24} median {statistics.median(xs):7.3f} ms   p95 {xs[int(len(xs) * 0.95) - 1]:7.3f} ms")
+    print(f"write-behind drained {store.written} photos, {drain:.1f} ms after the last capture; {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Sustained comment inserts/sec under a burst: the old path (every POST runs its
+own two transactions: rate-limit check + insert) vs. the group-commit writer
+behind POST /api/comments.
+
+Both go through Flask with N concurrent clients, each on its own IP so the
+rate limit doesn't kick in. The old path is re-created here as an extra route
+on a separate DB with SQLite's default rollback journal, as it was before.
+Run it with --dir on the SD card: fsync cost is the whole point.
+
+    python bench/bench_comments.py [--clients 32] [--seconds 10] [--dir /path/on/sd]
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--clients", type=int, default=32)
+ap.add_argument("--seconds", type=float, default=10)
+ap.add_argument("--dir", default=None, help="where the test DBs go (default: a temp dir)")
+args = ap.parse_args()
+
+TMP = tempfile.mkdtemp(prefix="ahripi-comments-", dir=args.dir)
+os.environ.update(COMMENTS_DB=os.path.join(TMP, "comments.db"), HISTORY="0")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+
+import app as backend  # noqa: E402
+from flask import jsonify, request  # noqa: E402
+
+OLD_DB = os.path.join(TMP, "comments_old.db")
+
+
+def old_connect():
+    conn = sqlite3.connect(OLD_DB)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@backend.app.post("/bench/old_comments")
+def old_post_comment():
+    # what post_comment did before the writer thread, minus the validation
+    data = request.get_json(silent=True) or {}
+    ip = request.headers.get("X-Forwarded-For")
+    try:
+        with old_connect() as conn:
+            count = conn.execute("SELECT COUNT(*) AS c FROM rate_limits WHERE ip = ? "
+                                 "AND created_at >= datetime('now', '-10 minutes')", (ip,)).fetchone()["c"]
+            if count >= 3:
+                return jsonify({"error": "rate limited"}), 429
+            conn.execute("INSERT INTO rate_limits (ip) VALUES (?)", (ip,))
+        with old_connect() as conn:
+            cur = conn.execute("INSERT INTO comments (name, text, ip, approved) VALUES (?, ?, ?, 1)",
+                               ("anon", data.get("text"), ip))
+        return jsonify({"status": "ok", "id": cur.lastrowid})
+    except sqlite3.OperationalError as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def setup_old_db():
+    with old_connect() as conn:
+        conn.execute("CREATE TABLE comments (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, text TEXT NOT NULL, "
+                     "ip TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, approved INTEGER DEFAULT 1)")
+        conn.execute("CREATE TABLE rate_limits (id INTEGER PRIMARY KEY AUTOINCREMENT, ip TEXT NOT NULL, "
+                     "created_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+
+
+def burst(url, clients, seconds):
+    client = backend.app.test_client()
+    ips = itertools.count()
+    results = Counter()
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker():
+        local, lat = Counter(), []
+        while time.perf_counter() < stop:
+            n = next(ips)
+            t0 = time.perf_counter()
+            r = client.post(url, json={"text": f"comment {n}"},
+                            headers={"X-Forwarded-For": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"})
+            lat.append(time.perf_counter() - t0)
+            local["ok" if r.status_code == 200 else "locked" if "locked" in r.get_data(as_text=True)
+                  else str(r.status_code)] += 1
+        with lock:
+            results.update(local)
+            latencies.extend(lat)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    return results, elapsed, p95
+
+
+def main():
+    setup_old_db()
+    backend.init_comments_db()
+    print(f"{args.clients} clients for {args.seconds:.0f}s each, DBs in {TMP}")
+    print(f"{'path':<22}{'inserts/s':>10}{'p95 ms':>9}  outcomes")
+    for name, url in (("per-request commits", "/bench/old_comments"), ("group commit", "/api/comments")):
+        results, elapsed, p95 = burst(url, args.clients, args.seconds)
+        print(f"{name:<22}{results['ok'] / elapsed:>10.0f}{p95:>9.1f}  {dict(results)}")
+    stats = backend.COMMENT_WRITER.stats()
+    print(f"group commit: {stats['batches']} commits for {stats['jobs']} inserts (avg batch {stats['avg_batch']})")
+
+
+if __name__ == "__main__":
+    main()
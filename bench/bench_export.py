@@ -0,0 +1,77 @@
+"""
+History export memory: peak Python allocations while streaming
+/api/export/system for growing ranges, vs. building the same rows as one
+jsonify() response. The streamed peak should stay flat as the range grows.
+
+    python bench/bench_export.py [--rows 10000,100000,300000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TMP = tempfile.mkdtemp(prefix="ahripi-export-")
+os.environ.update(COMMENTS_DB=os.path.join(TMP, "comments.db"), HISTORY_DB=os.path.join(TMP, "history.db"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+
+import app as backend  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+
+def fill(total):
+    have = backend.HISTORY.written
+    start = time.time() - total
+    for i in range(have, total):
+        backend.HISTORY.record("system", {"cpu": i % 100, "ram": 41.5, "ram_speed": 1800.0, "core_temp": 52.0},
+                               ts=start + i)
+        if i % 50_000 == 0:
+            backend.HISTORY.flush()
+    backend.HISTORY.flush()
+
+
+def streamed(client, fmt, gzip):
+    headers = {"Accept-Encoding": "gzip"} if gzip else {}
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    resp = client.get(f"/api/export/system?format={fmt}", headers=headers, buffered=False)
+    size = sum(len(chunk) for chunk in resp.response)
+    resp.close()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+def one_response():
+    tracemalloc.start()
+    with backend.app.test_request_context():
+        rows = [dict(zip(("ts", "id", "cpu", "ram", "ram_speed", "core_temp"), r))
+                for r in backend.HISTORY.rows("system")]
+        size = len(jsonify(rows).get_data())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="10000,100000,300000")
+    args = ap.parse_args()
+    client = backend.app.test_client()
+
+    print(f"{'rows':>8}  {'mode':<14}{'bytes':>12}{'peak alloc':>14}{'time':>9}")
+    for total in (int(n) for n in args.rows.split(",")):
+        fill(total)
+        for fmt, gz in (("csv", False), ("ndjson", False), ("csv", True)):
+            size, peak, elapsed = streamed(client, fmt, gz)
+            mode = fmt + (" +gzip" if gz else "")
+            print(f"{total:>8}  {mode:<14}{size:>12}{peak / 2**20:>11.2f} MiB{elapsed:>8.2f}s")
+        if total <= 100_000:
+            size, peak = one_response()
+            print(f"{total:>8}  {'one jsonify':<14}{size:>12}{peak / 2**20:>11.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
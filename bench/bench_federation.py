@@ -0,0 +1,148 @@
+"""
+Federation load test: one aggregator backend, many simulated Pis.
+
+Starts backend/app.py as the aggregator and runs --nodes simulated nodes.
+Each node produces samples at the real collector rates
+(system/network 1 s, sensors 5 s, weather 10 s, fun 20 s) and pushes them
+the way FederationPusher does: the newest sample per section, in one batch
+every --push-interval seconds. --direct instead posts every sample on its
+own with X-Node-Id (collectors pointed straight at the aggregator), for
+comparison.
+
+Reports request latency, aggregator CPU/RSS, and how fresh the fleet view is
+(/api/nodes: nodes online, worst last_seen).
+
+    python bench/bench_federation.py --nodes 60 --duration 60
+    python bench/bench_federation.py --nodes 60 --duration 60 --direct
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from loadtest import (COLLECTOR_INTERVALS, ROOT, SAMPLE_PAYLOADS, Recorder, free_port, percentile,
+                      sample_process, wait_ready)
+
+TOKEN = "bench-token"
+
+
+def node_batched(base, node_id, push_interval, speed, rec, stop, produced):
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {TOKEN}"
+    next_sample = {s: time.monotonic() for s in COLLECTOR_INTERVALS}
+    pending = {}
+    # real nodes don't boot in lockstep: spread the pushes over the interval
+    next_push = time.monotonic() + random.uniform(0, push_interval) / speed
+    while not stop.is_set():
+        now = time.monotonic()
+        for section, interval in COLLECTOR_INTERVALS.items():
+            while next_sample[section] <= now:
+                pending[section] = SAMPLE_PAYLOADS[section]  # newer sample replaces the old one
+                produced[0] += 1
+                next_sample[section] += interval / speed
+        if now >= next_push and pending:
+            batch = {"node": node_id, "samples": [{"section": s, "data": d} for s, d in pending.items()]}
+            pending = {}
+            rec.timed("POST /api/nodes/push", session.post, f"{base}/api/nodes/push", json=batch, timeout=10)
+            next_push += push_interval / speed
+        wake = min(min(next_sample.values()), next_push)
+        stop.wait(max(0.0, wake - time.monotonic()))
+
+
+def node_direct(base, node_id, speed, rec, stop, produced):
+    session = requests.Session()
+    session.headers["X-Node-Id"] = node_id
+    next_sample = {s: time.monotonic() for s in COLLECTOR_INTERVALS}
+    while not stop.is_set():
+        now = time.monotonic()
+        for section, interval in COLLECTOR_INTERVALS.items():
+            if next_sample[section] <= now:
+                rec.timed("POST /api/<section>", session.post, f"{base}/api/{section}",
+                          json=SAMPLE_PAYLOADS[section], timeout=10)
+                produced[0] += 1
+                next_sample[section] += interval / speed
+        stop.wait(max(0.0, min(next_sample.values()) - time.monotonic()))
+
+
+def watch_fleet(base, stop, out):
+    session = requests.Session()
+    while not stop.wait(1.0):
+        try:
+            fleet = session.get(f"{base}/api/nodes", timeout=5).json()
+        except (requests.RequestException, ValueError):
+            continue
+        remote = [n for n in fleet["node_list"] if not n["local"]]
+        worst = max((n["last_seen_s"] for n in remote if n["last_seen_s"] is not None), default=None)
+        out.append((sum(n["online"] for n in remote), worst))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--nodes", type=int, default=60)
+    ap.add_argument("--duration", type=float, default=30)
+    ap.add_argument("--push-interval", type=float, default=2.0)
+    ap.add_argument("--speed", type=float, default=1.0, help="divide all intervals by this (compress time)")
+    ap.add_argument("--direct", action="store_true", help="one POST per sample instead of batched pushes")
+    args = ap.parse_args()
+
+    port = free_port()
+    tmp = tempfile.mkdtemp(prefix="ahripi-fed-")
+    env = dict(os.environ, PORT=str(port), COMMENTS_DB=os.path.join(tmp, "comments.db"), SECRET_KEY="bench",
+               NODE_ID="aggregator", FEDERATION_TOKEN=TOKEN, TIMELAPSE_INTERVAL="0")
+    for key in ("INGEST_SOCKET", "AGGREGATOR_URL"):
+        env.pop(key, None)
+    backend = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend", "app.py")], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    rec = Recorder()
+    stop = threading.Event()
+    proc_samples, fleet_samples, produced = [], [], [0]
+    try:
+        wait_ready(f"{base}/api/state")
+        threads = [threading.Thread(target=sample_process, args=(backend.pid, proc_samples, stop)),
+                   threading.Thread(target=watch_fleet, args=(base, stop, fleet_samples))]
+        for i in range(args.nodes):
+            node_id = f"pi-{i:03d}"
+            if args.direct:
+                threads.append(threading.Thread(target=node_direct,
+                                                args=(base, node_id, args.speed, rec, stop, produced)))
+            else:
+                threads.append(threading.Thread(target=node_batched, args=(
+                    base, node_id, args.push_interval, args.speed, rec, stop, produced)))
+        for t in threads:
+            t.daemon = True
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=15)
+    finally:
+        backend.terminate()
+        backend.wait()
+
+    print(f"{args.nodes} nodes, {'direct posts' if args.direct else f'batched every {args.push_interval}s'}, "
+          f"{args.duration:.0f}s, {produced[0] / args.duration:.0f} samples/s produced")
+    for route, values in sorted(rec.samples.items()):
+        values.sort()
+        print(f"  {route:<24} {len(values) / args.duration:7.1f} req/s  p50 {percentile(values, 0.5) * 1000:6.1f} ms"
+              f"  p95 {percentile(values, 0.95) * 1000:6.1f} ms  p99 {percentile(values, 0.99) * 1000:6.1f} ms"
+              f"  errors {rec.errors.get(route, 0)}")
+    if proc_samples:
+        cpu = sorted(c for c, _ in proc_samples)
+        print(f"  aggregator CPU avg {sum(cpu) / len(cpu):.1f}%  p95 {percentile(cpu, 0.95):.1f}%"
+              f"  RSS max {max(r for _, r in proc_samples) / 2**20:.1f} MiB")
+    if fleet_samples:
+        settled = fleet_samples[len(fleet_samples) // 3:] or fleet_samples
+        worst = [w for _, w in settled if w is not None]
+        print(f"  nodes online (min after warm-up) {min(o for o, _ in settled)}/{args.nodes}"
+              f"  worst last_seen {max(worst) if worst else None}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: JSON vs binary frames for the 1 Hz collector POSTs.
+
+Reports body bytes, approximate bytes on the wire (body + typical request
+headers sent by requests.Session), and server-side decode time.
+
+    python bench/bench_ingest_encoding.py
+"""
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from shared.frames import FRAME_MIME, decode_frame, encode_frame  # noqa: E402
+
+N = 100_000
+
+PAYLOADS = {
+    "system": {
+        "cpu": 12.5, "ram": 41.2, "ram_speed": 1800.0, "core_temp": 52.1,
+        "time": "12:00:00", "timestamp": "2026-01-01T12:00:00.123456+01:00",
+    },
+    "network": {
+        "rx_kbps": 123.4, "tx_kbps": 56.7,
+        "timestamp": "2026-01-01T12:00:00.123456+01:00",
+    },
+}
+
+# What requests.Session sends besides the body (Host/UA/Accept/... + Content-Type/Length).
+BASE_HEADERS = (
+    "POST /api/system HTTP/1.1\r\nHost: 127.0.0.1:5001\r\n"
+    "User-Agent: python-requests/2.28.1\r\nAccept-Encoding: gzip, deflate\r\n"
+    "Accept: */*\r\nConnection: keep-alive\r\nContent-Length: 000\r\n"
+)
+
+
+def wire_bytes(body: bytes, content_type: str) -> int:
+    return len(BASE_HEADERS) + len(f"Content-Type: {content_type}\r\n\r\n") + len(body)
+
+
+def main():
+    for section, payload in PAYLOADS.items():
+        json_body = json.dumps(payload).encode()
+        frame_body = encode_frame(section, payload, time.time())
+
+        t_json = timeit.timeit(lambda: json.loads(json_body), number=N)
+        t_frame = timeit.timeit(lambda: decode_frame(section, frame_body), number=N)
+
+        print(f"--- {section}")
+        print(f"{'':<8}{'body B':>8}{'wire B':>8}{'decode us':>11}")
+        print(f"{'json':<8}{len(json_body):>8}{wire_bytes(json_body, 'application/json'):>8}"
+              f"{t_json / N * 1e6:>11.2f}")
+        print(f"{'frame':<8}{len(frame_body):>8}{wire_bytes(frame_body, FRAME_MIME):>8}"
+              f"{t_frame / N * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
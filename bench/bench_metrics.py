@@ -0,0 +1,52 @@
+"""
+Micro-benchmark: per-request cost of the /metrics instrumentation.
+
+One request = one Histogram.observe + one Counter.inc (what the
+after_request hook does). Also runs the same loop on several threads to
+show the sharded counters don't contend.
+
+    python bench/bench_metrics.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+
+from metrics import Registry  # noqa: E402
+
+N = 200_000
+
+
+def run(latency, requests_total, n):
+    for i in range(n):
+        latency.observe(0.0042, "/api/system", "GET")
+        requests_total.inc("/api/system", "GET", "200")
+
+
+def main():
+    reg = Registry()
+    latency = reg.histogram("lat", "x", ("route", "method"))
+    requests_total = reg.counter("req", "x", ("route", "method", "status"))
+
+    start = time.perf_counter()
+    run(latency, requests_total, N)
+    print(f"1 thread : {(time.perf_counter() - start) / N * 1e6:6.2f} us/request")
+
+    threads = [threading.Thread(target=run, args=(latency, requests_total, N)) for _ in range(4)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"4 threads: {(time.perf_counter() - start) / (4 * N) * 1e6:6.2f} us/request (wall / total requests)")
+
+    assert requests_total.collect()[("/api/system", "GET", "200")] == 5 * N
+    start = time.perf_counter()
+    reg.render()
+    print(f"render   : {(time.perf_counter() - start) * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
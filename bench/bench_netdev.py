@@ -0,0 +1,67 @@
+"""
+Cost of one network sample: pread + parse of /proc/net/dev + rate aggregation,
+compared to psutil.net_io_counters(pernic=True). Also runs the parser on a
+synthetic table with many interfaces (docker/veth-heavy hosts).
+
+    python bench/bench_netdev.py [--n 20000] [--hz 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../collectors"))
+
+import psutil  # noqa: E402
+from network import NetDevReader, RateAggregator, parse_net_dev  # noqa: E402
+
+HEADER = (b"Inter-|   Receive                                                |  Transmit\n"
+          b" face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls "
+          b"carrier compressed\n")
+
+
+def synthetic(n_ifaces: int) -> bytes:
+    lines = [f"veth{i:04d}: 123456789 98765 0 3 0 0 0 12 987654321 87654 0 1 0 0 0 0\n".encode()
+             for i in range(n_ifaces)]
+    return HEADER + b"".join(lines)
+
+
+def per_call_us(fn, n):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--hz", type=float, default=10)
+    args = ap.parse_args()
+
+    reader = NetDevReader()
+    rates = RateAggregator()
+    t = [0.0]
+
+    def sample():
+        t[0] += 0.1
+        rates.add(reader.read(), t[0])
+
+    rows = [
+        ("pread + parse (%d ifaces)" % len(reader.read()), per_call_us(reader.read, args.n)),
+        ("pread + parse + aggregate", per_call_us(sample, args.n)),
+        ("psutil pernic", per_call_us(lambda: psutil.net_io_counters(pernic=True), args.n)),
+    ]
+    for n_ifaces in (10, 100):
+        raw = synthetic(n_ifaces)
+        rows.append((f"parse only, {n_ifaces} synthetic ifaces", per_call_us(lambda: parse_net_dev(raw), args.n // 10)))
+
+    print(f"{'':<36}{'us/sample':>10}{'CPU @ %g Hz' % args.hz:>14}")
+    for name, us in rows:
+        print(f"{name:<36}{us:>10.1f}{us * args.hz / 1e6 * 100:>13.4f}%")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
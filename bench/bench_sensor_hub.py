@@ -0,0 +1,100 @@
+"""
+Sensor read latency: talking to the (simulated) DHT11 + BMP180 directly, the
+way collectors/sensors.py did, vs. reading the latest values from the sensor
+hub's shared-memory ring, with several consumer processes polling at once.
+
+Runs collectors/sensor_hub.py with AHRIPI_SIMULATE=1 (simulated hardware
+delays included) in a subprocess.
+
+    python bench/bench_sensor_hub.py [--consumers 4] [--reads 200000]
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+COLLECTORS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../collectors")
+TMP = tempfile.mkdtemp(prefix="ahripi-hub-")
+os.environ.update(AHRIPI_SIMULATE="1", AHRIPI_ALIGN_TICKS="0", SENSOR_HUB_INTERVAL="1",
+                  SENSOR_HUB_SHM=os.path.join(TMP, "ring"), SENSOR_LOCK=os.path.join(TMP, "dht.lock"))
+sys.path.insert(0, COLLECTORS)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def direct_reads(n):
+    from Freenove_DHT import DHT
+    from sensors import BMP180, DHT_PIN, read_dht_with_retries
+    dht = DHT(DHT_PIN)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        bmp = BMP180()
+        bmp.read_temperature()
+        bmp.read_pressure()
+        read_dht_with_retries(dht)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def consumer(reads, out):
+    from sensor_ring import RingReader
+    reader = RingReader()
+    times = []
+    for _ in range(reads):
+        t0 = time.perf_counter()
+        reading = reader.latest()
+        times.append(time.perf_counter() - t0)
+        assert reading is not None
+    out.put((percentile(times, 0.5), percentile(times, 0.99), reads / sum(times)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--consumers", type=int, default=4)
+    ap.add_argument("--reads", type=int, default=200_000)
+    ap.add_argument("--direct", type=int, default=10, help="direct hardware reads to time")
+    args = ap.parse_args()
+
+    # direct first, in a child process: whoever reads the DHT holds the pin lock until it exits
+    with multiprocessing.Pool(1) as pool:
+        times = pool.apply(direct_reads, (args.direct,))
+    print(f"{'direct DHT11 + BMP180':<28} p50 {percentile(times, 0.5) * 1000:>8.1f} ms   "
+          f"p99 {percentile(times, 0.99) * 1000:>8.1f} ms")
+
+    hub = subprocess.Popen([sys.executable, os.path.join(COLLECTORS, "sensor_hub.py")],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        from sensor_ring import RingReader
+        reader = RingReader()
+        deadline = time.time() + 10
+        while reader.latest() is None:
+            if time.time() > deadline:
+                sys.exit("sensor hub didn't publish anything")
+            time.sleep(0.1)
+
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=consumer, args=(args.reads, out)) for _ in range(args.consumers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        for i, (p50, p99, rate) in enumerate(results):
+            print(f"{f'ring reader {i + 1}/{args.consumers}':<28} p50 {p50 * 1e6:>8.1f} us   "
+                  f"p99 {p99 * 1e6:>8.1f} us   {rate:>9.0f} reads/s")
+        print(f"hub published {reader.latest()['seq']} readings meanwhile, "
+              f"dht failures {reader.latest()['dht_failures']}")
+    finally:
+        hub.terminate()
+        hub.wait()
+
+
+if __name__ == "__main__":
+    main()
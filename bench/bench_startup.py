@@ -0,0 +1,167 @@
+"""
+Startup benchmark for every entry point.
+
+For each of backend/app.py and the collectors:
+  * import cost, from `python -X importtime` (total + the slowest top-level imports)
+  * time to first response: for the backend, process start until GET /api/state
+    answers; for collectors, process start until the first POST reaches a stub
+    backend (run with AHRIPI_SIMULATE=1 and AHRIPI_ALIGN_TICKS=0).
+
+    python bench/bench_startup.py [--runs 3] [--out bench/results/startup.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+ENTRY_POINTS = {
+    "backend": ("backend", "app"),
+    "system": ("collectors", "system"),
+    "network": ("collectors", "network"),
+    "sensors": ("collectors", "sensors"),
+    "fun": ("collectors", "fun"),
+    "weather": ("collectors", "weather"),  # import only: first POST needs the internet
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def base_env(tmp):
+    env = dict(os.environ, AHRIPI_SIMULATE="1", AHRIPI_ALIGN_TICKS="0", PYTHONDONTWRITEBYTECODE="1",
+               COMMENTS_DB=os.path.join(tmp, "comments.db"), PHOTO_DIR=os.path.join(tmp, "pics"))
+    env.pop("INGEST_SOCKET", None)
+    return env
+
+
+def import_time(folder, module, env):
+    """Return (total ms, [(cumulative ms, name), ...]) for importing module."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=os.path.join(ROOT, folder), env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None, [(0.0, proc.stderr.strip().splitlines()[-1])]
+    total = 0
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        total += int(self_us)
+        # Nesting is shown as 2 extra spaces per level; depth 1 = what the
+        # entry point itself imports.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            top.append((int(cumulative_us) / 1000, name.strip()))
+    top.sort(reverse=True)
+    return total / 1000, top[:5]
+
+
+class _FirstPost(BaseHTTPRequestHandler):
+    seen = {}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        _FirstPost.seen.setdefault(self.path, time.perf_counter())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"status": "ok"}')
+
+    def log_message(self, *args):
+        pass
+
+
+def first_response_backend(env, timeout=20):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend", "app.py")],
+                            env=dict(env, PORT=str(port)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/api/state", timeout=1).ok:
+                    return (time.perf_counter() - start) * 1000
+            except requests.RequestException:
+                time.sleep(0.01)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def first_response_collector(name, env, stub_url, timeout=20):
+    path = f"/api/{name}"
+    _FirstPost.seen.pop(path, None)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "collectors", f"{name}.py")],
+                            env=dict(env, API_BASE_URL=stub_url), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if path in _FirstPost.seen:
+                return (_FirstPost.seen[path] - start) * 1000
+            time.sleep(0.005)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--out", help="write results as JSON")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ahripi-startup-")
+    env = base_env(tmp)
+
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), _FirstPost)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+
+    results = {}
+    for name, (folder, module) in ENTRY_POINTS.items():
+        imports = [import_time(folder, module, env) for _ in range(args.runs)]
+        totals = [t for t, _ in imports if t is not None]
+        if name == "backend":
+            ttfr = [first_response_backend(env) for _ in range(args.runs)]
+        elif name != "weather":
+            ttfr = [first_response_collector(name, env, stub_url) for _ in range(args.runs)]
+        else:
+            ttfr = []
+        ttfr = [t for t in ttfr if t is not None]
+
+        results[name] = {
+            "import_ms": round(statistics.median(totals), 1) if totals else None,
+            "first_response_ms": round(statistics.median(ttfr), 1) if ttfr else None,
+            "slowest_imports": [(round(ms, 1), mod) for ms, mod in imports[-1][1]],
+        }
+        r = results[name]
+        print(f"{name:<9} import {r['import_ms']!s:>8} ms   first response {r['first_response_ms']!s:>8} ms")
+        for ms, mod in r["slowest_imports"]:
+            print(f"{'':<12}{ms:>8} ms  {mod}")
+
+    stub.shutdown()
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bytes and server time per dashboard tick: five section GETs (the old
+web/index.html), one full /api/state, a ?fields= projection, and projection
+plus ?since= deltas.
+
+Simulates a minute of collectors posting at their usual rates (system, network
+and sensors every second, fun every 10 s, weather every 10 min) with the
+dashboard polling once per second in between.
+
+    python bench/bench_state_view.py [--ticks 60]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+os.environ.setdefault("COMMENTS_DB", os.path.join(tempfile.mkdtemp(), "comments.db"))
+os.environ.setdefault("HISTORY", "0")
+
+import app as backend  # noqa: E402
+
+# same list as web/index.html
+FIELDS = ",".join([
+    "system.cpu", "system.ram", "system.ram_speed", "system.core_temp", "system.timestamp",
+    "network.rx_kbps", "network.tx_kbps", "network.timestamp",
+    "sensors.temp", "sensors.humidity", "sensors.pressure", "sensors.timestamp",
+    "fun.quote", "fun.insult", "fun.coinflip", "fun.timestamp",
+    "weather.*",
+])
+TICK = {"tick_jitter_p50_ms": 0.4, "tick_jitter_p95_ms": 1.2, "tick_work_p95_ms": 3.1, "tick_skipped": 0}
+
+
+def post_tick(client, second):
+    client.post("/api/system", json={"cpu": random.randint(5, 40), "ram": 41.5 + random.random(),
+                                     "ram_speed": 1800, "core_temp": random.choice((51.0, 51.5)), **TICK})
+    client.post("/api/network", json={"rx_kbps": random.uniform(10, 900), "tx_kbps": random.uniform(5, 90),
+                                      "interfaces": {"eth0": {"rx_kbps": 12.0}, "wlan0": {"rx_kbps": 1.0}}, **TICK})
+    client.post("/api/sensors", json={"temp": random.choice((21.0, 21.1)), "humidity": 40.0,
+                                      "pressure": 1013.2, **TICK})
+    if second % 10 == 0:
+        client.post("/api/fun", json={"quote": "Premature optimization is the root of all evil. " * 2,
+                                      "insult": "Your code has more side effects than a pharmacy.",
+                                      "coinflip": random.choice(("heads", "tails")), **TICK})
+    if second % 600 == 0:
+        client.post("/api/weather", json={
+            "city": "Berlin", "current_date": "2026-10-19", "outside_temp": 12.5, "condition": "Cloudy",
+            "current_high_temp": 14.0, "current_low_temp": 8.0,
+            "forecast_day1_date": "2026-10-20", "forecast_day1_avg_temp": 11.0,
+            "forecast_day1_high_temp": 13.0, "forecast_day1_low_temp": 7.0,
+            "forecast_day2_date": "2026-10-21", "forecast_day2_avg_temp": 10.0,
+            "forecast_day2_high_temp": 12.0, "forecast_day2_low_temp": 6.0, **TICK})
+
+
+def wire_bytes(resp):
+    return len(resp.data) + sum(len(k) + len(v) + 4 for k, v in resp.headers.items())
+
+
+class Client:
+    def __init__(self, mode):
+        self.mode = mode
+        self.version = None
+
+    def tick(self, client):
+        if self.mode == "5 sections":
+            return [client.get(f"/api/{s}") for s in ("sensors", "system", "network", "fun", "weather")]
+        if self.mode == "full /api/state":
+            return [client.get("/api/state")]
+        url = "/api/state?fields=" + FIELDS
+        if self.mode == "fields + since" and self.version is not None:
+            url += f"&since={self.version}"
+        resp = client.get(url)
+        self.version = resp.headers["X-State-Version"]
+        return [resp]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=60)
+    args = ap.parse_args()
+    client = backend.app.test_client()
+    modes = ("5 sections", "full /api/state", "fields", "fields + since")
+    clients = {m: Client(m) for m in modes}
+    totals = {m: [0, 0, 0.0] for m in modes}  # requests, bytes, seconds
+
+    random.seed(1)
+    for second in range(args.ticks):
+        post_tick(client, second)
+        for mode, c in clients.items():
+            t0 = time.perf_counter()
+            responses = c.tick(client)
+            totals[mode][2] += time.perf_counter() - t0
+            totals[mode][0] += len(responses)
+            totals[mode][1] += sum(wire_bytes(r) for r in responses)
+
+    print(f"{args.ticks} ticks, one dashboard")
+    print(f"{'mode':<18}{'req/tick':>9}{'bytes/tick':>12}{'us/tick':>10}")
+    for mode, (reqs, size, secs) in totals.items():
+        print(f"{mode:<18}{reqs / args.ticks:>9.0f}{size / args.ticks:>12.0f}{secs / args.ticks * 1e6:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Live preview fan-out: does the camera-side cost stay flat as viewers are added?
+
+Runs backend/stream.py's MJPEGRelay in-process with a fake frame source that
+"encodes" one JPEG per frame (sim.fake_jpeg: a real JPEG if Pillow is
+installed) and counts its own CPU time. For each viewer count it reports
+frames encoded, source CPU per frame, and the frames delivered to fast and
+slow viewers (slow ones should drop frames, not fall behind).
+
+    python bench/bench_stream.py [--fps 15] [--seconds 5] [--viewers 1,10,50] [--slow-ms 200]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../collectors"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+
+from sim import fake_jpeg  # noqa: E402
+from stream import MJPEGRelay  # noqa: E402
+
+
+class FakeFrameSource:
+    def __init__(self, fps):
+        self.fps = fps
+        self.encoded = 0
+        self.cpu = 0.0
+
+    def __call__(self):
+        next_frame = time.monotonic()
+        while True:
+            next_frame += 1 / self.fps
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+            t0 = time.thread_time()
+            jpeg = fake_jpeg(640, 360, label=f"frame {self.encoded}")
+            self.cpu += time.thread_time() - t0
+            self.encoded += 1
+            yield jpeg
+
+
+def viewer(relay, stop, delay, counts, i):
+    frames = relay.frames()
+    try:
+        for _ in frames:
+            counts[i] += 1
+            if delay:
+                time.sleep(delay)  # slow network / slow client
+            if stop.is_set():
+                break
+    finally:
+        frames.close()
+
+
+def run(n_viewers, fps, seconds, slow_delay):
+    source = FakeFrameSource(fps)
+    relay = MJPEGRelay(source, idle_timeout=0.1, retry_delay=0.1)
+    stop = threading.Event()
+    counts = [0] * n_viewers
+    n_slow = max(1, n_viewers // 5) if n_viewers > 1 else 0
+    threads = [threading.Thread(target=viewer, args=(relay, stop, slow_delay if i < n_slow else 0, counts, i),
+                                daemon=True) for i in range(n_viewers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout=2)
+    fast = counts[n_slow:] or [0]
+    slow = counts[:n_slow] or [0]
+    return {
+        "viewers": n_viewers,
+        "encoded": source.encoded,
+        "cpu_ms_per_frame": source.cpu / max(source.encoded, 1) * 1000,
+        "fast_min": min(fast),
+        "slow_max": max(slow) if n_slow else None,
+        "upstreams": 1,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fps", type=float, default=15)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--viewers", default="1,10,50")
+    ap.add_argument("--slow-ms", type=float, default=200)
+    args = ap.parse_args()
+
+    print(f"{'viewers':>8}{'encoded':>9}{'src ms/frame':>14}{'fast viewer min':>17}{'slow viewer max':>17}")
+    for n in (int(v) for v in args.viewers.split(",")):
+        r = run(n, args.fps, args.seconds, args.slow_ms / 1000)
+        slow = "-" if r["slow_max"] is None else str(r["slow_max"])
+        print(f"{r['viewers']:>8}{r['encoded']:>9}{r['cpu_ms_per_frame']:>14.3f}{r['fast_min']:>17}{slow:>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: per-sample cost of HTTP-over-TCP vs the Unix datagram socket.
+
+Runs the backend in-process (werkzeug server thread + ingest socket thread)
+so process CPU time covers both the collector and the server side.
+
+    python bench/bench_transport.py [samples]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "../collectors"))
+sys.path.insert(0, os.path.join(HERE, "../backend"))
+
+import requests  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as backend  # noqa: E402
+from shared.frames import FRAME_MIME, encode_frame  # noqa: E402
+from ingest_socket import serve_ingest_socket  # noqa: E402
+from transport import DatagramSender  # noqa: E402
+
+PAYLOAD = {"cpu": 12.5, "ram": 41.2, "ram_speed": 1800.0, "core_temp": 52.1}
+
+
+def measure(label, n, send_one, wait_done=None):
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for i in range(n):
+        send_one(i)
+    if wait_done:
+        wait_done(n)
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    print(f"{label:<22} {wall / n * 1e6:9.1f} us/sample wall {cpu / n * 1e6:9.1f} us/sample CPU")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no access log per sample
+    server = make_server("127.0.0.1", 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/system"
+
+    sock_path = os.path.join(tempfile.mkdtemp(), "ingest.sock")
+    serve_ingest_socket(sock_path, backend.apply_sample)
+
+    session = requests.Session()
+    body = encode_frame("system", PAYLOAD, time.time())
+
+    def http_one(i):
+        r = session.post(url, data=body, headers={"Content-Type": FRAME_MIME}, timeout=5)
+        r.raise_for_status()
+
+    sender = DatagramSender(sock_path)
+
+    def uds_one(i):
+        # cpu carries the sequence number so we can tell when the server caught up
+        frame = encode_frame("system", dict(PAYLOAD, cpu=i), time.time())
+        while not sender.send("system", frame, FRAME_MIME):
+            time.sleep(0)  # socket buffer full, let the reader thread drain it
+
+    def uds_wait(count):
+        while backend.STATE["system"].cpu != count - 1:
+            time.sleep(0.0005)
+
+    print(f"{n} samples each")
+    measure("HTTP over TCP", n, http_one)
+    measure("Unix datagram socket", n, uds_one, uds_wait)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: cost of validating one collector POST body.
+
+Compares the old "just dict.update() whatever arrives" path, the typed
+records from backend/records.py, and (if installed) jsonschema.
+
+    python bench/bench_validation.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../backend"))
+
+from records import SystemRecord, WeatherRecord  # noqa: E402
+
+N = 50_000
+
+SYSTEM_PAYLOAD = {
+    "cpu": 12.5, "ram": 41.2, "ram_speed": 1800.0, "core_temp": 52.1,
+    "time": "12:00:00", "timestamp": "2026-01-01T12:00:00+01:00",
+}
+WEATHER_PAYLOAD = {
+    "city": "Schwerin", "current_date": "2026-01-01", "outside_temp": 3,
+    "condition": "Cloudy", "current_high_temp": 5, "current_low_temp": -1,
+    "forecast_day1_date": "2026-01-01", "forecast_day1_avg_temp": 2.0,
+    "forecast_day1_high_temp": 5, "forecast_day1_low_temp": -1,
+    "forecast_day2_date": "2026-01-02", "forecast_day2_avg_temp": 1.5,
+    "forecast_day2_high_temp": 4, "forecast_day2_low_temp": -1,
+    "timestamp": "2026-01-01T12:00:00+01:00",
+}
+
+
+def schema_for(record_cls):
+    props = {}
+    for name in record_cls._coercers:
+        props[name] = {"type": ["number", "string", "boolean", "null"]}
+    return {"type": "object", "properties": props, "additionalProperties": False}
+
+
+def report(label, seconds):
+    print(f"{label:<34} {seconds / N * 1e6:8.2f} us/POST")
+
+
+def main():
+    for name, cls, payload in (
+        ("system", SystemRecord, SYSTEM_PAYLOAD),
+        ("weather", WeatherRecord, WEATHER_PAYLOAD),
+    ):
+        print(f"--- {name} ({len(payload)} fields, {N} iterations)")
+
+        raw = dict.fromkeys(payload)
+        report("dict.update (no validation)", timeit.timeit(lambda: raw.update(payload), number=N))
+
+        rec = cls()
+        report("typed record .update()", timeit.timeit(lambda: rec.update(payload), number=N))
+
+        try:
+            import jsonschema
+        except ImportError:
+            print("jsonschema not installed, skipping")
+            continue
+
+        schema = schema_for(cls)
+        report("jsonschema.validate (per call)",
+               timeit.timeit(lambda: jsonschema.validate(payload, schema), number=N // 10) * 10)
+        validator = jsonschema.Draft7Validator(schema)
+        report("jsonschema precompiled validator",
+               timeit.timeit(lambda: validator.validate(payload), number=N))
+
+    print("--- memory per section")
+    rec = SystemRecord()
+    rec.update(SYSTEM_PAYLOAD)
+    plain = dict(SYSTEM_PAYLOAD)
+    print(f"{'SystemRecord (slots)':<34} {sys.getsizeof(rec):8d} bytes")
+    print(f"{'dict':<34} {sys.getsizeof(plain):8d} bytes")
+
+
+if __name__ == "__main__":
+    main()
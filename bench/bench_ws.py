@@ -0,0 +1,178 @@
+"""
+Hundreds of open dashboards on the live channel (/api/ws): server memory per
+connection, push latency (sample POSTed -> frame received by every client),
+and bytes on the wire per tick vs. polling /api/state?fields=&since= every
+second.
+
+Starts backend/app.py (the built-in server) in a subprocess; all clients live
+in this process on one selector. Needs ~2 fds per client on each side, so
+raise `ulimit -n` for more than ~450 clients.
+
+    python bench/bench_ws.py [--clients 300] [--ticks 10]
+"""
+import argparse
+import base64
+import json
+import os
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIELDS = ("system.cpu,system.ram,system.ram_speed,system.core_temp,system.timestamp,"
+          "network.rx_kbps,network.tx_kbps,network.timestamp,"
+          "sensors.temp,sensors.humidity,sensors.pressure,sensors.timestamp,"
+          "fun.quote,fun.insult,fun.coinflip,fun.timestamp,weather.*")
+
+
+def masked(obj) -> bytes:
+    data = json.dumps(obj).encode()
+    mask = os.urandom(4)
+    n = len(data)
+    head = struct.pack("!BB", 0x81, 0x80 | n) if n < 126 else struct.pack("!BBH", 0x81, 0x80 | 126, n)
+    return head + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+class Client:
+    def __init__(self, port: int):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((f"GET /api/ws HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = b""
+        while b"\r\n\r\n" not in head:
+            head += self.sock.recv(1)
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            sys.exit(f"handshake failed: {head.splitlines()[0]!r}")
+        self.sock.setblocking(False)
+        self.buf = b""
+        self.bytes = 0
+        self.messages = []
+
+    def feed(self) -> None:
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("server closed the socket")
+        self.bytes += len(data)
+        self.buf += data
+        while len(self.buf) >= 2:
+            n, off = self.buf[1] & 0x7F, 2
+            if n == 126:
+                n, off = struct.unpack_from("!H", self.buf, 2)[0], 4
+            elif n == 127:
+                n, off = struct.unpack_from("!Q", self.buf, 2)[0], 10
+            if len(self.buf) < off + n:
+                return
+            opcode, payload, self.buf = self.buf[0] & 0x0F, self.buf[off:off + n], self.buf[off + n:]
+            if opcode == 0x1:
+                self.messages.append((time.perf_counter(), json.loads(payload)))
+
+
+def wait_for(sel, clients, done, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not all(done(c) for c in clients):
+        if time.perf_counter() > deadline:
+            sys.exit("timed out waiting for the server")
+        for key, _ in sel.select(0.5):
+            key.data.feed()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=300)
+    ap.add_argument("--ticks", type=int, default=10, help="collector samples to push (one per second)")
+    ap.add_argument("--port", type=int, default=5099)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ahripi-ws-")
+    env = dict(os.environ, PORT=str(args.port), COMMENTS_DB=os.path.join(tmp, "c.db"), HISTORY="0",
+               TIMELAPSE_INTERVAL="0", WS_PUSH_INTERVAL="1")
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend/app.py")], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"{base}/api/state", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        proc = psutil.Process(server.pid)
+        # one sample in every section so the dashboards have something to show
+        for section, data in (("system", {"cpu": 10.0, "ram": 40.0, "core_temp": 50.0}),
+                              ("network", {"rx_kbps": 100.0, "tx_kbps": 20.0}),
+                              ("sensors", {"temp": 21.0, "humidity": 40.0, "pressure": 1013.0}),
+                              ("fun", {"quote": "hello", "coinflip": "heads"})):
+            requests.post(f"{base}/api/{section}", json=data)
+        time.sleep(1.5)  # let the live hub's first (empty) tick go by
+        rss_before, threads_before = proc.memory_info().rss, proc.num_threads()
+
+        sel = selectors.DefaultSelector()
+        clients = []
+        for i in range(args.clients):
+            client = Client(args.port)
+            sel.register(client.sock, selectors.EVENT_READ, client)
+            client.sock.sendall(masked({"id": 1, "cmd": "subscribe", "fields": FIELDS}))
+            clients.append(client)
+        wait_for(sel, clients, lambda c: c.messages)
+        time.sleep(1.5)
+        for key, _ in sel.select(0):
+            key.data.feed()
+        rss_after, threads_after = proc.memory_info().rss, proc.num_threads()
+        per_conn = (rss_after - rss_before) / args.clients
+        print(f"{args.clients} connections: server RSS {rss_before / 2**20:.1f} -> {rss_after / 2**20:.1f} MiB "
+              f"({per_conn / 1024:.1f} KiB per connection), threads {threads_before} -> {threads_after}")
+
+        for c in clients:
+            c.messages.clear()
+            c.bytes = 0
+        latencies = []
+        for tick in range(args.ticks):
+            t0 = time.perf_counter()
+            requests.post(f"{base}/api/system", json={"cpu": 10.0 + tick, "core_temp": 50.0 + tick % 3})
+            wait_for(sel, clients, lambda c: len(c.messages) > tick)
+            latencies.extend(c.messages[tick][0] - t0 for c in clients)
+            time.sleep(max(0.0, 1.0 - (time.perf_counter() - t0)))
+        ws_bytes = sum(c.bytes for c in clients) / args.clients / args.ticks
+        print(f"push latency (POST -> every client has the frame): p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms")
+        print("  (pushes go out on the hub's 1 s tick, so up to a second of that is waiting for the tick)")
+
+        # polling: the same dashboard after the first request, one GET per second
+        r = requests.get(f"{base}/api/state", params={"fields": FIELDS})
+        version = r.headers["X-State-Version"]
+        requests.post(f"{base}/api/system", json={"cpu": 99.0, "core_temp": 51.0})
+        r = requests.get(f"{base}/api/state", params={"fields": FIELDS, "since": version},
+                         headers={"User-Agent": "Mozilla/5.0 (X11; Linux aarch64) Firefox/128.0",
+                                  "Accept": "*/*", "Accept-Language": "en-US,en;q=0.5",
+                                  "Accept-Encoding": "gzip, deflate", "Referer": f"{base}/"})
+        req_bytes = len(r.request.method) + len(r.request.path_url) + 12 + sum(
+            len(k) + len(v) + 4 for k, v in r.request.headers.items()) + 2
+        resp_bytes = 17 + sum(len(k) + len(v) + 4 for k, v in r.headers.items()) + 2 + len(r.content)
+        print(f"bytes per dashboard per tick: websocket push {ws_bytes:.0f} B (server -> client only) "
+              f"vs polling {req_bytes + resp_bytes} B ({req_bytes} request + {resp_bytes} response, "
+              f"plus TCP/keep-alive overhead)")
+
+        for c in clients:
+            sel.unregister(c.sock)
+            c.sock.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Load test for the backend: real collector rates + dashboard polling.
+
+Starts backend/app.py (and the stub camera from stub_camera.py) as local
+processes, then runs:
+  * K sets of collectors POSTing at their real intervals
+    (system/network 1 s, sensors 5 s, weather 10 s, fun 20 s)
+  * N browsers following web/index.html: every second the five section
+    GETs + /api/camera, comments every 10 s.
+
+With --sim-collectors the real collector scripts are started as well, in
+hardware simulation mode (AHRIPI_SIMULATE=1, see collectors/sim.py), so the
+whole collector -> backend pipeline runs on a normal x86 box.
+
+Reports throughput and p50/p95/p99 per route plus backend CPU/RSS, and
+writes everything to a JSON file. Pass --compare to diff against a saved
+baseline (exit code 1 on regressions).
+
+    python bench/loadtest.py --browsers 20 --collectors 1 --duration 60
+    python bench/loadtest.py --out bench/results/baseline.json
+    python bench/loadtest.py --compare bench/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import psutil
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from shared.frames import FRAME_MIME, encode_frame  # noqa: E402
+
+SIM_COLLECTORS = ("system", "network", "sensors", "fun")  # weather needs the internet
+COLLECTOR_INTERVALS = {"system": 1, "network": 1, "sensors": 5, "weather": 10, "fun": 20}
+BROWSER_SECTIONS = ("sensors", "system", "network", "fun", "weather")
+
+SAMPLE_PAYLOADS = {
+    "system": {"cpu": 12.5, "ram": 41.2, "ram_speed": 1800.0, "core_temp": 52.1},
+    "network": {"rx_kbps": 123.4, "tx_kbps": 56.7},
+    "sensors": {"temp": 21.5, "humidity": 40.0, "pressure": 101325},
+    "weather": {
+        "city": "Schwerin", "current_date": "2026-01-01", "outside_temp": 3, "condition": "Cloudy",
+        "current_high_temp": 5, "current_low_temp": -1,
+        "forecast_day1_date": "2026-01-01", "forecast_day1_avg_temp": 2.0,
+        "forecast_day1_high_temp": 5, "forecast_day1_low_temp": -1,
+        "forecast_day2_date": "2026-01-02", "forecast_day2_avg_temp": 1.5,
+        "forecast_day2_high_temp": 4, "forecast_day2_low_temp": -1,
+    },
+    "fun": {"quote": "Talk is cheap. Show me the code.", "insult": "You absolute walnut.", "coinflip": "heads"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class Recorder:
+    """Collects per-route latencies from all worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def timed(self, route, fn, *args, **kwargs):
+        start = time.perf_counter()
+        ok = False
+        try:
+            r = fn(*args, **kwargs)
+            ok = r.status_code < 400 or r.status_code == 502  # 502 = camera down, still a valid answer
+        except requests.RequestException:
+            pass
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples.setdefault(route, []).append(elapsed)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def collector_worker(base, section, interval, rec, stop):
+    session = requests.Session()
+    url = f"{base}/api/{section}"
+    route = f"POST /api/{section}"
+    next_t = time.monotonic()
+    while not stop.is_set():
+        payload = SAMPLE_PAYLOADS[section]
+        if section in ("system", "network"):
+            # what the real collectors send by default
+            body = encode_frame(section, payload, time.time())
+            rec.timed(route, session.post, url, data=body, headers={"Content-Type": FRAME_MIME}, timeout=10)
+        else:
+            rec.timed(route, session.post, url, json=payload, timeout=10)
+        next_t += interval
+        stop.wait(max(0.0, next_t - time.monotonic()))
+
+
+def browser_worker(base, tick, rec, stop):
+    session = requests.Session()
+    rec.timed("GET /", session.get, f"{base}/", timeout=10)
+    rec.timed("GET /api/admin/me", session.get, f"{base}/api/admin/me", timeout=10)
+    next_t = time.monotonic()
+    n = 0
+    while not stop.is_set():
+        for section in BROWSER_SECTIONS:
+            rec.timed(f"GET /api/{section}", session.get, f"{base}/api/{section}", timeout=10)
+        rec.timed("GET /api/camera", session.get, f"{base}/api/camera", timeout=10)
+        if n % 10 == 0:
+            rec.timed("GET /api/comments", session.get, f"{base}/api/comments", timeout=10)
+        n += 1
+        next_t += tick
+        stop.wait(max(0.0, next_t - time.monotonic()))
+
+
+def sample_process(pid, out, stop):
+    proc = psutil.Process(pid)
+    proc.cpu_percent(None)
+    while not stop.wait(1.0):
+        try:
+            out.append((proc.cpu_percent(None), proc.memory_info().rss))
+        except psutil.Error:
+            return
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def summarize(rec, duration, proc_samples):
+    routes = {}
+    for route, values in sorted(rec.samples.items()):
+        values.sort()
+        routes[route] = {
+            "count": len(values),
+            "errors": rec.errors.get(route, 0),
+            "rps": round(len(values) / duration, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    cpu = [c for c, _ in proc_samples]
+    rss = [r for _, r in proc_samples]
+    process = {
+        "cpu_mean_pct": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_max_pct": max(cpu) if cpu else None,
+        "rss_max_mb": round(max(rss) / 2**20, 1) if rss else None,
+    }
+    return routes, process
+
+
+def print_report(result):
+    print(f"{'route':<26}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, r in result["routes"].items():
+        print(f"{route:<26}{r['count']:>8}{r['errors']:>6}{r['rps']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+    print("backend process:", result["process"])
+
+
+def compare(result, baseline_path, threshold):
+    """Print p95 / throughput changes vs a baseline. Returns number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    regressions = 0
+    print(f"\n--- vs {baseline_path} (threshold {threshold:.0%})")
+    for route, now in result["routes"].items():
+        old = base.get("routes", {}).get(route)
+        if not old:
+            continue
+        p95_change = (now["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        # ignore sub-millisecond noise
+        worse = p95_change > threshold and now["p95_ms"] - old["p95_ms"] > 1.0
+        if worse:
+            regressions += 1
+        print(f"{route:<26} p95 {old['p95_ms']:>8} -> {now['p95_ms']:>8} ms ({p95_change:+.0%})"
+              f"{'  REGRESSION' if worse else ''}")
+    old_rss = base.get("process", {}).get("rss_max_mb")
+    new_rss = result["process"]["rss_max_mb"]
+    if old_rss and new_rss and (new_rss - old_rss) / old_rss > threshold:
+        regressions += 1
+        print(f"RSS {old_rss} -> {new_rss} MB  REGRESSION")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--collectors", type=int, default=1, help="sets of the five collectors (K)")
+    ap.add_argument("--browsers", type=int, default=10, help="simulated dashboards (N)")
+    ap.add_argument("--duration", type=float, default=30, help="seconds to run")
+    ap.add_argument("--speed", type=float, default=1.0, help="divide all intervals by this (compress time)")
+    ap.add_argument("--sim-collectors", action="store_true",
+                    help="also run the real collector scripts against simulated hardware")
+    ap.add_argument("--capture-delay", type=float, default=0.5, help="stub camera capture time")
+    ap.add_argument("--out", default=os.path.join(HERE, "results", "latest.json"))
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed relative p95/RSS increase")
+    args = ap.parse_args()
+
+    cam_port, port = free_port(), free_port()
+    tmp = tempfile.mkdtemp(prefix="ahripi-bench-")
+    env = dict(os.environ, PORT=str(port), CAM_BASE=f"http://127.0.0.1:{cam_port}",
+               COMMENTS_DB=os.path.join(tmp, "comments.db"), SECRET_KEY="bench")
+    env.pop("INGEST_SOCKET", None)
+
+    cam = subprocess.Popen([sys.executable, os.path.join(HERE, "stub_camera.py"), str(cam_port),
+                            str(args.capture_delay)], stdout=subprocess.DEVNULL)
+    backend = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend", "app.py")], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    sim_procs = []
+    try:
+        wait_ready(f"{base}/api/state")
+        wait_ready(f"http://127.0.0.1:{cam_port}/health")
+
+        if args.sim_collectors:
+            sim_env = dict(env, API_BASE_URL=base, AHRIPI_SIMULATE="1")
+            for name in SIM_COLLECTORS:
+                sim_procs.append(subprocess.Popen(
+                    [sys.executable, os.path.join(ROOT, "collectors", f"{name}.py")], env=sim_env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+        rec = Recorder()
+        stop = threading.Event()
+        proc_samples = []
+        threads = [threading.Thread(target=sample_process, args=(backend.pid, proc_samples, stop))]
+        for _ in range(args.collectors):
+            for section, interval in COLLECTOR_INTERVALS.items():
+                threads.append(threading.Thread(
+                    target=collector_worker, args=(base, section, interval / args.speed, rec, stop)))
+        for _ in range(args.browsers):
+            threads.append(threading.Thread(target=browser_worker, args=(base, 1.0 / args.speed, rec, stop)))
+
+        for t in threads:
+            t.daemon = True
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=15)
+    finally:
+        for p in sim_procs + [backend, cam]:
+            p.terminate()
+        for p in sim_procs + [backend, cam]:
+            p.wait()
+
+    routes, process = summarize(rec, args.duration, proc_samples)
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "host": platform.node(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            **{k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "routes": routes,
+        "process": process,
+    }
+    print_report(result)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nsaved {args.out}")
+
+    if args.compare and compare(result, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
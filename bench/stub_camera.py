@@ -0,0 +1,86 @@
+"""
+Stand-in for the camera collector (CAM_BASE) so the backend's camera proxy
+routes can be load-tested off the Pi. /stream sends FAKE_JPEG as MJPEG at stream_fps.
+
+    python bench/stub_camera.py [port] [capture_delay_s]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Smallest valid-ish JPEG body; content doesn't matter for the proxy.
+FAKE_JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 2048 + b"\xff\xd9"
+
+
+class StubCamera(BaseHTTPRequestHandler):
+    capture_delay = 0.5
+    stream_fps = 15.0
+    streams_opened = 0
+    latest = None
+
+    def _json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._json(200, {
+                "ok": True,
+                "latest": StubCamera.latest,
+                "last_capture": StubCamera.latest and datetime.now().isoformat(),
+                "timestamp": datetime.now().isoformat(),
+            })
+        elif self.path == "/stream":
+            StubCamera.streams_opened += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.end_headers()
+            part = (b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                    + str(len(FAKE_JPEG)).encode() + b"\r\n\r\n" + FAKE_JPEG + b"\r\n")
+            try:
+                while True:
+                    self.wfile.write(part)
+                    self.wfile.flush()
+                    time.sleep(1 / self.stream_fps)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+        elif self.path.startswith("/photos/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(FAKE_JPEG)))
+            self.end_headers()
+            self.wfile.write(FAKE_JPEG)
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/capture":
+            time.sleep(self.capture_delay)  # a real still capture takes a while
+            filename = datetime.now().strftime("photo_%Y-%m-%d_%H-%M-%S.jpg")
+            StubCamera.latest = filename
+            self._json(200, {"status": "ok", "filename": filename, "url": f"/photos/{filename}",
+                             "timestamp": datetime.now().isoformat()})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int = 5055, capture_delay: float = 0.5) -> ThreadingHTTPServer:
+    StubCamera.capture_delay = capture_delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubCamera)
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5055
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    print(f"Stub camera on http://127.0.0.1:{port}")
+    serve(port, delay).serve_forever()
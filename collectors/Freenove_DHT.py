@@ -6,20 +6,58 @@
 # modification: 2024/07/29
 ########################################################################
 import ctypes  
+import fcntl
+import os
 import time
+from sim import SIMULATE, FakeDHTLib
 
 lib_name = '/usr/lib/libdht.so'  # Linux  
-lib = ctypes.CDLL(lib_name)  
-lib.setDHT11Pin.argtypes = [ctypes.c_int]  
-lib.readSensor.argtypes = [ctypes.c_int, ctypes.c_int]  
-lib.readSensor.restype = ctypes.c_int  
-lib.readDHT11.restype = ctypes.c_int  
-lib.getHumidity.restype = ctypes.c_double  
-lib.getTemperature.restype = ctypes.c_double  
+lib = None
+
+# Only one process may drive the DHT pin: two of them bit-banging it at the
+# same time garble each other's reads. Normally that process is sensor_hub.py.
+LOCK_PATH = os.getenv("SENSOR_LOCK", "/tmp/ahripi-dht.lock")
+_lock_file = None
+
+def claim_pin():
+    global _lock_file
+    if _lock_file is not None:
+        return
+    f = open(LOCK_PATH, "a+")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.seek(0)
+        owner = f.read().strip() or "?"
+        f.close()
+        raise RuntimeError(f"DHT11 is in use by pid {owner} (sensor_hub.py?), read it from the hub instead")
+    f.truncate(0)
+    f.write(str(os.getpid()))
+    f.flush()
+    _lock_file = f
+
+#Load the shared library on first use instead of at import time
+def load_lib():
+    global lib
+    if lib is not None:
+        return lib
+    claim_pin()
+    if SIMULATE:
+        lib = FakeDHTLib()  # AHRIPI_SIMULATE=1: no libdht.so / GPIO needed
+        return lib
+    handle = ctypes.CDLL(lib_name)  
+    handle.setDHT11Pin.argtypes = [ctypes.c_int]  
+    handle.readSensor.argtypes = [ctypes.c_int, ctypes.c_int]  
+    handle.readSensor.restype = ctypes.c_int  
+    handle.readDHT11.restype = ctypes.c_int  
+    handle.getHumidity.restype = ctypes.c_double  
+    handle.getTemperature.restype = ctypes.c_double  
+    lib = handle
+    return lib
 
 class DHT(object):
     def __init__(self,pin):
-        lib.setDHT11Pin(pin) 
+        load_lib().setDHT11Pin(pin) 
         
     #Read DHT sensor, store the original data in bits[] 
     def readSensor(self,pin,wakeupDelay):
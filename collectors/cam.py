@@ -1,16 +1,75 @@
+from __future__ import annotations
+
+import io
 import os
 import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict
+
+from sim import SIMULATE
+from photo_store import PhotoStore
 
-from picamera2 import Picamera2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.mjpeg import STREAM_MIME, FrameBuffer  # noqa: E402,F401  (STREAM_MIME: for the /stream route)
+
+if TYPE_CHECKING:
+    from picamera2 import Picamera2
 
 log = logging.getLogger(__name__)
 
 PHOTO_DIR = os.getenv("PHOTO_DIR", "/home/blubb/ahripi-dev/data/pi-cam")
-os.makedirs(PHOTO_DIR, exist_ok=True)
+PHOTO_CACHE_SIZE = int(os.getenv("PHOTO_CACHE_SIZE", "20"))  # latest stills kept in RAM
+
+# The camera service's /photos/<filename> route should serve PHOTOS.get(filename).
+PHOTOS = PhotoStore(PHOTO_DIR, PHOTO_CACHE_SIZE)
+
+# Live preview: low-res video mode, each frame JPEG-encoded once.
+# mjpeg = hardware encoder (Pi 4 and older), jpeg = simplejpeg on the CPU (Pi 5 has no HW JPEG).
+PREVIEW_SIZE = tuple(int(v) for v in os.getenv("PREVIEW_SIZE", "640x360").split("x"))
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", "15"))
+PREVIEW_ENCODER = os.getenv("PREVIEW_ENCODER", "mjpeg")
 
 _picam2: Optional[Picamera2] = None
+_cam_lock = threading.RLock()  # mode switches (still <-> preview) must not interleave
+_previewing = False
+_preview_viewers = 0
+
+# Everything that drives the camera (captures, preview on/off) is queued onto
+# this single worker, so requests from several HTTP threads never race on the
+# init_camera() singleton; they just wait their turn.
+_camera_queue = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+_queue_lock = threading.Lock()  # queue bookkeeping (queued capture, viewer count)
+_queued_capture: Optional[Future] = None
+
+
+def _picamera2_class():
+    # picamera2 (numpy, libcamera bindings, ...) is slow to import, so only
+    # pull it in when the camera is actually used.
+    if SIMULATE:
+        from sim import FakePicamera2
+        return FakePicamera2
+    from picamera2 import Picamera2
+    return Picamera2
+
+
+def _encoder_classes():
+    """(encoder class, FileOutput class) for the preview stream."""
+    if SIMULATE:
+        from sim import FakeJpegEncoder, FakeFileOutput
+        return FakeJpegEncoder, FakeFileOutput
+    from picamera2.outputs import FileOutput
+    if PREVIEW_ENCODER == "jpeg":
+        from picamera2.encoders import JpegEncoder
+        return JpegEncoder, FileOutput
+    from picamera2.encoders import MJPEGEncoder
+    return MJPEGEncoder, FileOutput
+
+
+PREVIEW = FrameBuffer()
 
 
 def init_camera() -> Picamera2:
@@ -23,7 +82,8 @@ def init_camera() -> Picamera2:
     if _picam2 is not None:
         return _picam2
 
-    cam = Picamera2()
+    os.makedirs(PHOTO_DIR, exist_ok=True)
+    cam = _picamera2_class()()
     cam.configure(cam.create_still_configuration())
     cam.start()
 
@@ -36,6 +96,9 @@ def capture_photo() -> Dict[str, str]:
     """
     Captures a photo and returns metadata you can return from Flask.
 
+    The JPEG is encoded into memory and handed to PHOTOS; it reaches
+    `path` on disk shortly after (write-behind).
+
     Returns:
       {
         "filename": "...jpg",
@@ -44,12 +107,23 @@ def capture_photo() -> Dict[str, str]:
         "timestamp": "..."
       }
     """
-    cam = init_camera()
-
     filename = datetime.now().strftime("photo_%Y-%m-%d_%H-%M-%S.jpg")
     path = os.path.join(PHOTO_DIR, filename)
-
-    cam.capture_file(path)
+    buf = io.BytesIO()
+
+    with _cam_lock:
+        cam = init_camera()
+        if _previewing:
+            # Full-res still while previewing: pause the stream for the capture.
+            _stop_recording(cam)
+            try:
+                cam.capture_file(buf, format="jpeg")
+            finally:
+                _start_recording(cam)
+        else:
+            cam.capture_file(buf, format="jpeg")
+
+    PHOTOS.put(filename, buf.getvalue())
 
     return {
         "filename": filename,
@@ -59,14 +133,105 @@ def capture_photo() -> Dict[str, str]:
     }
 
 
+def submit_capture() -> Future:
+    """
+    Queue a still capture; the Future resolves to capture_photo()'s dict.
+    While a capture is still waiting in the queue, further requests share it
+    instead of queueing another shot.
+    """
+    global _queued_capture
+    with _queue_lock:
+        queued = _queued_capture
+        if queued is not None and not queued.running() and not queued.done():
+            return queued
+        _queued_capture = _camera_queue.submit(capture_photo)
+        return _queued_capture
+
+
+def _start_recording(cam) -> None:
+    encoder_cls, output_cls = _encoder_classes()
+    cam.stop()
+    cam.configure(cam.create_video_configuration(main={"size": PREVIEW_SIZE},
+                                                 controls={"FrameRate": PREVIEW_FPS}))
+    cam.start_recording(encoder_cls(), output_cls(PREVIEW))
+
+
+def _stop_recording(cam) -> None:
+    cam.stop_recording()
+    cam.configure(cam.create_still_configuration())
+    cam.start()
+
+
+def start_preview() -> None:
+    """Switch the camera into low-res video mode, encoding into PREVIEW."""
+    global _previewing
+    with _cam_lock:
+        if _previewing:
+            return
+        cam = init_camera()
+        PREVIEW.reopen()
+        _start_recording(cam)
+        _previewing = True
+        log.info("Preview started (%dx%d @ %s fps, %s)", *PREVIEW_SIZE, PREVIEW_FPS, PREVIEW_ENCODER)
+
+
+def stop_preview() -> None:
+    """Back to still mode."""
+    global _previewing
+    with _cam_lock:
+        if not _previewing:
+            return
+        _stop_recording(init_camera())
+        _previewing = False
+        PREVIEW.close()
+        log.info("Preview stopped")
+
+
+def preview_stream(frame_timeout: float = 10.0):
+    """
+    Generator of multipart chunks for the camera service's GET /stream
+    (response mimetype STREAM_MIME). The service lives outside this repo and
+    has to add that route itself (see README, "Camera service"); the backend's
+    /api/camera/stream relays it. Preview runs while at least one stream is
+    open; every stream reads the same encoded frames.
+    """
+    global _preview_viewers
+    with _queue_lock:
+        _preview_viewers += 1
+    if not _previewing:
+        _camera_queue.submit(start_preview).result()
+    try:
+        seq = PREVIEW.seq
+        while True:
+            got = PREVIEW.wait(seq, frame_timeout)
+            if got is None:
+                return
+            seq, part = got
+            yield part
+    finally:
+        with _queue_lock:
+            _preview_viewers -= 1
+            last = _preview_viewers == 0
+        if last:
+            _camera_queue.submit(_stop_preview_if_unwatched)
+
+
+def _stop_preview_if_unwatched() -> None:
+    # runs on the camera queue; someone may have opened a new stream meanwhile
+    if _preview_viewers == 0:
+        stop_preview()
+
+
 def close_camera() -> None:
     """
     Optional cleanup. Usually not needed unless you want graceful shutdown.
     """
-    global _picam2
+    global _picam2, _previewing
+    PHOTOS.flush()
     if _picam2 is not None:
         try:
             _picam2.close()
         finally:
             _picam2 = None
+            _previewing = False
             log.info("Picamera2 closed")
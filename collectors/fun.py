@@ -1,5 +1,4 @@
 import os
-import time
 import random
 import logging
 from datetime import datetime
@@ -8,21 +7,28 @@ from pathlib import Path
 
 import requests
 
+from transport import DatagramSender, tag_session
+from scheduler import Ticker
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
 URL = f"{BASE_URL}/api/fun"
 INTERVAL = 20
 MAX_BACKOFF = 60
+# Unix-socket shortcut to the backend, used when INGEST_SOCKET is set
+UDS = DatagramSender()
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 DATA_DIR = PROJECT_ROOT / "data" / "fun-data"
 
-logging.info("SCRIPT=%s", Path(__file__).resolve())
-logging.info("CWD=%s", Path.cwd())
-logging.info("DATA_DIR=%s (exists=%s)", DATA_DIR, DATA_DIR.exists())
-logging.info("QUOTES=%s (exists=%s)", DATA_DIR / "quotes.txt", (DATA_DIR / "quotes.txt").exists())
-logging.info("INSULTS=%s (exists=%s)", DATA_DIR / "insults.txt", (DATA_DIR / "insults.txt").exists())
+def log_paths() -> None:
+    """Log where we're looking for the data files (handy when run from systemd)."""
+    logging.info("SCRIPT=%s", Path(__file__).resolve())
+    logging.info("CWD=%s", Path.cwd())
+    logging.info("DATA_DIR=%s (exists=%s)", DATA_DIR, DATA_DIR.exists())
+    logging.info("QUOTES=%s (exists=%s)", DATA_DIR / "quotes.txt", (DATA_DIR / "quotes.txt").exists())
+    logging.info("INSULTS=%s (exists=%s)", DATA_DIR / "insults.txt", (DATA_DIR / "insults.txt").exists())
 
 def read_lines(filename: str) -> list[str]:
     path = DATA_DIR / filename
@@ -42,6 +48,8 @@ def read_lines(filename: str) -> list[str]:
 
 def post_payload(session: requests.Session, payload: dict) -> None:
     """POST payload using the given requests.Session. Raises on failure."""
+    if UDS.send_json("fun", payload):
+        return
     resp = session.post(URL, json=payload, timeout=5)
     resp.raise_for_status()
 
@@ -52,19 +60,23 @@ def coinflip() -> str:
 
 
 def main() -> None:
+    log_paths()
     quotes = read_lines("quotes.txt")
     insults = read_lines("insults.txt")
     coinflip_results = coinflip()
 
-    session = requests.Session()
+    session = tag_session(requests.Session())
     backoff = 1
+    ticker = Ticker(INTERVAL)
 
     try:
         while True:
+            ticker.wait()
             payload = {
                 "quote": random.choice(quotes),
                 "insult": random.choice(insults),
                 "coinflip": coinflip_results,
+                **ticker.stats(),
                 "timestamp": datetime.now(ZoneInfo("Europe/Berlin")).isoformat(),
             }
 
@@ -76,11 +88,9 @@ def main() -> None:
                 logging.error("Failed to send fun data: %s", e)
                 sleep_time = min(backoff, MAX_BACKOFF)
                 logging.info("Backing off for %s seconds", sleep_time)
-                time.sleep(sleep_time)
+                ticker.backoff(sleep_time)
                 backoff = min(backoff * 2, MAX_BACKOFF)
 
-            time.sleep(INTERVAL)
-
     except KeyboardInterrupt:
         logging.info("Fun collector stopping (user interrupt)")
     except Exception as e:
@@ -1,4 +1,7 @@
 import os
+import sys
+import json
+import math
 import time
 import logging
 from datetime import datetime
@@ -7,60 +10,221 @@ from zoneinfo import ZoneInfo
 import requests
 import psutil
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.frames import FRAME_MIME, MAX_GROUP_BLOCKS, encode_frame
+from transport import DatagramSender, tag_session
+from scheduler import ALIGN_TICKS, Ticker
+
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
 URL = f"{BASE_URL}/api/network"
+# "frame" = compact binary frames (default), "json" = the old verbose payloads
+INGEST_FORMAT = os.getenv("INGEST_FORMAT", "frame")
+BERLIN = ZoneInfo("Europe/Berlin")
+# Unix-socket shortcut to the backend, used when INGEST_SOCKET is set
+UDS = DatagramSender()
 INTERVAL = 1
 MAX_BACKOFF = 60
 
+# Counters are sampled this often; each INTERVAL they're summarised as mean + peak,
+# so a 200 ms burst shows up in the peak instead of being averaged away.
+SAMPLE_HZ = float(os.getenv("NETWORK_SAMPLE_HZ", "10"))
+IGNORE_IFACES = set(os.getenv("NETWORK_IGNORE_IFACES", "lo").split(","))
+PROC_NET_DEV = "/proc/net/dev"
+
+# /proc/net/dev columns we use: rx bytes/packets/errs/drop, tx bytes/packets/errs/drop
+_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+# per counter: (direction, metric, scale) -> bytes become kbit
+_METRICS = (("rx", "kbps", 8 / 1000), ("rx", "pps", 1), ("rx", "errs", 1), ("rx", "drop", 1),
+            ("tx", "kbps", 8 / 1000), ("tx", "pps", 1), ("tx", "errs", 1), ("tx", "drop", 1))
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
 
+class NetDevReader:
+    """
+    Per-interface counters straight from /proc/net/dev.
+    The file stays open; every read is one pread() from offset 0, which makes
+    the kernel regenerate the table. Falls back to psutil where there's no procfs.
+    """
+
+    def __init__(self, path: str = PROC_NET_DEV, ignore=IGNORE_IFACES):
+        self.ignore = ignore
+        try:
+            self.fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.fd = None
+            logging.warning("%s not available, falling back to psutil", path)
+
+    def read(self) -> dict:
+        """{iface: (rx_bytes, rx_packets, rx_errs, rx_drop, tx_bytes, tx_packets, tx_errs, tx_drop)}"""
+        if self.fd is None:
+            return {name: (c.bytes_recv, c.packets_recv, c.errin, c.dropin,
+                           c.bytes_sent, c.packets_sent, c.errout, c.dropout)
+                    for name, c in psutil.net_io_counters(pernic=True).items() if name not in self.ignore}
+        return parse_net_dev(os.pread(self.fd, 65536, 0), self.ignore)
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def parse_net_dev(raw: bytes, ignore=()) -> dict:
+    counters = {}
+    for line in raw.split(b"\n")[2:]:  # two header lines
+        name, sep, rest = line.partition(b":")
+        if not sep:
+            continue
+        name = name.strip().decode()
+        if name in ignore:
+            continue
+        f = rest.split()
+        # spelled out: ~2x faster than a generator over _COLUMNS
+        counters[name] = (int(f[0]), int(f[1]), int(f[2]), int(f[3]), int(f[8]), int(f[9]), int(f[10]), int(f[11]))
+    return counters
+
+
+class RateAggregator:
+    """
+    Turns counter samples into per-interface rates, and collects mean (total
+    delta / total time, so it's exact) and peak (highest single-sample rate)
+    until summary() is called. Also keeps the same for the sum of all interfaces.
+    """
+
+    def __init__(self):
+        self.last = {}
+        self.last_t = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.deltas = {}   # iface -> summed counter deltas
+        self.peaks = {}    # iface -> per-counter max rate
+        self.elapsed = {}  # iface -> seconds covered
+        self.total_peak = [0.0] * len(_COLUMNS)
+
+    def add(self, counters: dict, t: float) -> None:
+        if self.last_t is not None:
+            dt = t - self.last_t
+            if dt > 0:
+                total_rate = [0.0] * len(_COLUMNS)
+                for name, now in counters.items():
+                    before = self.last.get(name)
+                    if before is None:
+                        continue  # new interface: rates start with the next sample
+                    delta = [b - a for a, b in zip(before, now)]
+                    if min(delta) < 0:
+                        continue  # counter reset (interface re-created)
+                    acc = self.deltas.get(name)
+                    if acc is None:
+                        acc = self.deltas[name] = [0] * len(_COLUMNS)
+                        self.peaks[name] = [0.0] * len(_COLUMNS)
+                        self.elapsed[name] = 0.0
+                    peak = self.peaks[name]
+                    for i, d in enumerate(delta):
+                        acc[i] += d
+                        rate = d / dt
+                        if rate > peak[i]:
+                            peak[i] = rate
+                        total_rate[i] += rate
+                    self.elapsed[name] += dt
+                for i, rate in enumerate(total_rate):
+                    if rate > self.total_peak[i]:
+                        self.total_peak[i] = rate
+        self.last, self.last_t = counters, t
+
+    def summary(self, max_interfaces: int = MAX_GROUP_BLOCKS) -> tuple[dict, dict]:
+        """
+        (totals, {iface: {rx_kbps, rx_kbps_peak, ...}}), then start a new interval.
+        Only the max_interfaces busiest interfaces are listed (the backend takes
+        no more than that); the totals still count all of them.
+        """
+        interfaces = {}
+        total_mean = [0.0] * len(_COLUMNS)
+        for name, acc in self.deltas.items():
+            elapsed = self.elapsed[name]
+            row = {}
+            for i, (direction, metric, scale) in enumerate(_METRICS):
+                mean = acc[i] / elapsed * scale
+                total_mean[i] += mean
+                row[f"{direction}_{metric}"] = round(mean, 2)
+                row[f"{direction}_{metric}_peak"] = round(self.peaks[name][i] * scale, 2)
+            interfaces[name] = row
+        if len(interfaces) > max_interfaces:
+            # lots of docker veths / bridges: keep the ones with the most traffic
+            busiest = sorted(interfaces, key=lambda n: interfaces[n]["rx_kbps"] + interfaces[n]["tx_kbps"],
+                             reverse=True)[:max_interfaces]
+            interfaces = {name: interfaces[name] for name in busiest}
+        totals = {
+            "rx_kbps": round(total_mean[0], 1),
+            "tx_kbps": round(total_mean[4], 1),
+            "rx_kbps_peak": round(self.total_peak[0] * 8 / 1000, 1),
+            "tx_kbps_peak": round(self.total_peak[4] * 8 / 1000, 1),
+        }
+        self._reset()
+        return totals, interfaces
+
+
 def post_payload(session: requests.Session, payload: dict) -> None:
     """POST payload using the given requests.Session. Raises on failure."""
-    resp = session.post(URL, json=payload, timeout=5)
+    if INGEST_FORMAT == "frame":
+        body, content_type = encode_frame("network", payload, time.time()), FRAME_MIME
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    if UDS.send("network", body, content_type):
+        return
+    resp = session.post(URL, data=body, headers={"Content-Type": content_type}, timeout=5)
     resp.raise_for_status()
 
 
 def main() -> None:
-    session = requests.Session()
+    session = tag_session(requests.Session())
     backoff = 1
 
-    last = psutil.net_io_counters()
-    last_t = time.time()
+    # The ticker runs at the sample rate; the first tick at or after each multiple of
+    # INTERVAL also reports. Not "every n-th tick": overrun ticks are skipped and not
+    # counted, so counting ticks would push every later report back.
+    ticker = Ticker(1 / SAMPLE_HZ)
+    next_report = time.monotonic() + ((INTERVAL - time.time() % INTERVAL) if ALIGN_TICKS else INTERVAL)
+    reader = NetDevReader()
+    rates = RateAggregator()
+    rates.add(reader.read(), time.monotonic())
 
     try:
         while True:
-            time.sleep(INTERVAL)
-            now = psutil.net_io_counters()
-            now_t = time.time()
-
-            dt = max(now_t - last_t, 1e-6)
-            rx_kbps = (now.bytes_recv - last.bytes_recv) * 8 / dt / 1000
-            tx_kbps = (now.bytes_sent - last.bytes_sent) * 8 / dt / 1000
-
+            ticker.wait()
+            now = time.monotonic()
+            rates.add(reader.read(), now)
+            # half a sample of slack: this grid and the ticker's come from separate clock reads
+            if now < next_report - 0.5 / SAMPLE_HZ:
+                continue
+            next_report += (max(0, math.floor((now - next_report) / INTERVAL)) + 1) * INTERVAL
+
+            totals, interfaces = rates.summary()
             payload = {
-                "rx_kbps": round(rx_kbps, 1),
-                "tx_kbps": round(tx_kbps, 1),
-                "timestamp": datetime.now(ZoneInfo("Europe/Berlin")).isoformat(),
+                **totals,
+                "interfaces": interfaces,
+                **ticker.stats(),
             }
+            if INGEST_FORMAT == "json":
+                payload["timestamp"] = datetime.now(BERLIN).isoformat()
 
             try:
                 post_payload(session, payload)
-                logging.info("Sent network data: %s", payload)
+                logging.info("Sent network data: %s", totals)
                 backoff = 1
             except requests.RequestException as e:
                 logging.error("Failed to send network data: %s", e)
                 sleep_time = min(backoff, MAX_BACKOFF)
                 logging.info("Backing off for %s seconds", sleep_time)
-                time.sleep(sleep_time)
+                ticker.backoff(sleep_time)
                 backoff = min(backoff * 2, MAX_BACKOFF)
 
-            last, last_t = now, now_t
-
     except KeyboardInterrupt:
         logging.info("Network collector stopping (user interrupt)")
     except Exception as e:
         logging.exception("Uncaught exception in network collector: %s", e)
+    finally:
+        reader.close()
 
 
 if __name__ == "__main__":
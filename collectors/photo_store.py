@@ -0,0 +1,87 @@
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+# Stills go to RAM first: the latest `keep` JPEGs are served straight from
+# memory, and a write-behind thread copies each one to the SD card in the
+# background. Capture -> display never waits on the card, and a photo that is
+# viewed right after capture is never read back from it.
+
+class PhotoStore:
+    def __init__(self, directory: str, keep: int = 20):
+        self.directory = directory
+        self.keep = keep
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._writer = None
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.write_errors = 0
+
+    def put(self, filename: str, data: bytes) -> None:
+        with self._lock:
+            self._cache[filename] = data
+            self._cache.move_to_end(filename)
+            while len(self._cache) > self.keep:
+                self._cache.popitem(last=False)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="photo-writer", daemon=True)
+                self._writer.start()
+        # the queue holds its own reference, so eviction can't lose an unwritten photo
+        self._pending.put((filename, data))
+
+    def get(self, filename: str) -> Optional[bytes]:
+        """JPEG bytes from memory, falling back to PHOTO_DIR. None if unknown."""
+        if os.path.basename(filename) != filename or filename.startswith("."):
+            return None
+        with self._lock:
+            data = self._cache.get(filename)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        try:
+            with open(os.path.join(self.directory, filename), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_loop(self) -> None:
+        while True:
+            filename, data = self._pending.get()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, filename)
+                tmp = path + ".part"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)  # readers never see half a JPEG
+                self.written += 1
+            except OSError as e:
+                self.write_errors += 1
+                log.warning("Could not persist %s: %s", filename, e)
+            finally:
+                self._pending.task_done()
+
+    def flush(self) -> None:
+        """Block until every captured photo is on disk (e.g. before shutdown)."""
+        if self._writer is not None:
+            self._pending.join()
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "pending_writes": self._pending.qsize(),
+        }
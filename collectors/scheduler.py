@@ -0,0 +1,125 @@
+import bisect
+import math
+import os
+import time
+
+
+# Shared loop timing for the collectors.
+# Instead of "do work, then sleep(INTERVAL)" (period = INTERVAL + work time),
+# ticks are scheduled on monotonic deadlines aligned to wall-clock multiples
+# of the interval, so e.g. all 1 s / 5 s collectors sample on the same second.
+# A tick that's already missed gets skipped instead of firing late back-to-back.
+
+# AHRIPI_ALIGN_TICKS=0 starts ticking right away instead of waiting for the
+# next aligned boundary (used by the startup benchmark).
+ALIGN_TICKS = os.getenv("AHRIPI_ALIGN_TICKS", "1") != "0"
+
+# Bucket upper bounds in milliseconds (last bucket is everything above).
+BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update every tick."""
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (None if empty)."""
+        if not self.total:
+            return None
+        rank = math.ceil(q * self.total)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+
+class Ticker:
+    """
+    Drift-free loop timer.
+
+        ticker = Ticker(INTERVAL)
+        while True:
+            ticker.wait()
+            ... do work, send payload | ticker.stats() ...
+
+    wait() records how late each wake-up was (jitter) and how long the
+    previous tick's work took.
+    """
+
+    def __init__(self, interval: float, align: bool = ALIGN_TICKS):
+        self.interval = interval
+        self.align = align
+        now = time.monotonic()
+        # Map the next wall-clock multiple of interval onto the monotonic clock.
+        offset = (interval - time.time() % interval) if align else 0.0
+        self._deadline = now + offset
+        self._tick_start = None
+
+        self.jitter = Histogram()
+        self.work = Histogram()
+        self.ticks = 0
+        self.skipped = 0
+
+    def _end_tick(self, now: float) -> None:
+        if self._tick_start is not None:
+            self.work.observe((now - self._tick_start) * 1000)
+            self._tick_start = None
+
+    def sleep_time(self) -> float:
+        """Close the current tick and return seconds until the next deadline."""
+        now = time.monotonic()
+        self._end_tick(now)
+        # An unaligned ticker's first tick is due right away, it can't be late.
+        if now > self._deadline and (self.ticks or self.align):
+            # Overran one or more deadlines: skip them, don't bunch up.
+            missed = math.floor((now - self._deadline) / self.interval) + 1
+            self._deadline += missed * self.interval
+            self.skipped += missed
+        return max(0.0, self._deadline - now)
+
+    def started(self) -> None:
+        """Mark the start of a tick (call right after waking up)."""
+        now = time.monotonic()
+        self.jitter.observe(max(0.0, now - self._deadline) * 1000)
+        self._tick_start = now
+        self._deadline += self.interval
+        self.ticks += 1
+
+    def wait(self) -> None:
+        """Sleep until the next tick, then start it."""
+        time.sleep(self.sleep_time())
+        self.started()
+
+    def backoff(self, seconds: float) -> None:
+        """
+        Push the next tick out by at least `seconds` (e.g. after a failed POST),
+        landing back on the aligned grid. Deliberately skipped ticks don't count
+        as missed.
+        """
+        now = time.monotonic()
+        self._end_tick(now)
+        target = now + seconds
+        if target > self._deadline:
+            self._deadline += math.ceil((target - self._deadline) / self.interval) * self.interval
+
+    def stats(self) -> dict:
+        """Flat summary that gets sent along with the collector's payload."""
+        return {
+            "tick_jitter_p50_ms": self.jitter.quantile(0.5),
+            "tick_jitter_p95_ms": self.jitter.quantile(0.95),
+            "tick_work_p95_ms": self.work.quantile(0.95),
+            "tick_skipped": self.skipped,
+        }
@@ -0,0 +1,94 @@
+import argparse
+import logging
+import os
+import time
+
+from Freenove_DHT import DHT
+from scheduler import Ticker
+from sensor_ring import SHM_PATH, RingReader, RingWriter
+from sensors import BMP180, DHT_PIN, read_dht_with_retries
+
+# The one process that talks to the DHT11 (GPIO) and BMP180 (I2C). It samples
+# both on a fixed schedule and publishes every reading to the shared-memory
+# ring (sensor_ring.py); collectors/sensors.py and anything else that wants
+# readings get them from there.
+#
+#   python collectors/sensor_hub.py           # run the hub
+#   python collectors/sensor_hub.py --watch   # print what the hub publishes (no hardware access)
+
+INTERVAL = float(os.getenv("SENSOR_HUB_INTERVAL", "2"))  # the DHT11 wants >= 1 s between reads
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+
+def run(path: str = SHM_PATH) -> None:
+    dht = DHT(DHT_PIN)  # takes the pin lock, fails if another process has it
+    bmp = None
+    ring = RingWriter(path)
+    ticker = Ticker(INTERVAL)
+    dht_failures = bmp_failures = 0
+    logging.info("Sensor hub publishing to %s every %ss", path, INTERVAL)
+
+    try:
+        while True:
+            ticker.wait()
+            t0 = time.perf_counter()
+            bmp_temp = pressure = None
+            try:
+                if bmp is None:
+                    bmp = BMP180()  # calibration is read once, not every sample
+                bmp_temp = bmp.read_temperature()
+                pressure = bmp.read_pressure()
+            except OSError as e:
+                bmp_failures += 1
+                bmp = None  # re-init next time (sensor unplugged / bus hiccup)
+                logging.warning("BMP180 read failed: %s", e)
+            dht_temp, humidity = read_dht_with_retries(dht)
+            if dht_temp is None:
+                dht_failures += 1
+            ring.publish({
+                "time": time.time(),
+                "dht_temp": dht_temp,
+                "humidity": humidity,
+                "bmp_temp": bmp_temp,
+                "pressure": pressure,
+                "read_ms": (time.perf_counter() - t0) * 1000,
+                "dht_failures": dht_failures,
+                "bmp_failures": bmp_failures,
+            })
+    except KeyboardInterrupt:
+        logging.info("Sensor hub stopping (user interrupt)")
+    finally:
+        ring.close()
+
+
+def watch(path: str = SHM_PATH) -> None:
+    reader = RingReader(path)
+    last = None
+    while True:
+        reading = reader.latest()
+        if reading is None:
+            print(f"no sensor hub at {path}")
+        elif reading["seq"] != last:
+            last = reading["seq"]
+            print("#{seq} dht {dht_temp} C {humidity} %  bmp {bmp_temp} C {pressure} Pa  "
+                  "({read_ms:.0f} ms, failures dht {dht_failures} bmp {bmp_failures})".format(**reading))
+        time.sleep(0.5)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--watch", action="store_true", help="print readings from a running hub")
+    ap.add_argument("--shm", default=SHM_PATH)
+    args = ap.parse_args()
+    try:
+        if args.watch:
+            watch(args.shm)
+        else:
+            run(args.shm)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+
+# Latest DHT11/BMP180 readings in shared memory, written by sensor_hub.py (the
+# only process that touches the hardware) and read by anyone else: the
+# sensors collector, diagnostic scripts, ... Reading is an mmap'd memcpy plus a
+# checksum, a few microseconds, and never waits on GPIO/I2C.
+#
+# Layout: header (magic, version, slot count, seq of the newest slot) followed
+# by a ring of slots, so readers can also look at the last few readings.
+# Each slot starts with its seq and a CRC32 of its payload. The writer
+# invalidates a slot (seq 0) before rewriting it and bumps the header last, and
+# a reader retries until the seq and CRC it reads match, so it never returns a
+# half-written reading.
+
+SHM_PATH = os.getenv("SENSOR_HUB_SHM", os.path.join("/dev/shm" if os.path.isdir("/dev/shm")
+                                                    else tempfile.gettempdir(), "ahripi-sensors"))
+SLOTS = 64
+MAGIC = b"AHSR"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHQ")      # magic, version, slots, latest seq
+SLOT_HEAD = struct.Struct("<QI4x")    # seq, crc32(payload)
+# time, dht temp, humidity, bmp temp, pressure (Pa), read time (ms), dht failures, bmp failures
+PAYLOAD = struct.Struct("<6d2I")
+SLOT_SIZE = SLOT_HEAD.size + PAYLOAD.size
+FIELDS = ("time", "dht_temp", "humidity", "bmp_temp", "pressure", "read_ms", "dht_failures", "bmp_failures")
+MISSING = float("nan")
+# readings older than this make the reader check whether the hub was restarted (new file)
+RECHECK_AFTER_S = 5
+
+
+def _size(slots: int) -> int:
+    return HEADER.size + slots * SLOT_SIZE
+
+
+class RingWriter:
+    """Only sensor_hub.py creates one of these."""
+
+    def __init__(self, path: str = SHM_PATH, slots: int = SLOTS):
+        self.path = path
+        self.slots = slots
+        self.seq = 0
+        # build the file next to the old one and swap it in: readers of a previous
+        # hub run notice the new inode (see RingReader.latest)
+        tmp = f"{path}.{os.getpid()}"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, _size(slots))
+            self._map = mmap.mmap(fd, _size(slots))
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, slots, 0)
+        os.replace(tmp, path)
+
+    def publish(self, reading: dict) -> int:
+        payload = PAYLOAD.pack(*(MISSING if reading.get(f) is None else reading[f] for f in FIELDS[:6]),
+                               reading.get("dht_failures", 0), reading.get("bmp_failures", 0))
+        self.seq += 1
+        offset = HEADER.size + ((self.seq - 1) % self.slots) * SLOT_SIZE
+        SLOT_HEAD.pack_into(self._map, offset, 0, 0)  # invalidate while rewriting
+        self._map[offset + SLOT_HEAD.size:offset + SLOT_SIZE] = payload
+        SLOT_HEAD.pack_into(self._map, offset, self.seq, zlib.crc32(payload))
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.slots, self.seq)
+        return self.seq
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class RingReader:
+    """Read-only view of the hub's ring. Cheap to create, cheap to poll."""
+
+    def __init__(self, path: str = SHM_PATH):
+        self.path = path
+        self._map = None
+        self._inode = None
+        self.slots = 0
+
+    def _open(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            st = os.fstat(fd)
+            if st.st_size < HEADER.size:
+                return False
+            new_map = mmap.mmap(fd, st.st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        magic, version, slots, _ = HEADER.unpack_from(new_map, 0)
+        if magic != MAGIC or version != VERSION or st.st_size < _size(slots):
+            new_map.close()
+            return False
+        if self._map is not None:
+            self._map.close()
+        self._map, self._inode, self.slots = new_map, st.st_ino, slots
+        return True
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return False
+
+    def _slot(self, seq: int):
+        offset = HEADER.size + ((seq - 1) % self.slots) * SLOT_SIZE
+        for _ in range(3):
+            slot_seq, crc = SLOT_HEAD.unpack_from(self._map, offset)
+            payload = self._map[offset + SLOT_HEAD.size:offset + SLOT_SIZE]
+            if slot_seq != seq:
+                return None  # overwritten by a newer reading already
+            if zlib.crc32(payload) == crc:
+                reading = dict(zip(FIELDS, PAYLOAD.unpack(payload)))
+                reading["seq"] = seq
+                for name in ("dht_temp", "humidity", "bmp_temp", "pressure"):
+                    if reading[name] != reading[name]:  # NaN -> None
+                        reading[name] = None
+                return reading
+        return None
+
+    def latest(self, max_age: float | None = None):
+        """Newest reading as a dict (None if there's no hub, or it's older than max_age seconds)."""
+        if self._map is None and not self._open():
+            return None
+        for _ in range(3):
+            seq = HEADER.unpack_from(self._map, 0)[3]
+            reading = self._slot(seq) if seq else None
+            if reading is not None:
+                break
+        age = time.time() - reading["time"] if reading is not None else None
+        if age is None or age > RECHECK_AFTER_S:
+            # a restarted hub writes to a new file; only worth a stat() when the data looks dead
+            if self._replaced() and self._open():
+                return self.latest(max_age)
+        if age is None or (max_age is not None and age > max_age):
+            return None
+        return reading
+
+    def history(self, n: int = SLOTS) -> list:
+        """Up to n most recent readings, oldest first."""
+        if self._map is None and not self._open():
+            return []
+        newest = HEADER.unpack_from(self._map, 0)[3]
+        readings = []
+        for seq in range(newest, max(0, newest - min(n, self.slots)), -1):
+            reading = self._slot(seq)
+            if reading is not None:
+                readings.append(reading)
+        return readings[::-1]
@@ -5,7 +5,15 @@ from datetime import datetime
 import logging
 from zoneinfo import ZoneInfo
 from Freenove_DHT import DHT
-import smbus
+from transport import DatagramSender, tag_session
+from scheduler import Ticker
+from sensor_ring import RingReader
+from sim import SIMULATE
+
+if SIMULATE:
+    from sim import smbus
+else:
+    import smbus
 
 # BMP180 defau  
 
@@ -13,8 +21,9 @@ BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
 URL = f"{BASE_URL}/api/sensors"
 INTERVAL = 5
 MAX_BACKOFF = 60
+# Unix-socket shortcut to the backend, used when INGEST_SOCKET is set
+UDS = DatagramSender()
 DHT_PIN = 17 
-dht = DHT(DHT_PIN)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
 # BMP180 default address.
@@ -73,6 +82,8 @@ def read_dht_with_retries(dht, tries=3, delay=0.5):
 
 def post_payload(session, payload):
     """POST payload using the given requests.Session. Raises on failure."""
+    if UDS.send_json("sensors", payload):
+        return None
     resp = session.post(URL, json=payload, timeout=5)
     resp.raise_for_status()
     return resp
@@ -177,25 +188,43 @@ class BMP180(object):
         p0 = pressure / pow(1.0 - altitude_m / 44330.0, 5.255)
         return p0
 
+def read_direct(dht):
+    bmp = BMP180()
+    pressure = bmp.read_pressure()
+    temp, humidity = read_dht_with_retries(dht)
+    return temp, humidity, bmp.read_temperature(), pressure
+
+def read_hub(hub):
+    # Latest reading from sensor_hub.py, if it's recent enough to be this tick's
+    reading = hub.latest(max_age=2 * INTERVAL)
+    if reading is None:
+        return None, None, None, None
+    return reading["dht_temp"], reading["humidity"], reading["bmp_temp"], reading["pressure"]
+
 def main():
-    dht = DHT(DHT_PIN)
-    session = requests.Session()
+    # If sensor_hub.py is running it owns the hardware; read from it instead.
+    hub = RingReader()
+    if hub.latest() is not None:
+        logging.info("Reading sensors from the sensor hub (%s)", hub.path)
+        dht = None
+    else:
+        dht = DHT(DHT_PIN)
+    session = tag_session(requests.Session())
     backoff = 1
+    ticker = Ticker(INTERVAL)
 
     try:
         while True:
-            bmp = BMP180()
-            temp = bmp.read_temperature()
-            pressure = bmp.read_pressure()
-            temp, humidity = read_dht_with_retries(dht)
-            if temp is None or humidity is None:
-                logging.warning("Skipping send: DHT read failed")
-                time.sleep(INTERVAL)
+            ticker.wait()
+            temp, humidity, bmp_temp, pressure = read_hub(hub) if dht is None else read_direct(dht)
+            if temp is None or humidity is None or bmp_temp is None:
+                logging.warning("Skipping send: sensor read failed")
                 continue
             payload = {
-                "temp": (temp + bmp.read_temperature()) / 2,  # Average DHT and BMP temps
+                "temp": (temp + bmp_temp) / 2,  # Average DHT and BMP temps
                 "pressure": pressure,
                 "humidity": humidity,
+                **ticker.stats(),
                 "timestamp": datetime.now(ZoneInfo("Europe/Berlin")).isoformat()
             }
 
@@ -207,9 +236,8 @@ def main():
                 logging.error("Failed to send sensor data: %s", e)
                 sleep_time = min(backoff, MAX_BACKOFF)
                 logging.info("Backing off for %s seconds", sleep_time)
-                time.sleep(sleep_time)
+                ticker.backoff(sleep_time)
                 backoff = min(backoff * 2, MAX_BACKOFF)
-            time.sleep(INTERVAL)
 
     except KeyboardInterrupt:
         logging.info("Sensors collector stopping (user interrupt)")
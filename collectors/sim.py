@@ -0,0 +1,313 @@
+import io
+import math
+import os
+import random
+import threading
+import time
+import types
+import zlib
+
+
+# Hardware-free stand-ins for everything the collectors normally need a Pi for:
+# the DHT11 shared library, the BMP180 on I2C, Picamera2 and vcgencmd.
+# Turned on with AHRIPI_SIMULATE=1. Signals are deterministic for a given
+# AHRIPI_SIM_SEED (they follow the read count, not the wall clock), and each
+# call sleeps roughly as long as the real hardware would
+# (scale with AHRIPI_SIM_LATENCY, 0 = no sleeping).
+
+SIMULATE = os.getenv("AHRIPI_SIMULATE", "") not in ("", "0")
+SEED = int(os.getenv("AHRIPI_SIM_SEED", "1234"))
+LATENCY = float(os.getenv("AHRIPI_SIM_LATENCY", "1.0"))
+DHT_FAIL_RATE = float(os.getenv("AHRIPI_SIM_DHT_FAIL_RATE", "0.1"))
+
+
+def _sleep(seconds: float) -> None:
+    if LATENCY > 0:
+        time.sleep(seconds * LATENCY)
+
+
+class Trace:
+    """Slow sine wave + gaussian noise, advanced one step per read."""
+
+    def __init__(self, base, amplitude, period, noise, seed):
+        self.base, self.amplitude, self.period, self.noise = base, amplitude, period, noise
+        self.rng = random.Random(seed)
+        self.n = 0
+
+    def next(self) -> float:
+        v = self.base + self.amplitude * math.sin(2 * math.pi * self.n / self.period)
+        self.n += 1
+        return v + self.rng.gauss(0, self.noise)
+
+
+# ---------------- DHT11 ----------------
+
+class FakeDHTLib:
+    """Drop-in for the ctypes handle in Freenove_DHT.py (same function names)."""
+
+    DHTLIB_OK = 0
+    DHTLIB_ERROR_CHECKSUM = -1
+
+    def __init__(self, seed=SEED, fail_rate=DHT_FAIL_RATE):
+        self.pin = None
+        self.rng = random.Random(seed)
+        self.fail_rate = fail_rate
+        self.temp_trace = Trace(21.0, 2.5, 720, 0.3, seed + 1)
+        self.hum_trace = Trace(45.0, 8.0, 1440, 1.0, seed + 2)
+        self.humidity = 0.0
+        self.temperature = 0.0
+
+    def setDHT11Pin(self, pin):
+        self.pin = pin
+
+    def readSensor(self, pin, wakeupDelay):
+        _sleep(0.02 + wakeupDelay / 1000)
+        return self.DHTLIB_OK
+
+    def readDHT11(self):
+        # Start signal (18 ms) + 40 bits on the wire.
+        _sleep(0.023)
+        if self.rng.random() < self.fail_rate:
+            return self.DHTLIB_ERROR_CHECKSUM
+        # The DHT11 only reports whole degrees / percent.
+        self.temperature = float(round(self.temp_trace.next()))
+        self.humidity = float(round(min(95.0, max(20.0, self.hum_trace.next()))))
+        return self.DHTLIB_OK
+
+    def getHumidity(self):
+        return self.humidity
+
+    def getTemperature(self):
+        return self.temperature
+
+
+# ---------------- BMP180 over SMBus ----------------
+
+# Calibration values from the BMP180 datasheet's worked example.
+BMP180_CALIBRATION = {
+    0xAA: 408, 0xAC: -72, 0xAE: -14383, 0xB0: 32741, 0xB2: 32757, 0xB4: 23153,
+    0xB6: 6190, 0xB8: 4, 0xBA: -32768, 0xBC: -8711, 0xBE: 2868,
+}
+
+
+def _bmp180_temp(ut, cal):
+    x1 = ((ut - cal[0xB4]) * cal[0xB2]) >> 15
+    x2 = (cal[0xBC] << 11) // (x1 + cal[0xBE])
+    b5 = x1 + x2
+    return b5, ((b5 + 8) >> 4) / 10.0
+
+
+def _bmp180_pressure(up, b5, oss, cal):
+    ac1, ac2, ac3, ac4 = cal[0xAA], cal[0xAC], cal[0xAE], cal[0xB0]
+    b1, b2 = cal[0xB6], cal[0xB8]
+    b6 = b5 - 4000
+    x1 = (b2 * (b6 * b6) >> 12) >> 11
+    x2 = (ac2 * b6) >> 11
+    x3 = x1 + x2
+    b3 = (((ac1 * 4 + x3) << oss) + 2) // 4
+    x1 = (ac3 * b6) >> 13
+    x2 = (b1 * ((b6 * b6) >> 12)) >> 16
+    x3 = ((x1 + x2) + 2) >> 2
+    b4 = (ac4 * (x3 + 32768)) >> 15
+    b7 = (up - b3) * (50000 >> oss)
+    p = (b7 * 2) // b4 if b7 < 0x80000000 else (b7 // b4) * 2
+    x1 = (p >> 8) * (p >> 8)
+    x1 = (x1 * 3038) >> 16
+    x2 = (-7357 * p) >> 16
+    return p + ((x1 + x2 + 3791) >> 4)
+
+
+def _search(lo, hi, fn, target):
+    # Smallest raw value whose compensated reading reaches target (fn is monotonic).
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fn(mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class FakeSMBus:
+    """
+    Emulates a BMP180 at 0x77 on the register level: calibration EEPROM,
+    control register writes and the raw temperature/pressure result registers.
+    Raw values are derived from a target reading by inverting the datasheet
+    compensation, so sensors.py's own math gives back realistic numbers.
+    """
+
+    ADDRESS = 0x77
+
+    def __init__(self, bus=1, seed=SEED):
+        self.bus = bus
+        self.regs = {}
+        for reg, value in BMP180_CALIBRATION.items():
+            value &= 0xFFFF
+            self.regs[reg] = value >> 8
+            self.regs[reg + 1] = value & 0xFF
+        self.temp_trace = Trace(21.5, 2.0, 720, 0.05, seed + 3)
+        self.pressure_trace = Trace(101325.0, 400.0, 4320, 8.0, seed + 4)
+        self._ut = None
+
+    def _check(self, addr):
+        if addr != self.ADDRESS:
+            raise OSError(121, "Remote I/O error")  # what a missing I2C device looks like
+
+    def read_byte_data(self, addr, reg):
+        self._check(addr)
+        _sleep(0.0002)
+        return self.regs.get(reg, 0)
+
+    def write_byte_data(self, addr, reg, value):
+        self._check(addr)
+        _sleep(0.0002)
+        if reg != 0xF4:
+            self.regs[reg] = value & 0xFF
+            return
+        if value == 0x2E:
+            target = self.temp_trace.next()
+            # below AC6 the compensation formula heads for a division by zero
+            ut = _search(BMP180_CALIBRATION[0xB4], 0xFFFF,
+                         lambda raw: _bmp180_temp(raw, BMP180_CALIBRATION)[1], target)
+            self._ut = ut
+            self.regs[0xF6], self.regs[0xF7] = ut >> 8, ut & 0xFF
+        elif value & 0x3F == 0x34:
+            oss = value >> 6
+            if self._ut is None:
+                self._ut = 27898
+            b5, _ = _bmp180_temp(self._ut, BMP180_CALIBRATION)
+            target = self.pressure_trace.next()
+            up = _search(0, (1 << (16 + oss)) - 1,
+                         lambda raw: _bmp180_pressure(raw, b5, oss, BMP180_CALIBRATION), target)
+            raw = up << (8 - oss)
+            self.regs[0xF6], self.regs[0xF7], self.regs[0xF8] = (raw >> 16) & 0xFF, (raw >> 8) & 0xFF, raw & 0xFF
+
+
+# Lets sensors.py do `from sim import smbus` and keep calling smbus.SMBus(1).
+smbus = types.SimpleNamespace(SMBus=FakeSMBus)
+
+
+# ---------------- Picamera2 ----------------
+
+def fake_jpeg(width=640, height=480, label="") -> bytes:
+    """A real JPEG if Pillow is around, otherwise a minimal SOI/EOI stub."""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return b"\xff\xd8\xff\xe0" + label.encode()[:64] + b"\xff\xd9"
+    shade = (zlib.crc32(label.encode()) & 0x7F) + 64
+    img = Image.new("RGB", (width, height), (shade, 40, 255 - shade))
+    ImageDraw.Draw(img).text((10, 10), label or "simulated", fill=(255, 255, 255))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+class FakePicamera2:
+    """Just enough of the Picamera2 API for collectors/cam.py."""
+
+    STILL_LATENCY = 0.35
+
+    def __init__(self, camera_num=0):
+        self.config = None
+        self.started = False
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._recording = None
+
+    def create_still_configuration(self, main=None, **kwargs):
+        return {"use_case": "still", "main": main or {"size": (2304, 1296)}}
+
+    def create_preview_configuration(self, main=None, **kwargs):
+        return {"use_case": "preview", "main": main or {"size": (640, 480)}}
+
+    def create_video_configuration(self, main=None, controls=None, **kwargs):
+        return {"use_case": "video", "main": main or {"size": (640, 480)}, "controls": controls or {}}
+
+    def configure(self, config):
+        self.config = config
+
+    def start(self):
+        _sleep(0.5)  # sensor warm-up
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.started = False
+
+    def start_recording(self, encoder, output, config=None, **kwargs):
+        if config is not None:
+            self.configure(config)
+        self.start()
+        self._recording = threading.Event()
+        self._recording.set()
+        threading.Thread(target=self._record, args=(encoder, output, self._recording),
+                         name="fake-encoder", daemon=True).start()
+
+    def stop_recording(self):
+        if self._recording is not None:
+            self._recording.clear()
+            self._recording = None
+        self.stop()
+
+    def _record(self, encoder, output, recording):
+        config = self.config or self.create_video_configuration()
+        width, height = config["main"]["size"]
+        fps = (config.get("controls") or {}).get("FrameRate", 30)
+        next_frame = time.monotonic()
+        while recording.is_set():
+            next_frame += 1 / fps
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+            encoder.frames += 1
+            output.outputframe(fake_jpeg(width, height, label=f"preview {encoder.frames}"))
+
+    def capture_file(self, file_output, name="main", format=None):
+        if not self.started:
+            raise RuntimeError("Camera must be started before capture")
+        with self._lock:
+            _sleep(self.STILL_LATENCY)
+            self.frames += 1
+            data = fake_jpeg(label=f"frame {self.frames}")
+        if isinstance(file_output, (str, os.PathLike)):
+            with open(file_output, "wb") as f:
+                f.write(data)
+        else:
+            file_output.write(data)
+
+
+class FakeJpegEncoder:
+    """Stands in for picamera2.encoders.MJPEGEncoder / JpegEncoder (FakePicamera2 does the encoding)."""
+
+    def __init__(self, *args, **kwargs):
+        self.frames = 0
+
+
+class FakeFileOutput:
+    """Stands in for picamera2.outputs.FileOutput."""
+
+    def __init__(self, file=None):
+        self.file = file
+
+    def outputframe(self, frame, keyframe=True, timestamp=None):
+        self.file.write(frame)
+        self.file.flush()
+
+
+# ---------------- vcgencmd ----------------
+
+_core_temp = Trace(52.0, 6.0, 600, 0.4, SEED + 5)
+_arm_rng = random.Random(SEED + 6)
+
+
+def vcgencmd(cmd: str) -> str:
+    """Output in the same format as the real tool for the commands system.py uses."""
+    _sleep(0.008)  # it's a fork+exec of a small binary on the Pi
+    args = cmd.split()[1:]
+    if args[:1] == ["measure_temp"]:
+        return f"temp={_core_temp.next():.1f}'C"
+    if args[:2] == ["measure_clock", "arm"]:
+        hz = _arm_rng.choice((600_000_000, 1_500_000_000, 1_800_000_000, 1_800_000_000))
+        return f"frequency(48)={hz}"
+    return "N/A"
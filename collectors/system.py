@@ -1,4 +1,6 @@
 import os
+import sys
+import json
 import time
 import logging
 import subprocess
@@ -8,14 +10,27 @@ from zoneinfo import ZoneInfo
 import requests
 import psutil
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.frames import FRAME_MIME, encode_frame
+from transport import DatagramSender, tag_session
+from scheduler import Ticker
+import sim
+
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
 URL = f"{BASE_URL}/api/system"
+# "frame" = compact binary frames (default), "json" = the old verbose payloads
+INGEST_FORMAT = os.getenv("INGEST_FORMAT", "frame")
+BERLIN = ZoneInfo("Europe/Berlin")
+# Unix-socket shortcut to the backend, used when INGEST_SOCKET is set
+UDS = DatagramSender()
 INTERVAL = 1
 MAX_BACKOFF = 60
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
 
 def run_cmd(cmd: str) -> str:
+    if sim.SIMULATE and cmd.startswith("vcgencmd"):
+        return sim.vcgencmd(cmd)
     try:
         return subprocess.check_output(cmd, shell=True, text=True).strip()
     except Exception:
@@ -24,19 +39,28 @@ def run_cmd(cmd: str) -> str:
 
 def post_payload(session: requests.Session, payload: dict) -> None:
     """POST payload using the given session. Raises on failure."""
-    resp = session.post(URL, json=payload, timeout=5)
+    if INGEST_FORMAT == "frame":
+        body, content_type = encode_frame("system", payload, time.time()), FRAME_MIME
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    if UDS.send("system", body, content_type):
+        return
+    resp = session.post(URL, data=body, headers={"Content-Type": content_type}, timeout=5)
     resp.raise_for_status()
 
 
 def main() -> None:
-    session = requests.Session()
+    session = tag_session(requests.Session())
     backoff = 1
+    ticker = Ticker(INTERVAL)
 
-    while True:
-        now_berlin = datetime.now(ZoneInfo("Europe/Berlin"))
-        loc_time = now_berlin.strftime("%H:%M:%S")
+    # Prime the CPU counter: from here on cpu_percent(None) measures the time
+    # since the previous tick, so it doesn't have to block for a second.
+    psutil.cpu_percent(interval=None)
 
-        cpu = psutil.cpu_percent(interval=1)
+    while True:
+        ticker.wait()
+        cpu = psutil.cpu_percent(interval=None)
         ram = psutil.virtual_memory().percent
 
         freq_raw = run_cmd("vcgencmd measure_clock arm")
@@ -59,9 +83,13 @@ def main() -> None:
             "ram": ram,
             "ram_speed": freq_mhz,
             "core_temp": temp,
-            "time": loc_time,
-            "timestamp": now_berlin.isoformat(),
+            **ticker.stats(),
         }
+        if INGEST_FORMAT == "json":
+            # Binary frames carry an epoch instead, no need to build strings every second.
+            now_berlin = datetime.now(BERLIN)
+            payload["time"] = now_berlin.strftime("%H:%M:%S")
+            payload["timestamp"] = now_berlin.isoformat()
 
         try:
             post_payload(session, payload)
@@ -71,11 +99,9 @@ def main() -> None:
             logging.error("Failed to send system data: %s", e)
             sleep_time = min(backoff, MAX_BACKOFF)
             logging.info("Backing off for %s seconds", sleep_time)
-            time.sleep(sleep_time)
+            ticker.backoff(sleep_time)
             backoff = min(backoff * 2, MAX_BACKOFF)
 
-        time.sleep(INTERVAL)
-
 
 if __name__ == "__main__":
     try:
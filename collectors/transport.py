@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for shared/
+from shared.frames import FRAME_MIME  # noqa: E402
+
+
+# Unix-socket transport for collectors running on the same Pi as the backend.
+# One datagram per sample, no HTTP framing. Layout (keep in sync with
+# backend/ingest_socket.py): kind byte (0 = JSON, 1 = binary frame),
+# section name length byte, section name, body.
+
+INGEST_SOCKET = os.getenv("INGEST_SOCKET", "")
+
+# Federation: with NODE_ID set, HTTP samples carry it as X-Node-Id, so an
+# aggregator backend (API_BASE_URL) files them under this node. The aggregator
+# only accepts that with its FEDERATION_TOKEN.
+NODE_ID = os.getenv("NODE_ID", "")
+FEDERATION_TOKEN = os.getenv("FEDERATION_TOKEN", "")
+
+KIND_JSON = 0
+KIND_FRAME = 1
+
+_HEADER = struct.Struct("<BB")
+
+
+def pack_datagram(section: str, body: bytes, content_type: str) -> bytes:
+    kind = KIND_FRAME if content_type == FRAME_MIME else KIND_JSON
+    name = section.encode("ascii")
+    return _HEADER.pack(kind, len(name)) + name + body
+
+
+class DatagramSender:
+    """
+    Sends samples to the backend's ingest socket.
+    send() returns False (instead of raising) when the socket isn't usable,
+    so callers can just fall back to HTTP.
+    """
+
+    def __init__(self, path: str = INGEST_SOCKET):
+        self.path = path
+        self._sock = None
+
+    def send(self, section: str, body: bytes, content_type: str = "application/json") -> bool:
+        if not self.path:
+            return False
+        try:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                # Never block the collector loop on a full backend buffer.
+                sock.setblocking(False)
+                sock.connect(self.path)
+                self._sock = sock
+            self._sock.send(pack_datagram(section, body, content_type))
+            return True
+        except OSError as e:
+            logging.debug("Ingest socket %s unavailable (%s), using HTTP", self.path, e)
+            self.close()
+            return False
+
+    def send_json(self, section: str, payload: dict) -> bool:
+        return self.send(section, json.dumps(payload).encode())
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def tag_session(session):
+    """Add the X-Node-Id header (+ FEDERATION_TOKEN) to a requests.Session if NODE_ID is set."""
+    if NODE_ID:
+        session.headers["X-Node-Id"] = NODE_ID
+        if FEDERATION_TOKEN:
+            session.headers["Authorization"] = f"Bearer {FEDERATION_TOKEN}"
+    return session
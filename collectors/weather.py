@@ -5,7 +5,9 @@ import os
 from zoneinfo import ZoneInfo
 
 import requests
-import python_weather
+
+from transport import DatagramSender, tag_session
+from scheduler import Ticker
 
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
 URL = f"{BASE_URL}/api/weather"
@@ -14,6 +16,8 @@ CITY = "Schwerin"
 POST_INTERVAL = 10           
 FETCH_INTERVAL = 3600         
 MAX_BACKOFF = 60
+# Unix-socket shortcut to the backend, used when INGEST_SOCKET is set
+UDS = DatagramSender()
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
@@ -23,6 +27,9 @@ async def fetch_weather(city: str) -> dict | None:
     Returns a dict on success, or None on failure.
     """
     try:
+        # Imported here: pulls in aiohttp & friends, and we only need it once an hour.
+        import python_weather
+
         async with python_weather.Client(unit=python_weather.METRIC) as client:
             weather = await client.get(city)
 
@@ -66,6 +73,8 @@ async def fetch_weather(city: str) -> dict | None:
 
 def post_payload(session: requests.Session, payload: dict) -> None:
     """POST payload using the given requests.Session. Raises on failure."""
+    if UDS.send_json("weather", payload):
+        return
     resp = session.post(URL, json=payload, timeout=5)
     resp.raise_for_status()
 
@@ -97,13 +106,16 @@ def build_payload(city: str, weather_data: dict) -> dict:
 
 
 async def main() -> None:
-    session = requests.Session()
+    session = tag_session(requests.Session())
 
     cached_weather: dict | None = None
     last_fetch_ts: float = 0.0
     post_backoff = 1
+    ticker = Ticker(POST_INTERVAL)
 
     while True:
+        await asyncio.sleep(ticker.sleep_time())
+        ticker.started()
         now_mono = asyncio.get_running_loop().time()
 
 
@@ -122,22 +134,21 @@ async def main() -> None:
 
         if cached_weather is None:
             logging.info("No cached weather yet; waiting %s seconds...", POST_INTERVAL)
-            await asyncio.sleep(POST_INTERVAL)
             continue
 
         payload = build_payload(CITY, cached_weather)
+        payload.update(ticker.stats())
 
         try:
             post_payload(session, payload)
             logging.info("Posted cached weather (fresh timestamp).")
             post_backoff = 1
-            await asyncio.sleep(POST_INTERVAL)
 
         except requests.RequestException as e:
             logging.error("Failed to POST weather data: %s", e)
             sleep_time = min(post_backoff, MAX_BACKOFF)
             logging.info("POST backoff for %s seconds", sleep_time)
-            await asyncio.sleep(sleep_time)
+            ticker.backoff(sleep_time)
             post_backoff = min(post_backoff * 2, MAX_BACKOFF)
 
 
@@ -0,0 +1,3 @@
+# Code used by both backend/ and collectors/ (wire formats, ...), so there's
+# exactly one copy. Both sides are run as plain scripts, so a module that
+# imports from here first puts the repo root on sys.path.
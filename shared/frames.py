@@ -0,0 +1,114 @@
+import math
+import struct
+
+
+# ---------------- BINARY INGEST FRAMES ----------------
+# Compact alternative to JSON for the 1 Hz collectors.
+# A frame is: version byte, epoch seconds (float64), then one float64 per field
+# in the order listed below, then (v3, some sections only) repeated named
+# blocks, see FRAME_GROUPS. NaN means "no value" (None).
+# Collectors encode, the backend decodes; both import this module.
+
+FRAME_MIME = "application/x-ahripi-frame"
+FRAME_VERSION = 3
+
+# Scheduler stats ride along at the end of every frame (v2).
+TICK_FIELDS = ("tick_jitter_p50_ms", "tick_jitter_p95_ms", "tick_work_p95_ms", "tick_skipped")
+
+FRAME_FIELDS = {
+    "system": ("cpu", "ram", "ram_speed", "core_temp") + TICK_FIELDS,
+    "network": ("rx_kbps", "tx_kbps", "rx_kbps_peak", "tx_kbps_peak") + TICK_FIELDS,
+    "sensors": ("temp", "humidity", "pressure") + TICK_FIELDS,
+}
+
+# Per-interface network rates (v3): mean + peak over the reporting interval.
+NETWORK_IFACE_FIELDS = tuple(
+    f"{direction}_{metric}{suffix}"
+    for direction in ("rx", "tx")
+    for metric in ("kbps", "pps", "errs", "drop")
+    for suffix in ("", "_peak")
+)
+
+# Optional repeated blocks after the fixed fields: section -> (payload key, fields).
+# Each block is: name length byte, name (utf-8), one float64 per field.
+FRAME_GROUPS = {
+    "network": ("interfaces", NETWORK_IFACE_FIELDS),
+}
+
+# Compiled once: section -> (struct, field names)
+_STRUCTS = {
+    section: (struct.Struct("<Bd" + "d" * len(fields)), fields)
+    for section, fields in FRAME_FIELDS.items()
+}
+_GROUP_STRUCTS = {
+    section: (key, struct.Struct("<" + "d" * len(fields)), fields)
+    for section, (key, fields) in FRAME_GROUPS.items()
+}
+# Most blocks per frame. Also the most interfaces a network sample may carry
+# (backend/records.py), and collectors/network.py sends only the busiest ones.
+MAX_GROUP_BLOCKS = 32
+
+
+class FrameError(ValueError):
+    pass
+
+
+def decode_frame(section: str, body: bytes) -> tuple[float, dict]:
+    """Turn a binary frame into (epoch, the same dict a JSON POST would produce)."""
+    entry = _STRUCTS.get(section)
+    if entry is None:
+        raise FrameError(f"no binary frame format for section {section!r}")
+    st, fields = entry
+    group = _GROUP_STRUCTS.get(section)
+    if len(body) != st.size and (group is None or len(body) < st.size):
+        raise FrameError(f"bad frame size for {section}: {len(body)} != {st.size}")
+
+    version, epoch, *values = st.unpack_from(body)
+    if version != FRAME_VERSION:
+        raise FrameError(f"unsupported frame version {version}")
+
+    data = {name: (None if math.isnan(v) else v) for name, v in zip(fields, values)}
+    if group is not None:
+        data[group[0]] = _decode_blocks(section, body, st.size, group)
+    return epoch, data
+
+
+def _decode_blocks(section: str, body: bytes, offset: int, group) -> dict:
+    _, block, fields = group
+    blocks = {}
+    while offset < len(body):
+        if len(blocks) >= MAX_GROUP_BLOCKS:
+            raise FrameError(f"too many blocks in {section} frame")
+        n = body[offset]
+        end = offset + 1 + n + block.size
+        if end > len(body):
+            raise FrameError(f"truncated block in {section} frame")
+        try:
+            name = body[offset + 1:offset + 1 + n].decode()
+        except UnicodeDecodeError:
+            raise FrameError(f"bad block name in {section} frame") from None
+        values = block.unpack_from(body, offset + 1 + n)
+        blocks[name] = {f: (None if math.isnan(v) else v) for f, v in zip(fields, values)}
+        offset = end
+    return blocks
+
+
+def _block_name(name: str) -> bytes:
+    # At most 255 bytes (length byte), cut on a character boundary so the
+    # decoder never sees half a UTF-8 sequence.
+    return name.encode()[:255].decode("utf-8", "ignore").encode()
+
+
+def encode_frame(section: str, payload: dict, epoch: float) -> bytes:
+    """Pack the numeric fields of payload (+ its FRAME_GROUPS blocks) into a frame."""
+    st, fields = _STRUCTS[section]
+    values = [payload.get(name) for name in fields]
+    body = st.pack(FRAME_VERSION, epoch, *(math.nan if v is None else float(v) for v in values))
+    group = _GROUP_STRUCTS.get(section)
+    if group is not None:
+        key, block, block_fields = group
+        for name, row in (payload.get(key) or {}).items():
+            raw = _block_name(name)
+            body += bytes((len(raw),)) + raw + block.pack(
+                *(math.nan if row.get(f) is None else float(row.get(f)) for f in block_fields))
+    return body
@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+# ---------------- MJPEG ----------------
+# multipart/x-mixed-replace pieces shared by the camera service (collectors/cam.py,
+# where the encoder writes into a FrameBuffer) and the backend's preview relay
+# (backend/stream.py, which re-serves the newest frame to every viewer).
+
+BOUNDARY = "frame"
+STREAM_MIME = f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    return (b"--" + BOUNDARY.encode() + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+            + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+
+
+class FrameBuffer:
+    """
+    Latest-frame-only buffer. write() has the file-like signature Picamera2's
+    FileOutput expects, so an encoder can write into it directly. Readers wait
+    for a newer frame than their last one, so a slow reader skips frames
+    instead of queueing them.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.part = None
+        self.seq = 0
+        self.updated = None
+        self.closed = False
+
+    def write(self, jpeg: bytes) -> int:
+        part = mjpeg_part(jpeg)
+        with self._cond:
+            self.part = part
+            self.seq += 1
+            self.updated = time.monotonic()
+            self._cond.notify_all()
+        return len(jpeg)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        with self._cond:
+            self.closed = False
+            self.part = None  # don't greet new viewers with a frame from last time
+
+    def wait(self, after: int, timeout: float):
+        """(seq, part) for the newest frame with seq > after, or None on timeout/close."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq > after or self.closed, timeout):
+                return None
+            if self.seq <= after:
+                return None
+            return self.seq, self.part